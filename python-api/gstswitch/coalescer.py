@@ -0,0 +1,199 @@
+"""
+The coalescer sits between a fast producer of face or tracking markers
+and the gst-switch-srv. It forwards at most one marker set per frame
+interval and drops the ones which were replaced before they were sent.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import logging
+import threading
+import time
+from .connection import Connection
+
+__all__ = ["MarkerCoalescer", ]
+
+
+class MarkerCoalescer(object):
+
+    """Rate-limits mark_face and mark_tracking of a Controller.
+
+    Only the latest marker set submitted within an interval is sent, as a
+    fire-and-forget call which does not wait for the gst-switch-srv.
+    Sending happens on a background thread, so submitting never blocks.
+    The sender uses a DBus connection of its own, as the Controller is not
+    safe to share with the thread using it.
+
+    Attributes:
+      submitted (dict): Marker sets submitted per method
+      sent (dict): Marker sets sent per method
+      dropped (dict): Marker sets replaced before they were sent
+      failed (dict): Marker sets which could not be sent
+
+    :param controller: The Controller whose gst-switch-srv the markers
+    are sent to
+    :param interval: Seconds between two marker sets of one method,
+    e.g. 1.0 / framerate of the output
+    """
+
+    METHODS = ('mark_face', 'mark_tracking')
+
+    def __init__(self, controller, interval=1.0 / 25):
+        super(MarkerCoalescer, self).__init__()
+        if interval < 0:
+            raise ValueError("interval must not be negative, not {0}"
+                             .format(interval))
+        self.controller = controller
+        self.interval = interval
+
+        self.submitted = dict((method, 0) for method in self.METHODS)
+        self.sent = dict((method, 0) for method in self.METHODS)
+        self.dropped = dict((method, 0) for method in self.METHODS)
+        self.failed = dict((method, 0) for method in self.METHODS)
+
+        self._cond = threading.Condition()
+        # serializes the background thread and flush() on the connection
+        self._send_lock = threading.Lock()
+        self._connection = None
+        self._pending = {}
+        self._next_send = dict((method, 0) for method in self.METHODS)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run,
+                                        name='gstswitch-markers')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def mark_face(self, faces):
+        """Submit the faces to mark
+
+        :param faces: list of (x, y, w, h) tuples
+        :returns: None
+        """
+        self._submit('mark_face', faces)
+
+    def mark_tracking(self, faces):
+        """Submit the regions to track
+
+        :param faces: list of (x, y, w, h) tuples
+        :returns: None
+        """
+        self._submit('mark_tracking', faces)
+
+    def _submit(self, method, faces):
+        """Non-public method: Replace the pending marker set of method"""
+        faces = [tuple(face) for face in faces]
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('MarkerCoalescer is closed')
+            self.submitted[method] += 1
+            if method in self._pending:
+                self.dropped[method] += 1
+            self._pending[method] = faces
+            self._cond.notify()
+
+    def stats(self):
+        """Get a snapshot of the counters
+
+        :returns: dict of method to dict with submitted, sent,
+        dropped and failed
+        """
+        with self._cond:
+            return dict((method, {'submitted': self.submitted[method],
+                                  'sent': self.sent[method],
+                                  'dropped': self.dropped[method],
+                                  'failed': self.failed[method]})
+                        for method in self.METHODS)
+
+    def flush(self):
+        """Send the pending marker sets right away
+
+        :returns: None
+        """
+        with self._cond:
+            due = self._pending
+            self._pending = {}
+        self._send(due)
+
+    def close(self, timeout=None):
+        """Send the pending marker sets and stop the background thread
+
+        :param timeout: seconds to wait for the thread at most
+        :returns: None
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self.flush()
+        with self._send_lock:
+            if self._connection is not None:
+                self._connection.disconnect_dbus()
+                self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _take_due(self):
+        """Non-public method: Wait until a pending marker set is due and
+        take all due ones. Must be called holding the condition.
+
+        :returns: dict of method to faces, empty once closed
+        """
+        while not self._closed:
+            now = time.time()
+            due = {}
+            wait = None
+            for method in list(self._pending):
+                remaining = self._next_send[method] - now
+                if remaining <= 0:
+                    due[method] = self._pending.pop(method)
+                    self._next_send[method] = now + self.interval
+                elif wait is None or remaining < wait:
+                    wait = remaining
+            if due:
+                return due
+            self._cond.wait(wait)
+        return {}
+
+    def _run(self):
+        """Non-public method: Body of the background thread"""
+        while True:
+            with self._cond:
+                due = self._take_due()
+            if not due:
+                return
+            self._send(due)
+
+    def _connect(self):
+        """Non-public method: Get the connection of the sender, replacing
+        it when it is closed. Must be called holding the send lock.
+        """
+        if self._connection is None or \
+                not self._connection.is_connected():
+            connection = Connection(
+                address=self.controller.address,
+                bus_name=self.controller.bus_name,
+                object_path=self.controller.object_path,
+                default_interface=self.controller.default_interface)
+            connection.connect_dbus()
+            self._connection = connection
+        return self._connection
+
+    def _send(self, due):
+        """Non-public method: Send the marker sets without a reply"""
+        for method, faces in due.items():
+            # pylint: disable=broad-except
+            try:
+                with self._send_lock:
+                    self._connect().call_oneway(method, faces)
+            except Exception:
+                # keep the thread alive, later marker sets may succeed
+                logging.exception('Sending %s failed', method)
+                with self._cond:
+                    self.failed[method] += 1
+            else:
+                with self._cond:
+                    self.sent[method] += 1
@@ -0,0 +1,187 @@
+"""
+The compare module checks frames against an expected image while they
+arrive. The metrics work on the uint8 data with integer NumPy operations
+where possible, can be limited to a region like the PIP rectangle, and the
+comparison stops at the first frame that matches.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import math
+import logging
+from collections import namedtuple
+
+import numpy
+
+__all__ = ["Comparison", "FrameMatcher", "abs_diff", "max_deviation",
+           "psnr", "ssim", ]
+
+
+Comparison = namedtuple('Comparison', ['match', 'max_dev', 'psnr', 'ssim'])
+Comparison.__doc__ = """The result of comparing one frame
+
+:param match: True if the frame is within all tolerances
+:param max_dev: The largest difference of two subpixels
+:param psnr: The peak signal-to-noise ratio in dB, inf for equal images,
+    None if not required
+:param ssim: The structural similarity between -1 and 1, None if not
+    required
+"""
+
+# stabilise the SSIM of flat images, (0.01 * 255) ** 2 and (0.03 * 255) ** 2
+SSIM_C1 = 6.5025
+SSIM_C2 = 58.5225
+
+
+def abs_diff(image, expected):
+    """Get the absolute difference of two uint8 images as uint8, without
+    the overflow of a plain subtraction
+
+    :returns: uint8 array of the shape of the images
+    """
+    return numpy.maximum(image, expected) - numpy.minimum(image, expected)
+
+
+def max_deviation(image, expected):
+    """Get the largest difference of two subpixels, ie 2 for an expected
+    pixel #808080 and an actual pixel #808182
+
+    :returns: int, 0 for equal images
+    """
+    if image.size == 0:
+        return 0
+    return int(abs_diff(image, expected).max())
+
+
+def psnr(image, expected):
+    """Get the peak signal-to-noise ratio of two uint8 images
+
+    :returns: float in dB, inf for equal images
+    """
+    diff = abs_diff(image, expected).astype(numpy.uint16)
+    squared = int(numpy.sum(diff * diff, dtype=numpy.uint64))
+    if squared == 0:
+        return float('inf')
+    mse = float(squared) / diff.size
+    return 10 * math.log10(255 * 255 / mse)
+
+
+def ssim(image, expected):
+    """Get the structural similarity of two uint8 images, computed over the
+    whole image instead of a sliding window
+
+    :returns: float between -1 and 1, 1 for equal images
+    """
+    img = image.astype(numpy.float32).ravel()
+    exp = expected.astype(numpy.float32).ravel()
+    mean_img = img.mean()
+    mean_exp = exp.mean()
+    img -= mean_img
+    exp -= mean_exp
+    var_img = float(numpy.dot(img, img)) / img.size
+    var_exp = float(numpy.dot(exp, exp)) / exp.size
+    covar = float(numpy.dot(img, exp)) / img.size
+    return ((2 * mean_img * mean_exp + SSIM_C1) * (2 * covar + SSIM_C2) /
+            ((mean_img ** 2 + mean_exp ** 2 + SSIM_C1) *
+             (var_img + var_exp + SSIM_C2)))
+
+
+class FrameMatcher(object):
+
+    """Compare frames against an expected image
+
+    A frame matches when it is within every tolerance given. The cheap
+    max_dev test comes first, the PSNR and the SSIM are only computed
+    when they are required and the frame passed the tests before.
+
+    :param expected: The expected image as uint8 array, (height, width) or
+        (height, width, channels)
+    :param region: Only compare a part of the images, either a rectangle
+        (x, y, width, height) or a boolean array of (height, width)
+    :param max_dev: The largest difference of two subpixels allowed, 0 for
+        pixel-perfect matches, None to not test it
+    :param min_psnr: The lowest PSNR in dB allowed, None to not test it
+    :param min_ssim: The lowest SSIM allowed, None to not test it
+    """
+
+    def __init__(self, expected, region=None, max_dev=0, min_psnr=None,
+                 min_ssim=None):
+        super(FrameMatcher, self).__init__()
+        self.log = logging.getLogger('frame-matcher')
+
+        expected = numpy.asarray(expected)
+        if expected.dtype != numpy.uint8:
+            raise ValueError("The expected image must be uint8, not {0}"
+                             .format(expected.dtype))
+        self.expected = expected
+        self.region = region
+        self.max_dev = max_dev
+        self.min_psnr = min_psnr
+        self.min_ssim = min_ssim
+        self._expected_region = self.crop(expected)
+
+    def crop(self, image):
+        """Get the region of image which is compared
+
+        :returns: a view for a rectangle, a copy of the pixels for a mask
+        """
+        if self.region is None:
+            return image
+        if isinstance(self.region, tuple):
+            xpos, ypos, width, height = self.region
+            return image[ypos:ypos + height, xpos:xpos + width]
+        return image[self.region]
+
+    def compare(self, image):
+        """Compare one image
+
+        :param image: uint8 array of the shape of the expected image
+        :returns: the Comparison
+        :raises ValueError: The image does not have the expected shape
+        """
+        if image.shape != self.expected.shape:
+            raise ValueError("Expected an image of {0}, not {1}"
+                             .format(self.expected.shape, image.shape))
+        image = self.crop(image)
+        expected = self._expected_region
+
+        dev = max_deviation(image, expected)
+        match = self.max_dev is None or dev <= self.max_dev
+        res_psnr = res_ssim = None
+        if match and self.min_psnr is not None:
+            res_psnr = psnr(image, expected)
+            match = res_psnr >= self.min_psnr
+        if match and self.min_ssim is not None:
+            res_ssim = ssim(image, expected)
+            match = res_ssim >= self.min_ssim
+        return Comparison(match, dev, res_psnr, res_ssim)
+
+    def difference(self, image):
+        """Get the absolute difference of image and the expected image,
+        ie to save it for inspection
+
+        :returns: uint8 array
+        """
+        return abs_diff(image, self.expected)
+
+    def first_match(self, frames):
+        """Compare frames as they arrive until one matches
+
+        :param frames: iterable of uint8 arrays or of objects with an array
+            attribute like the Frames of a FrameGrabber, which may be
+            released once the next frame is requested
+        :returns: tuple of the matching Comparison or the one of the last
+            frame, and a copy of the last image compared; (None, None)
+            without frames
+        """
+        result = image = None
+        for count, frame in enumerate(frames, 1):
+            array = getattr(frame, 'array', frame)
+            result = self.compare(array)
+            # the frame may be gone when the next one is requested
+            image = numpy.array(array)
+            self.log.debug("frame %d: %s", count, result)
+            if result.match:
+                self.log.info("frame %d matches: %s", count, result)
+                break
+        return result, image
@@ -8,6 +8,7 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 from gi.repository import Gio, GLib
 from .exception import ConnectionError
+from .future import DBusFuture
 import sys
 
 __all__ = ["Connection", ]
@@ -24,6 +25,25 @@ class Connection(object):
     """
     CONNECTION_FLAGS = Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
 
+    # (argument signature, reply signature) of the remote methods
+    METHOD_SIGNATURES = {
+        'get_compose_port': (None, '(i)'),
+        'get_encode_port': (None, '(i)'),
+        'get_audio_port': (None, '(i)'),
+        'get_preview_ports': (None, '(s)'),
+        'get_preview_port_list': (None, '(a(iii))'),
+        'set_composite_mode': ('(i)', '(b)'),
+        'get_composite_mode': (None, '(i)'),
+        'set_encode_mode': ('(i)', '(b)'),
+        'new_record': (None, '(b)'),
+        'adjust_pip': ('(iiii)', '(u)'),
+        'switch': ('(ii)', '(b)'),
+        'apply_scene': ('(iiiiiii)', '(b)'),
+        'click_video': ('(iiii)', '(b)'),
+        'mark_face': ('(a(iiii))', None),
+        'mark_tracking': ('(a(iiii))', None),
+    }
+
     def __init__(
             self,
             address="tcp:host=127.0.0.1,port=5000",
@@ -34,6 +54,7 @@ class Connection(object):
 
         super(Connection, self).__init__()
         self.connection = None
+        self._subscription_id = None
         self._address = None
         self._bus_name = None
         self._object_path = None
@@ -154,13 +175,48 @@ class Connection(object):
             new_message = "{1} ({0})".format(message, self.address)
             raise ConnectionError(new_message)
 
+    def is_connected(self):
+        """Check whether the connection to the gst-switch-srv is usable.
+        Gio marks a connection as closed as soon as the remote peer
+        hangs up, so this does not cost a round trip.
+
+        :params: None
+        :returns: True if connected and not closed
+        """
+        if self.connection is None:
+            return False
+        return not self.connection.is_closed()
+
+    def disconnect_dbus(self):
+        """Drop the signal subscription and close the connection
+        to the gst-switch-srv. Does nothing if not connected.
+        Sets self.connection to None
+
+        :params: None
+        :returns: Nothing
+        """
+        connection = self.connection
+        if connection is None:
+            return
+        self.connection = None
+        try:
+            if self._subscription_id is not None:
+                connection.signal_unsubscribe(self._subscription_id)
+            if not connection.is_closed():
+                connection.close_sync(None)
+        except GLib.GError:
+            # the connection is thrown away anyway
+            pass
+        finally:
+            self._subscription_id = None
+
     def signal_subscribe(self, signal_handler):
         """Subscribe to Signals on the bus"""
         if not callable(signal_handler):
             raise ValueError('Provided signal_handler is not callable')
 
         try:
-            self.connection.signal_subscribe(
+            self._subscription_id = self.connection.signal_subscribe(
                 None,  # sender
                 self.default_interface,
                 None,  # member
@@ -174,6 +230,110 @@ class Connection(object):
             new_message = "{1} ({0})".format(message, self.address)
             raise ConnectionError(new_message)
 
+    def call_async(self, method_name, *args, **kwargs):
+        """Invoke method_name remotely without waiting for the reply.
+        The reply is dispatched by the GLib main context that is the
+        thread-default context of the calling thread.
+
+        :param method_name: one of the methods in METHOD_SIGNATURES
+        :param args: the arguments of the remote method
+        :param timeout: timeout of the call in milliseconds,
+        -1 for the default timeout of Gio
+        :returns: DBusFuture resolving to the GVariant returned by the
+        gst-switch-srv
+        :raises ValueError: Unknown method_name
+        :raises ConnectionError: GError occurs while sending the call
+        """
+        timeout = kwargs.pop('timeout', -1)
+        if kwargs:
+            raise TypeError("Unexpected keyword arguments: {0}"
+                            .format(', '.join(kwargs)))
+        try:
+            in_sig, out_sig = self.METHOD_SIGNATURES[method_name]
+        except KeyError:
+            raise ValueError("Unknown remote method '{0}'"
+                             .format(method_name))
+
+        params = None
+        if in_sig is not None:
+            params = GLib.Variant(in_sig, tuple(args))
+        reply_type = None
+        if out_sig is not None:
+            reply_type = GLib.VariantType.new(out_sig)
+
+        future = DBusFuture(method_name)
+
+        def _on_reply(connection, res, _):
+            """Complete the future with the reply"""
+            try:
+                result = connection.call_finish(res)
+            except GLib.GError as error:
+                message = error.message
+                new_message = "{0}: {1}".format(message, method_name)
+                future.set_exception(ConnectionError(new_message))
+            else:
+                future.set_result(result)
+
+        try:
+            self.connection.call(
+                self.bus_name,
+                self.object_path,
+                self.default_interface,
+                method_name,
+                params,
+                reply_type,
+                Gio.DBusCallFlags.NONE,
+                timeout,
+                None,
+                _on_reply,
+                None)
+        except GLib.GError as error:
+            message = error.message
+            new_message = "{0}: {1}".format(message, method_name)
+            raise ConnectionError(new_message)
+        return future
+
+    def call_oneway(self, method_name, *args):
+        """Invoke method_name remotely as fire-and-forget. No reply is
+        requested from the gst-switch-srv and the bus does not try to
+        auto-start it, so this never blocks and never dispatches anything
+        on a main context.
+
+        :param method_name: one of the methods in METHOD_SIGNATURES
+        :param args: the arguments of the remote method
+        :returns: None
+        :raises ValueError: Unknown method_name
+        :raises ConnectionError: GError occurs while sending the call
+        """
+        try:
+            in_sig, _ = self.METHOD_SIGNATURES[method_name]
+        except KeyError:
+            raise ValueError("Unknown remote method '{0}'"
+                             .format(method_name))
+
+        params = None
+        if in_sig is not None:
+            params = GLib.Variant(in_sig, tuple(args))
+
+        try:
+            # without a callback Gio flags the message NO_REPLY_EXPECTED
+            self.connection.call(
+                self.bus_name,
+                self.object_path,
+                self.default_interface,
+                method_name,
+                params,
+                None,
+                Gio.DBusCallFlags.NO_AUTO_START,
+                -1,
+                None,
+                None,
+                None)
+        except GLib.GError as error:
+            message = error.message
+            new_message = "{0}: {1}".format(message, method_name)
+            raise ConnectionError(new_message)
+
     def get_compose_port(self):
         """get_compose_port(out i port);
         Calls get_compose_port remotely
@@ -279,6 +439,33 @@ class Connection(object):
             new_message = "{0}: {1}".format(message, "get_preview_ports")
             raise ConnectionError(new_message)
 
+    def get_preview_port_list(self):
+        """get_preview_port_list(out a(iii) ports);
+        Calls get_preview_port_list remotely
+
+        :param: None
+        :returns: tuple with first element a list of
+        (port, serve, type) tuples
+        """
+        try:
+            args = None
+            connection = self.connection
+            ports = connection.call_sync(
+                self.bus_name,
+                self.object_path,
+                self.default_interface,
+                'get_preview_port_list',
+                args,
+                GLib.VariantType.new("(a(iii))"),
+                Gio.DBusCallFlags.NONE,
+                -1,
+                None)
+            return ports
+        except GLib.GError as error:
+            message = error.message
+            new_message = "{0}: {1}".format(message, "get_preview_port_list")
+            raise ConnectionError(new_message)
+
     def set_composite_mode(self, mode):
         """set_composite_mode(in  i channel,
                                 out b result);
@@ -445,6 +632,46 @@ class Connection(object):
             new_message = "{0}: {1}".format(message, "switch")
             raise ConnectionError(new_message)
 
+    def apply_scene(self, mode, port_a, port_b, xpos, ypos, width, height):
+        """apply_scene(in  i mode,
+                            in  i port_a,
+                            in  i port_b,
+                            in  i x,
+                            in  i y,
+                            in  i w,
+                            in  i h,
+                            out b result);
+        Calls apply_scene remotely
+
+        :param mode: The new composite mode, -1 to keep the current one
+        :param port_a: The port for channel A, -1 to keep it
+        :param port_b: The port for channel B, -1 to keep it
+        :param xpos: the X position of the PIP
+        :param ypos: the Y position of the PIP
+        :param width: the width of the PIP, -1 for the default of the mode
+        :param height: the height of the PIP, -1 for the default of the mode
+        :returns: tuple with first element True if requested
+        """
+        try:
+            args = GLib.Variant('(iiiiiii)', (mode, port_a, port_b,
+                                              xpos, ypos, width, height,))
+            connection = self.connection
+            result = connection.call_sync(
+                self.bus_name,
+                self.object_path,
+                self.default_interface,
+                'apply_scene',
+                args,
+                GLib.VariantType.new("(b)"),
+                Gio.DBusCallFlags.NONE,
+                -1,
+                None)
+            return result
+        except GLib.GError as error:
+            message = error.message
+            new_message = "{0}: {1}".format(message, "apply_scene")
+            raise ConnectionError(new_message)
+
     def click_video(self, xpos, ypos, width, height):
         """click_video(in  i x,
                             in  i y,
@@ -482,11 +709,11 @@ class Connection(object):
         """mark_face(in  a(iiii) faces);
         Calls mark_face remotely
 
-        :param faces: tuple having four elements
-        :returns: tuple with first element True if requested
+        :param faces: list of tuples having four elements
+        :returns: empty GVariant tuple
         """
         try:
-            args = GLib.Variant('a(iiii)', faces)
+            args = GLib.Variant('(a(iiii))', (faces,))
             connection = self.connection
             result = connection.call_sync(
                 self.bus_name,
@@ -494,7 +721,7 @@ class Connection(object):
                 self.default_interface,
                 'mark_face',
                 args,
-                GLib.VariantType.new("(b)"),
+                None,
                 Gio.DBusCallFlags.NONE,
                 -1,
                 None)
@@ -508,11 +735,11 @@ class Connection(object):
         """mark_tracking(in  a(iiii) faces);
         Calls mark_tracking remotely
 
-        :param faces: tuple having four elements
-        :returns: tuple with first element True if requested
+        :param faces: list of tuples having four elements
+        :returns: empty GVariant tuple
         """
         try:
-            args = GLib.Variant('a(iiii)', faces)
+            args = GLib.Variant('(a(iiii))', (faces,))
             connection = self.connection
             result = connection.call_sync(
                 self.bus_name,
@@ -520,7 +747,7 @@ class Connection(object):
                 self.default_interface,
                 'mark_tracking',
                 args,
-                GLib.VariantType.new("(b)"),
+                None,
                 Gio.DBusCallFlags.NONE,
                 -1,
                 None)
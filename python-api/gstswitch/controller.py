@@ -7,10 +7,13 @@ which can be used to invoke the remote methods.
 from __future__ import absolute_import, print_function, unicode_literals
 
 import ast
+import logging
+import threading
+from six.moves import queue
 from .connection import Connection
-from .exception import ConnectionReturnError
+from .exception import ConnectionReturnError, ConnectionError
 
-__all__ = ["Controller", ]
+__all__ = ["Controller", "SceneBatch", ]
 
 
 class Controller(object):
@@ -27,6 +30,9 @@ class Controller(object):
     VIDEO_CHANNEL_A = ord('A')
     VIDEO_CHANNEL_B = ord('B')
     AUDIO_CHANNEL = ord('a')
+    SIGNALS = ('preview_port_added', 'preview_port_removed',
+               'new_mode_online', 'show_face_marker',
+               'show_track_marker', 'select_face')
 
     def __init__(
             self,
@@ -57,6 +63,12 @@ class Controller(object):
         self.callbacks_show_track_marker = []
         self.callbacks_select_face = []
 
+        # signal name -> callback list, looked up once per signal
+        self._signal_handlers = dict(
+            (name, getattr(self, 'callbacks_' + name))
+            for name in self.SIGNALS)
+        self._signal_worker = None
+
     @property
     def address(self):
         """
@@ -150,21 +162,59 @@ class Controller(object):
                                  "doc/dbus-specification.html"
                                  "#message-protocol-names-interface")
 
-    def establish_connection(self):
-        """Establishes a fresh connection to the dbus
+    def establish_connection(self, force=False):
+        """Establishes a connection to the dbus if there is no usable one.
+        The connection is created lazily and reused by all following calls
+        as long as it is open. A connection which got closed (ie because
+        the server went away) is replaced by a fresh one.
         Connection stored as self.connection
 
-        :param: None
+        :param force: Drop the current connection and always connect anew
         :returns: None
         """
-        self.connection = Connection(
+        if not force and self.connection is not None and \
+                self.connection.is_connected():
+            return
+
+        self.close_connection()
+        connection = Connection(
             address=self.address,
             bus_name=self.bus_name,
             object_path=self.object_path,
             default_interface=self.default_interface)
 
-        self.connection.connect_dbus()
-        self.connection.signal_subscribe(self.cb_signal_handler)
+        connection.connect_dbus()
+        connection.signal_subscribe(self.cb_signal_handler)
+        self.connection = connection
+
+    def close_connection(self):
+        """Close the connection to the dbus, if there is one.
+        The next remote call will establish a new connection.
+
+        :param: None
+        :returns: None
+        """
+        connection = self.connection
+        self.connection = None
+        if isinstance(connection, Connection):
+            connection.disconnect_dbus()
+
+    def _call_remote(self, method, *args):
+        """Non-public method: Invoke method on the connection, establishing
+        it first if required. When the call fails because the connection
+        was lost in the meantime, reconnects and retries once.
+
+        :param method: name of the Connection method to call
+        :returns: the value returned by the Connection method
+        """
+        self.establish_connection()
+        try:
+            return getattr(self.connection, method)(*args)
+        except ConnectionError:
+            if self.connection is None or self.connection.is_connected():
+                raise
+        self.establish_connection(force=True)
+        return getattr(self.connection, method)(*args)
 
     def cb_signal_handler(self, connection, sender_name, object_path,
                           interface_name, signal_name, parameters, user_data):
@@ -174,21 +224,88 @@ class Controller(object):
         For params see Gio-Docs: <https://lazka.github.io/pgi-docs/#Gio-2.0/
         classes/DBusConnection.html#Gio.DBusConnection.signal_subscribe>
         """
-        try:
-            callbacks = getattr(self, 'callbacks_' + signal_name)
-            if not isinstance(callbacks, list):
-                raise AttributeError()
-
-            unpack = parameters.unpack()
-            for callback in callbacks:
-                # We're passing the values unpacked from the GVariant as-is
-                # to the callback. The author of the callback is responsible
-                # to make sure that it's arguments match with the DBus Signal
-                # Specification for the particular Signal he's subscribing for
-                callback(*unpack)
+        callbacks = self._signal_handlers.get(signal_name)
+        if not callbacks:
+            return
 
-        except AttributeError:
-            pass
+        unpack = parameters.unpack()
+        # iterate over a copy, callbacks may unsubscribe themselves
+        for callback in tuple(callbacks):
+            # We're passing the values unpacked from the GVariant as-is
+            # to the callback. The author of the callback is responsible
+            # to make sure that it's arguments match with the DBus Signal
+            # Specification for the particular Signal he's subscribing for
+            callback(*unpack)
+
+    def subscribe(self, signal_name, callback, accept=None, threaded=False):
+        """Register a Callback for a Signal
+
+        :param signal_name: One of SIGNALS
+        :param callback: callable taking the arguments of the Signal
+        :param accept: callable taking the same arguments, the Callback is
+        only called for Signals for which it returns True
+        :param threaded: True to call the Callback from a worker thread, so
+        a slow Callback does not block the GLib main loop
+        :returns: None
+        :raises ValueError: Unknown signal or callback is not callable
+        """
+        callbacks = self._signal_handlers.get(signal_name)
+        if callbacks is None:
+            raise ValueError("Unknown signal '{0}'".format(signal_name))
+        if not callable(callback):
+            raise ValueError('Provided argument callback is not callable')
+        if accept is not None and not callable(accept):
+            raise ValueError('Provided argument accept is not callable')
+
+        if accept is None and not threaded:
+            callbacks.append(callback)
+            return
+
+        start_worker = self._start_signal_worker if threaded else None
+        callbacks.append(_SignalHandler(callback, accept, start_worker))
+
+    def unsubscribe(self, signal_name, callback):
+        """Remove a Callback registered for a Signal
+
+        :param signal_name: One of SIGNALS
+        :param callback: the Callback as it was registered
+        :returns: True if the Callback was registered
+        :raises ValueError: Unknown signal
+        """
+        callbacks = self._signal_handlers.get(signal_name)
+        if callbacks is None:
+            raise ValueError("Unknown signal '{0}'".format(signal_name))
+
+        for entry in callbacks:
+            if entry is callback or (isinstance(entry, _SignalHandler) and
+                                     entry.callback is callback):
+                callbacks.remove(entry)
+                return True
+        return False
+
+    def _start_signal_worker(self):
+        """Non-public method: Get the worker thread for threaded Callbacks,
+        starting it if required
+        """
+        if self._signal_worker is None:
+            self._signal_worker = _SignalWorker()
+            self._signal_worker.start()
+        return self._signal_worker
+
+    def stop_signal_worker(self, timeout=None):
+        """Stop the worker thread calling threaded Callbacks after it
+        delivered the pending Signals. It is started again by the next
+        threaded Signal.
+
+        :param timeout: seconds to wait for the thread at most
+        :returns: None
+        """
+        worker = self._signal_worker
+        self._signal_worker = None
+        if worker is None:
+            return
+        worker.stop()
+        worker.join(timeout)
 
     def get_compose_port(self):
         """Get the compose port number
@@ -196,7 +313,7 @@ class Controller(object):
         :param: None
         :returns: compose port number
         """
-        conn = self.connection.get_compose_port()
+        conn = self._call_remote('get_compose_port')
         try:
             compose_port = conn.unpack()[0]
             return compose_port
@@ -210,7 +327,7 @@ class Controller(object):
         :param: None
         :returns: encode port number
         """
-        conn = self.connection.get_encode_port()
+        conn = self._call_remote('get_encode_port')
         try:
             encode_port = conn.unpack()[0]
             return encode_port
@@ -224,7 +341,7 @@ class Controller(object):
         :param: None
         :returns: audio port number
         """
-        conn = self.connection.get_audio_port()
+        conn = self._call_remote('get_audio_port')
         try:
             audio_port = conn.unpack()[0]
             return audio_port
@@ -238,7 +355,7 @@ class Controller(object):
         :param: None
         :returns: list of all preview ports
         """
-        conn = self.connection.get_preview_ports()
+        conn = self._call_remote('get_preview_ports')
         try:
             res = conn.unpack()[0]
             preview_ports = self.parse_preview_ports(res)
@@ -247,6 +364,20 @@ class Controller(object):
             raise ConnectionReturnError('Connection returned invalid values. '
                                         'Should return a GVariant tuple')
 
+    def get_preview_port_list(self):
+        """Get all the preview ports together with what they serve
+
+        :param: None
+        :returns: list of (port, serve, type) tuples
+        """
+        conn = self._call_remote('get_preview_port_list')
+        try:
+            res = conn.unpack()[0]
+            return [tuple(port) for port in res]
+        except (AttributeError, TypeError):
+            raise ConnectionReturnError('Connection returned invalid values. '
+                                        'Should return a GVariant tuple')
+
     def set_composite_mode(self, mode):
         """Set the current composite mode.
         Modes allowed are:
@@ -258,12 +389,11 @@ class Controller(object):
         :param mode: new composite mode
         :returns: True when requested
         """
-        self.establish_connection()
         # only modes from 0 to 3 are supported
         res = None
         if mode in range(0, 4):
             try:
-                conn = self.connection.set_composite_mode(mode)
+                conn = self._call_remote('set_composite_mode', mode)
                 res = conn.unpack()[0]
             except AttributeError:
                 raise ConnectionReturnError('Connection returned invalid '
@@ -284,11 +414,10 @@ class Controller(object):
 
         :returns: The current composition mode
         """
-        self.establish_connection()
         # only modes from 0 to 3 are supported
         res = None
         try:
-            conn = self.connection.get_composite_mode()
+            conn = self._call_remote('get_composite_mode')
             res = conn.unpack()[0]
             if res in range(0, 4):
                 print("Current composite mode is %u" % (res))
@@ -305,9 +434,8 @@ class Controller(object):
         :param: channel
         :returns: True when requested
         """
-        self.establish_connection()
         try:
-            conn = self.connection.set_encode_mode(channel)
+            conn = self._call_remote('set_encode_mode', channel)
             res = conn.unpack()[0]
             if res is not True:
                 # raise some exception
@@ -322,9 +450,8 @@ class Controller(object):
 
         :param: None
         """
-        self.establish_connection()
         try:
-            conn = self.connection.new_record()
+            conn = self._call_remote('new_record')
             res = conn.unpack()[0]
             if res is not True:
                 # raise some exception
@@ -343,9 +470,8 @@ class Controller(object):
         :param height: the height of the PIP
         :returns: result - PIP has been changed succefully
         """
-        self.establish_connection()
         try:
-            conn = self.connection.adjust_pip(xpos, ypos, width, height)
+            conn = self._call_remote('adjust_pip', xpos, ypos, width, height)
             res = conn.unpack()[0]
         except AttributeError:
             raise ConnectionReturnError('Connection returned invalid values. '
@@ -363,9 +489,8 @@ class Controller(object):
         :param port: The target port number
         :returns: True when requested
         """
-        self.establish_connection()
         try:
-            conn = self.connection.switch(channel, port)
+            conn = self._call_remote('switch', channel, port)
             res = conn.unpack()[0]
             if res is not True:
                 # raise some exception
@@ -375,6 +500,47 @@ class Controller(object):
             raise ConnectionReturnError('Connection returned invalid values. '
                                         'Should return a GVariant tuple')
 
+    def apply_scene(self, mode=-1, port_a=-1, port_b=-1,
+                    xpos=0, ypos=0, width=-1, height=-1):
+        """Switch the video channels and change the composite mode and the
+        PIP in one call. The server applies all of them with a single
+        transition of the composite pipeline.
+
+        :param mode: The new composite mode, -1 to keep the current one
+        :param port_a: The port for VIDEO_CHANNEL_A, -1 to keep it
+        :param port_b: The port for VIDEO_CHANNEL_B, -1 to keep it
+        :param xpos: the x position of the PIP
+        :param ypos: the y position of the PIP
+        :param width: the width of the PIP, -1 for the default of the mode
+        :param height: the height of the PIP, -1 for the default of the mode
+        :returns: True when requested
+        """
+        try:
+            conn = self._call_remote('apply_scene', mode, port_a, port_b,
+                                     xpos, ypos, width, height)
+            res = conn.unpack()[0]
+        except AttributeError:
+            raise ConnectionReturnError('Connection returned invalid values. '
+                                        'Should return a GVariant tuple')
+        return res
+
+    def apply_scene_async(self, mode=-1, port_a=-1, port_b=-1,
+                          xpos=0, ypos=0, width=-1, height=-1):
+        """Non-blocking variant of apply_scene
+
+        :returns: DBusFuture resolving to True when requested
+        """
+        return self._call_remote_async('apply_scene', mode, port_a, port_b,
+                                       xpos, ypos, width, height)
+
+    def batch(self):
+        """Start collecting a scene change which is applied in one go
+        by SceneBatch.commit
+
+        :returns: a new SceneBatch
+        """
+        return SceneBatch(self)
+
     def click_video(self, xpos, ypos, width, height):
         """User click on the video
 
@@ -384,9 +550,9 @@ class Controller(object):
         :param height:
         :returns: True when requested
         """
-        self.establish_connection()
         try:
-            conn = self.connection.click_video(xpos, ypos, width, height)
+            conn = self._call_remote('click_video', xpos, ypos, width,
+                                     height)
             res = conn.unpack()[0]
             if res is not True:
                 # raise some exception
@@ -403,8 +569,7 @@ class Controller(object):
         :returns: True when requested
         """
         # faces is list of a tuple of four elements
-        self.establish_connection()
-        self.connection.mark_face(faces)
+        self._call_remote('mark_face', faces)
 
     def mark_tracking(self, faces):
         """Mark tracking
@@ -412,8 +577,115 @@ class Controller(object):
         :param faces: tuple having four elements
         :returns: True when requested
         """
+        self._call_remote('mark_tracking', faces)
+
+    def _call_remote_async(self, method, *args):
+        """Non-public method: Invoke method on the connection without
+        waiting for the reply, establishing the connection first if
+        required.
+
+        :param method: name of the remote method
+        :returns: DBusFuture resolving to the first value of the reply
+        """
         self.establish_connection()
-        self.connection.mark_tracking(faces)
+        return self.connection.call_async(method, *args).then(
+            self._unpack_reply)
+
+    @classmethod
+    def _unpack_reply(cls, reply):
+        """Non-public method: Unpack the first value of a reply"""
+        try:
+            return reply.unpack()[0]
+        except AttributeError:
+            raise ConnectionReturnError('Connection returned invalid values. '
+                                        'Should return a GVariant tuple')
+
+    def get_compose_port_async(self):
+        """Non-blocking variant of get_compose_port
+
+        :returns: DBusFuture resolving to the compose port number
+        """
+        return self._call_remote_async('get_compose_port')
+
+    def get_encode_port_async(self):
+        """Non-blocking variant of get_encode_port
+
+        :returns: DBusFuture resolving to the encode port number
+        """
+        return self._call_remote_async('get_encode_port')
+
+    def get_audio_port_async(self):
+        """Non-blocking variant of get_audio_port
+
+        :returns: DBusFuture resolving to the audio port number
+        """
+        return self._call_remote_async('get_audio_port')
+
+    def get_preview_ports_async(self):
+        """Non-blocking variant of get_preview_ports
+
+        :returns: DBusFuture resolving to the list of all preview ports
+        """
+        return self._call_remote_async('get_preview_ports').then(
+            self.parse_preview_ports)
+
+    def get_preview_port_list_async(self):
+        """Non-blocking variant of get_preview_port_list
+
+        :returns: DBusFuture resolving to a list of (port, serve, type)
+        """
+        return self._call_remote_async('get_preview_port_list').then(
+            lambda res: [tuple(port) for port in res])
+
+    def set_composite_mode_async(self, mode):
+        """Non-blocking variant of set_composite_mode
+
+        :param mode: new composite mode
+        :returns: DBusFuture resolving to True when requested
+        :raises ValueError: mode is not one of the COMPOSITE_* modes
+        """
+        if mode not in range(0, 4):
+            raise ValueError("Unknown composite mode '{0}'".format(mode))
+        return self._call_remote_async('set_composite_mode', mode)
+
+    def get_composite_mode_async(self):
+        """Non-blocking variant of get_composite_mode
+
+        :returns: DBusFuture resolving to the current composition mode
+        """
+        return self._call_remote_async('get_composite_mode')
+
+    def new_record_async(self):
+        """Non-blocking variant of new_record
+
+        :returns: DBusFuture resolving to True when requested
+        """
+        return self._call_remote_async('new_record')
+
+    def adjust_pip_async(self, xpos, ypos, width, height):
+        """Non-blocking variant of adjust_pip
+
+        :returns: DBusFuture resolving to the changed components
+        """
+        return self._call_remote_async('adjust_pip',
+                                       xpos, ypos, width, height)
+
+    def switch_async(self, channel, port):
+        """Non-blocking variant of switch
+
+        :param channel: The channel to be switched
+        :param port: The target port number
+        :returns: DBusFuture resolving to True when requested
+        """
+        return self._call_remote_async('switch', channel, port)
+
+    def click_video_async(self, xpos, ypos, width, height):
+        """Non-blocking variant of click_video
+
+        :returns: DBusFuture resolving to True when requested
+        """
+        return self._call_remote_async('click_video',
+                                       xpos, ypos, width, height)
 
     @classmethod
     def parse_preview_ports(cls, res):
@@ -430,7 +702,7 @@ class Controller(object):
             preview_ports.append(int(tupl[0]))
         return preview_ports
 
-    def on_preview_port_added(self, callback):
+    def on_preview_port_added(self, callback, accept=None, threaded=False):
         """Register a Callback for the preview_port_added Signal
         which is fired, when a new Video or Audio-Source is connected
         to the Server and the Server opens a new Port where the Signal
@@ -444,14 +716,12 @@ class Controller(object):
                        1 = GST_SERVE_VIDEO_STREAM
                        2 = GST_SERVE_VIDEO_AUDIO
            int type  - Type of Branch serving the Video
-        """
-
-        if not callable(callback):
-            raise ValueError('Provided argument callback is not callable')
 
-        self.callbacks_preview_port_added.append(callback)
+        See subscribe for accept and threaded.
+        """
+        self.subscribe('preview_port_added', callback, accept, threaded)
 
-    def on_preview_port_removed(self, callback):
+    def on_preview_port_removed(self, callback, accept=None, threaded=False):
         """Register a Callback for the preview_port_removed Signal
         which is fired, when a Video or Audio-Source is disconnected
         from the Server and the Server closes its Port where the Signal
@@ -465,14 +735,12 @@ class Controller(object):
                         1 = GST_SERVE_VIDEO_STREAM
                         2 = GST_SERVE_VIDEO_AUDIO
             int type  - Type of Branch serving the Video
-        """
 
-        if not callable(callback):
-            raise ValueError('Provided argument callback is not callable')
-
-        self.callbacks_preview_port_removed.append(callback)
+        See subscribe for accept and threaded.
+        """
+        self.subscribe('preview_port_removed', callback, accept, threaded)
 
-    def on_new_mode_online(self, callback):
+    def on_new_mode_online(self, callback, accept=None, threaded=False):
         """Register a Callback for the new_mode_online Signal
         which is fired, when the Composition-Mode was changed successfully.
 
@@ -482,14 +750,12 @@ class Controller(object):
                         1 = COMPOSE_MODE_PIP
                         2 = COMPOSE_MODE_DUAL_PREVIEW
                         3 = COMPOSE_MODE_DUAL_EQUAL
-        """
-
-        if not callable(callback):
-            raise ValueError('Provided argument callback is not callable')
 
-        self.callbacks_new_mode_online.append(callback)
+        See subscribe for accept and threaded.
+        """
+        self.subscribe('new_mode_online', callback, accept, threaded)
 
-    def on_show_face_marker(self, callback):
+    def on_show_face_marker(self, callback, accept=None, threaded=False):
         """Register a Callback for the show_face_marker Signal
         which is fired, when a Client has successfully set a face-marker
         by calling mark_face.
@@ -497,14 +763,12 @@ class Controller(object):
         The Callback takes the following Argument:
             array faces  - An Array of Tuples of 4 ints, each specifying
                            x, y, w, and h of a tracked region
-        """
-
-        if not callable(callback):
-            raise ValueError('Provided argument callback is not callable')
 
-        self.callbacks_show_face_marker.append(callback)
+        See subscribe for accept and threaded.
+        """
+        self.subscribe('show_face_marker', callback, accept, threaded)
 
-    def on_show_track_marker(self, callback):
+    def on_show_track_marker(self, callback, accept=None, threaded=False):
         """Register a Callback for the show_track_marker Signal
         which is fired, when a Client has successfully set a track-marker
         by calling mark_tracking.
@@ -512,14 +776,12 @@ class Controller(object):
         The Callback takes the following Argument:
             array faces  - An Array of Tuples of 4 ints, each specifying
                            x, y, w, and h of a tracked region
-        """
-
-        if not callable(callback):
-            raise ValueError('Provided argument callback is not callable')
 
-        self.callbacks_show_track_marker.append(callback)
+        See subscribe for accept and threaded.
+        """
+        self.subscribe('show_track_marker', callback, accept, threaded)
 
-    def on_select_face(self, callback):
+    def on_select_face(self, callback, accept=None, threaded=False):
         """Register a Callback for the select_face Signal
         which is fired, when a Client has successfully selected a face
         by calling click_video.
@@ -527,9 +789,160 @@ class Controller(object):
         The Callback takes the following Argument:
             int x  - X-Coordinate of the Click
             int y  - Y-Coordinate of the Click
+
+        See subscribe for accept and threaded.
         """
+        self.subscribe('select_face', callback, accept, threaded)
 
-        if not callable(callback):
-            raise ValueError('Provided argument callback is not callable')
 
-        self.callbacks_select_face.append(callback)
+class _SignalHandler(object):
+
+    """Non-public class: A Callback registered with a filter or to be
+    called from the worker thread
+
+    :param callback: The Callback
+    :param accept: None or callable deciding if a Signal is delivered
+    :param start_worker: None to call the Callback right away or a
+    callable returning the running _SignalWorker
+    """
+
+    def __init__(self, callback, accept, start_worker):
+        super(_SignalHandler, self).__init__()
+        self.callback = callback
+        self.accept = accept
+        self.start_worker = start_worker
+
+    def __call__(self, *args):
+        if self.accept is not None and not self.accept(*args):
+            return
+        if self.start_worker is None:
+            self.callback(*args)
+        else:
+            self.start_worker().put(self.callback, args)
+
+
+class _SignalWorker(threading.Thread):
+
+    """Non-public class: Calls threaded Callbacks in the order the Signals
+    arrived, off the GLib main loop
+    """
+
+    def __init__(self):
+        super(_SignalWorker, self).__init__(name='gstswitch-signals')
+        self.daemon = True
+        self._queue = queue.Queue()
+
+    def put(self, callback, args):
+        """Queue a call of callback with args"""
+        self._queue.put((callback, args))
+
+    def stop(self):
+        """Let the thread end after the calls queued so far"""
+        self._queue.put(None)
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            callback, args = item
+            # pylint: disable=broad-except
+            try:
+                callback(*args)
+            except Exception:
+                logging.exception('Signal callback %r failed', callback)
+
+
+class SceneBatch(object):
+
+    """Collects switching the video channels, a composite mode and a PIP
+    geometry and sends them to the gst-switch-srv as a single apply_scene
+    call, so viewers do not see the intermediate scenes.
+
+    Can be used as a context manager which commits on a clean exit:
+
+        with controller.batch() as scene:
+            scene.switch(Controller.VIDEO_CHANNEL_A, 3004)
+            scene.set_composite_mode(Controller.COMPOSITE_PIP)
+
+    :param controller: The Controller to send the scene through
+    """
+
+    def __init__(self, controller):
+        super(SceneBatch, self).__init__()
+        self.controller = controller
+        self.mode = -1
+        self.port_a = -1
+        self.port_b = -1
+        self.pip = (0, 0, -1, -1)
+
+    def switch(self, channel, port):
+        """Switch a video channel to the target port
+
+        :param channel: VIDEO_CHANNEL_A or VIDEO_CHANNEL_B
+        :param port: The target port number
+        :returns: the SceneBatch
+        :raises ValueError: channel is not a video channel
+        """
+        if channel == Controller.VIDEO_CHANNEL_A:
+            self.port_a = port
+        elif channel == Controller.VIDEO_CHANNEL_B:
+            self.port_b = port
+        else:
+            raise ValueError("Only the video channels can be batched, "
+                             "not '{0}'".format(channel))
+        return self
+
+    def set_composite_mode(self, mode):
+        """Set the composite mode
+
+        :param mode: new composite mode
+        :returns: the SceneBatch
+        :raises ValueError: mode is not one of the COMPOSITE_* modes
+        """
+        if mode not in range(0, 4):
+            raise ValueError("Unknown composite mode '{0}'".format(mode))
+        self.mode = mode
+        return self
+
+    def set_pip(self, xpos, ypos, width, height):
+        """Set the absolute PIP position and size
+
+        :param xpos: the x position of the PIP
+        :param ypos: the y position of the PIP
+        :param width: the width of the PIP
+        :param height: the height of the PIP
+        :returns: the SceneBatch
+        :raises ValueError: width or height are not positive
+        """
+        if width <= 0 or height <= 0:
+            raise ValueError("PIP size must be positive, not {0}x{1}"
+                             .format(width, height))
+        self.pip = (xpos, ypos, width, height)
+        return self
+
+    def _args(self):
+        """Non-public method: The arguments of apply_scene"""
+        return (self.mode, self.port_a, self.port_b) + tuple(self.pip)
+
+    def commit(self):
+        """Apply the collected scene
+
+        :returns: True when requested
+        """
+        return self.controller.apply_scene(*self._args())
+
+    def commit_async(self):
+        """Apply the collected scene without waiting for the reply
+
+        :returns: DBusFuture resolving to True when requested
+        """
+        return self.controller.apply_scene_async(*self._args())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        return False
@@ -0,0 +1,122 @@
+"""
+The events are the milestones of the gst-switch-srv, parsed from the lines
+it prints. They replace matching raw substrings of the output.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import re
+from collections import namedtuple
+
+__all__ = ["ServerEvent", "EventParser", "EVENT_PATTERNS", "durations", ]
+
+
+ServerEvent = namedtuple('ServerEvent', ['kind', 'time', 'data', 'line'])
+ServerEvent.__doc__ = """A milestone of the gst-switch-srv
+
+:param kind: One of the kinds in EVENT_PATTERNS
+:param time: time.time() when the line was read
+:param data: dict of the values parsed from the line
+:param line: The line printed by the server
+"""
+
+
+# (kind, literal every matching line contains, pattern)
+# The literal is a cheap test to skip lines before the pattern is tried.
+EVENT_PATTERNS = [
+    ('controller_listening', 'Controller is listening at: ',
+     re.compile(r'Controller is listening at: (?P<address>\S+)')),
+    ('port_opened', 'Listening on ',
+     re.compile(r'Listening on \S+ \((?P<host>.*):(?P<port>\d+)\)')),
+    ('socket_opened', 'Listening on unix socket ',
+     re.compile(r'Listening on unix socket (?P<path>\S+)')),
+    ('client_registered', 'registered: ',
+     re.compile(r'registered: (?P<id>\d+), (?P<path>[^,]+), '
+                r'(?P<interface>\S+)')),
+    ('case_started', 'online: ',
+     re.compile(r'^online: (?P<name>\S+) @(?P<clock>-?\d+)')),
+    ('case_ended', 'offline: ',
+     re.compile(r'^offline: (?P<name>\S+) @(?P<clock>-?\d+)')),
+    ('case_removed', 'Removed ',
+     re.compile(r'Removed (?P<name>\S+) ')),
+    ('pipeline_created', 'pipeline(',
+     re.compile(r'pipeline\((?P<case>[^)]*)\): (?P<description>.*)')),
+    ('transition_started', 'starting transition',
+     re.compile(r'starting transition')),
+    ('transition_ended', 'ending transition',
+     re.compile(r'ending transition')),
+]
+
+# values converted to int
+_INT_FIELDS = ('port', 'id', 'clock')
+
+
+class EventParser(object):
+
+    """Splits the output of the gst-switch-srv into lines and turns the
+    lines matching EVENT_PATTERNS into ServerEvents. Chunks may end in the
+    middle of a line, the rest is kept until the next chunk.
+
+    :param patterns: list of (kind, literal, compiled pattern)
+    """
+
+    def __init__(self, patterns=None):
+        super(EventParser, self).__init__()
+        self.patterns = EVENT_PATTERNS if patterns is None else patterns
+        self._partial = ''
+
+    def feed(self, chunk, timestamp):
+        """Parse a chunk of output
+
+        :param chunk: The output read
+        :param timestamp: The time the chunk was read
+        :returns: list of ServerEvent
+        """
+        lines = (self._partial + chunk).split('\n')
+        self._partial = lines.pop()
+        events = []
+        for line in lines:
+            event = self.parse_line(line, timestamp)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def parse_line(self, line, timestamp):
+        """Parse a single line
+
+        :returns: ServerEvent or None if the line is no milestone
+        """
+        # strip the ./tools/file.c:123:info: prefix of the log macros
+        message = line.split(':info: ', 1)[-1].strip()
+        for kind, literal, pattern in self.patterns:
+            if literal not in message:
+                continue
+            match = pattern.search(message)
+            if match is None:
+                continue
+            data = match.groupdict()
+            for field in _INT_FIELDS:
+                if field in data:
+                    data[field] = int(data[field])
+            return ServerEvent(kind, timestamp, data, line)
+        return None
+
+
+def durations(events, start_kind, end_kind):
+    """Pair each start event with the next end event
+
+    For example the durations of the transitions are
+    durations(events, 'transition_started', 'transition_ended')
+
+    :param events: iterable of ServerEvent in the order they happened
+    :returns: list of seconds
+    """
+    result = []
+    started = None
+    for event in events:
+        if event.kind == start_kind and started is None:
+            started = event.time
+        elif event.kind == end_kind and started is not None:
+            result.append(event.time - started)
+            started = None
+    return result
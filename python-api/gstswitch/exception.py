@@ -9,6 +9,7 @@ import six
 __all__ = [
     'BaseError', 'PathError', 'ServerProcessError', 'ConnectionError',
     'ConnectionReturnError', 'RangeError', 'InvalidIndexError',
+    'CallTimeoutError',
 ]
 
 
@@ -77,3 +78,9 @@ class SelectError(BaseError):
     """select.select returned with an unknown Error
        during ProcessMonitor.wait_for_output"""
     pass
+
+
+class CallTimeoutError(BaseError):
+
+    """Timeout while waiting for the result of an asynchronous remote call"""
+    pass
@@ -0,0 +1,196 @@
+"""
+The future holds the result of a remote method call which is still in
+flight. It is completed from the GLib main loop once the reply of the
+gst-switch-srv arrives.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import threading
+import time
+from gi.repository import GLib
+from .exception import CallTimeoutError
+
+__all__ = ["DBusFuture", "gather"]
+
+
+class DBusFuture(object):
+
+    """The pending result of an asynchronous remote method call.
+
+    The replies are dispatched by the GLib main context which was the
+    thread-default context when the call was made. Done-callbacks run
+    from that context. Waiting for the result either blocks until another
+    thread running a main loop on that context completes the future or,
+    if no one else owns the context, iterates it on the calling thread.
+
+    :param method_name: The name of the remote method, used in errors
+    :param context: The GLib.MainContext dispatching the reply,
+    defaults to the thread-default context
+    """
+
+    def __init__(self, method_name, context=None):
+        super(DBusFuture, self).__init__()
+        self.method_name = method_name
+        if context is None:
+            context = GLib.MainContext.ref_thread_default()
+        self._context = context
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def done(self):
+        """Check if the call has completed
+
+        :returns: True if a result or an exception is available
+        """
+        return self._event.is_set()
+
+    def set_result(self, result):
+        """Complete the future with result and run the done-callbacks"""
+        self._complete(result, None)
+
+    def set_exception(self, exception):
+        """Complete the future with exception and run the done-callbacks"""
+        self._complete(None, exception)
+
+    def _complete(self, result, exception):
+        """Non-public method: Store the outcome and run the callbacks"""
+        with self._lock:
+            if self._event.is_set():
+                raise RuntimeError("Future for '{0}' is already done"
+                                   .format(self.method_name))
+            self._result = result
+            self._exception = exception
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        """Register callback to be called with the future as its only
+        argument once the call completed. If it already is, callback is
+        called right away.
+
+        :param callback: callable taking the future
+        """
+        if not callable(callback):
+            raise ValueError('Provided argument callback is not callable')
+
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def then(self, transform):
+        """Chain a transformation of the result
+
+        :param transform: callable taking the result of this future
+        :returns: a new DBusFuture resolving to the transformed result.
+        Exceptions raised by this future or by transform are passed on.
+        """
+        future = DBusFuture(self.method_name, self._context)
+
+        def _chain(source):
+            """Complete the chained future"""
+            # pylint: disable=broad-except
+            if source._exception is not None:
+                future.set_exception(source._exception)
+                return
+            try:
+                value = transform(source._result)
+            except Exception as error:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+        self.add_done_callback(_chain)
+        return future
+
+    def wait(self, timeout=None):
+        """Block until the call completed
+
+        :param timeout: seconds to wait at most, None to wait forever
+        :returns: True if the call has completed
+        """
+        if self._event.is_set():
+            return True
+
+        context = self._context
+        if not context.acquire():
+            # someone else is running the main loop and delivers the reply
+            return self._event.wait(timeout)
+
+        try:
+            if timeout is None:
+                while not self._event.is_set():
+                    context.iteration(True)
+                return True
+
+            endtime = time.time() + timeout
+            while not self._event.is_set():
+                remaining = endtime - time.time()
+                if remaining <= 0:
+                    break
+                # wake the iteration up at the latest when the time is up
+                source = GLib.timeout_source_new(int(remaining * 1000) + 1)
+                source.set_callback(lambda *_: False)
+                source.attach(context)
+                try:
+                    context.iteration(True)
+                finally:
+                    source.destroy()
+            return self._event.is_set()
+        finally:
+            context.release()
+
+    def result(self, timeout=None):
+        """Get the result of the call, waiting for it if required
+
+        :param timeout: seconds to wait at most, None to wait forever
+        :returns: The result of the call
+        :raises CallTimeoutError: The call did not complete in time
+        :raises ConnectionError: The remote call failed
+        """
+        if not self.wait(timeout):
+            raise CallTimeoutError("Timeout while waiting for '{0}'"
+                                   .format(self.method_name))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        """Get the exception raised by the call, waiting for it if required
+
+        :param timeout: seconds to wait at most, None to wait forever
+        :returns: The exception or None if the call succeeded
+        :raises CallTimeoutError: The call did not complete in time
+        """
+        if not self.wait(timeout):
+            raise CallTimeoutError("Timeout while waiting for '{0}'"
+                                   .format(self.method_name))
+        return self._exception
+
+
+def gather(futures, timeout=None):
+    """Wait for several calls in flight and collect their results
+
+    :param futures: iterable of DBusFuture
+    :param timeout: seconds to wait at most for all of them together
+    :returns: list of results in the order of futures
+    :raises CallTimeoutError: Not all calls completed in time
+    """
+    futures = list(futures)
+    endtime = None if timeout is None else time.time() + timeout
+    results = []
+    for future in futures:
+        remaining = None
+        if endtime is not None:
+            remaining = max(0, endtime - time.time())
+        results.append(future.result(remaining))
+    return results
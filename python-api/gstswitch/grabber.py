@@ -0,0 +1,394 @@
+"""
+The grabber receives the output of a compose, preview or encode port of the
+gst-switch-srv inside the process and hands out its frames as NumPy arrays,
+or probes the caps the ports negotiated. Checking or monitoring a port then
+neither starts a gst-launch-1.0 process nor goes through an image file.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import GObject, Gst
+
+GObject.threads_init()
+Gst.init(None)
+
+import time
+import logging
+import fractions
+from collections import namedtuple
+
+import numpy
+
+from .exception import ConnectionError
+
+__all__ = ["Frame", "FrameGrabber", "ProbedCaps", "plane_layout",
+           "probe_caps", "probe_ports", ]
+
+
+# bytes per pixel of the packed raw video formats
+PACKED_FORMATS = {
+    'GRAY8': 1,
+    'RGB': 3, 'BGR': 3,
+    'RGBx': 4, 'BGRx': 4, 'xRGB': 4, 'xBGR': 4,
+    'RGBA': 4, 'BGRA': 4, 'ARGB': 4, 'ABGR': 4,
+}
+# planar formats with one luma and two quarter size chroma planes
+PLANAR_FORMATS = ('I420', 'YV12')
+
+
+def _round_up_4(value):
+    """Non-public function: Round value up to a multiple of 4"""
+    return (value + 3) & ~3
+
+
+def plane_layout(video_format, width, height):
+    """Get the planes of a raw video frame in the default memory layout of
+    GStreamer, where every row starts at a multiple of 4 bytes
+
+    :param video_format: The format field of the caps, ie 'I420'
+    :param width: The width of the frame
+    :param height: The height of the frame
+    :returns: list of (offset, rows, columns, stride, bytes per pixel) in
+        the order of the planes in memory
+    :raises ValueError: The format is not supported
+    """
+    if video_format in PACKED_FORMATS:
+        bpp = PACKED_FORMATS[video_format]
+        return [(0, height, width, _round_up_4(width * bpp), bpp)]
+    if video_format in PLANAR_FORMATS:
+        luma_stride = _round_up_4(width)
+        chroma_width = (width + 1) // 2
+        chroma_height = (height + 1) // 2
+        chroma_stride = _round_up_4(chroma_width)
+        first = luma_stride * chroma_height * 2
+        second = first + chroma_stride * chroma_height
+        return [(0, height, width, luma_stride, 1),
+                (first, chroma_height, chroma_width, chroma_stride, 1),
+                (second, chroma_height, chroma_width, chroma_stride, 1)]
+    raise ValueError("Unsupported video format: '{0}'".format(video_format))
+
+
+class Frame(object):
+
+    """A frame pulled from a FrameGrabber
+
+    The buffer of the frame stays mapped until release() is called, the
+    arrays are views on the mapped memory and must not be used after it.
+    They are zero-copy where PyGObject maps the buffer into a memoryview,
+    as with the overrides of gst-python. Use copy() to keep an image.
+
+    :param sample: The Gst.Sample pulled from the appsink
+    """
+
+    def __init__(self, sample):
+        super(Frame, self).__init__()
+        self.sample = sample
+        self.buffer = sample.get_buffer()
+        self.caps = sample.get_caps()
+        self.pts = self.buffer.pts
+
+        struct = self.caps.get_structure(0)
+        self.media_type = struct.get_name()
+        self.format = self._field(struct, 'format')
+        self.width = self._field(struct, 'width')
+        self.height = self._field(struct, 'height')
+
+        success, self._mapinfo = self.buffer.map(Gst.MapFlags.READ)
+        if not success:
+            raise ValueError("Unable to map the buffer of the frame")
+        self.data = self._mapinfo.data
+        self._planes = None
+
+    @staticmethod
+    def _field(struct, name):
+        """Non-public method: Get a field of the caps or None"""
+        if struct.has_field(name):
+            return struct.get_value(name)
+        return None
+
+    @property
+    def planes(self):
+        """Get the planes as uint8 arrays, (rows, columns) for one byte
+        and (rows, columns, bytes) for more bytes per pixel. Encoded or
+        unknown formats are a single flat array.
+        """
+        if self._mapinfo is None:
+            raise ValueError("The frame is released")
+        if self._planes is None:
+            try:
+                layout = plane_layout(self.format, self.width, self.height)
+            except ValueError:
+                layout = None
+            if layout is None:
+                self._planes = [numpy.frombuffer(self.data, numpy.uint8)]
+            else:
+                self._planes = [self._view(*plane) for plane in layout]
+        return self._planes
+
+    def _view(self, offset, rows, columns, stride, bpp):
+        """Non-public method: Get an array over a plane without copying,
+        the padding at the end of the rows is cut off
+        """
+        plane = numpy.frombuffer(self.data, numpy.uint8,
+                                 count=rows * stride, offset=offset)
+        plane = plane.reshape(rows, stride)[:, :columns * bpp]
+        if bpp > 1:
+            plane = plane.reshape(rows, columns, bpp)
+        return plane
+
+    @property
+    def array(self):
+        """Get the first plane, ie the whole image of a packed format like
+        RGB or the luma of I420
+        """
+        return self.planes[0]
+
+    def copy(self):
+        """Get a copy of array, which remains valid after release()"""
+        return self.array.copy()
+
+    def release(self):
+        """Unmap the buffer, the arrays must not be used anymore"""
+        if self._mapinfo is not None:
+            self._planes = None
+            self.data = None
+            self.buffer.unmap(self._mapinfo)
+            self._mapinfo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class FrameGrabber(object):
+
+    """Receive the frames of a port of the gst-switch-srv in the process
+    (tcpclientsrc ! gdpdepay ! appsink)
+
+    The appsink keeps the newest max_buffers frames and drops older ones,
+    so a slow consumer always gets recent frames and never stalls the
+    server.
+
+    :param port: The compose, preview or encode port
+    :param host: The host of the gst-switch-srv
+    :param video_format: Raw video format to convert the frames to, ie
+        'RGB' to compare them to PNGs, None to keep the format of the port
+    :param convert: Description of elements to put in front of the
+        conversion, ie a visualisation of an audio port
+    :param max_buffers: Number of frames the appsink queues
+    """
+
+    HOST = '127.0.0.1'
+
+    def __init__(self, port, host=HOST, video_format=None, convert=None,
+                 max_buffers=2):
+        super(FrameGrabber, self).__init__()
+        self.port = int(port)
+        self.host = host
+        self.video_format = video_format
+        self.convert = convert
+        self.max_buffers = max_buffers
+
+        self.pipeline = Gst.parse_launch(self.description())
+        self.sink = self.pipeline.get_by_name('sink')
+
+    def description(self):
+        """Get the description of the pipeline"""
+        elements = ['tcpclientsrc name=src host={0} port={1}'
+                    .format(self.host, self.port),
+                    'gdpdepay']
+        if self.convert:
+            elements.append(self.convert)
+        if self.video_format:
+            elements += ['videoconvert',
+                         'video/x-raw,format={0}'.format(self.video_format)]
+        elements.append('appsink name=sink sync=false max-buffers={0} '
+                        'drop=true'.format(self.max_buffers))
+        return ' ! '.join(elements)
+
+    def start(self):
+        """Connect to the port and start receiving
+
+        :returns: the FrameGrabber
+        """
+        self.pipeline.set_state(Gst.State.PLAYING)
+        return self
+
+    def stop(self):
+        """Disconnect from the port"""
+        self.pipeline.set_state(Gst.State.NULL)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def pull(self, timeout=5):
+        """Wait for the next frame
+
+        :param timeout: seconds to wait
+        :returns: the Frame, which must be released, or None when no frame
+            arrived in time
+        :raises ConnectionError: The pipeline failed, ie the port is closed
+        """
+        sample = self.pull_sample(timeout)
+        if sample is None:
+            return None
+        return Frame(sample)
+
+    def pull_sample(self, timeout=5):
+        """Wait for the next Gst.Sample, without mapping its buffer
+
+        :param timeout: seconds to wait
+        :returns: the Gst.Sample or None when none arrived in time
+        :raises ConnectionError: The pipeline failed, ie the port is closed
+        """
+        sample = self.sink.emit('try-pull-sample',
+                                int(max(timeout, 0) * Gst.SECOND))
+        if sample is None:
+            self._raise_error()
+        return sample
+
+    def frames(self, timeout=5, count=None):
+        """Yield the frames arriving within timeout seconds. A frame is
+        released when the next one is requested.
+
+        :param timeout: seconds to receive frames for
+        :param count: number of frames after which to stop, None for all
+        :raises ConnectionError: The pipeline failed, ie the port is closed
+        """
+        endtime = time.time() + timeout
+        pulled = 0
+        while count is None or pulled < count:
+            remaining = endtime - time.time()
+            if remaining <= 0:
+                return
+            frame = self.pull(remaining)
+            if frame is None:
+                return
+            pulled += 1
+            try:
+                yield frame
+            finally:
+                frame.release()
+
+    def _raise_error(self):
+        """Non-public method: Raise the error posted on the bus, if any"""
+        message = self.pipeline.get_bus().pop_filtered(Gst.MessageType.ERROR)
+        if message is not None:
+            error, _ = message.parse_error()
+            raise ConnectionError("Grabbing frames from port {0} failed: {1}"
+                                  .format(self.port, error.message))
+
+
+class ProbedCaps(namedtuple('ProbedCaps', ['port', 'caps', 'media_type',
+                                           'fields', 'time'])):
+
+    """The caps a port of the gst-switch-srv negotiated
+
+    :param port: The port
+    :param caps: The caps as string
+    :param media_type: The name of the caps, ie 'video/x-raw'
+    :param fields: dict of the fields of the caps, fractions like the
+        framerate as fractions.Fraction
+    :param time: seconds from connecting until the first buffer arrived
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_sample(cls, port, sample, elapsed):
+        """Get the caps of a Gst.Sample
+
+        :returns: the ProbedCaps
+        """
+        caps = sample.get_caps()
+        struct = caps.get_structure(0)
+        fields = {}
+        for index in range(struct.n_fields()):
+            name = struct.nth_field_name(index)
+            success, num, denom = struct.get_fraction(name)
+            if success:
+                fields[name] = fractions.Fraction(num, denom)
+            else:
+                fields[name] = struct.get_value(name)
+        return cls(port, caps.to_string(), struct.get_name(), fields,
+                   elapsed)
+
+    def matches(self, expected):
+        """Test if the caps pass a capsfilter of expected caps, as in
+        tcpclientsrc ! gdpdepay ! <expected> ! fakesink
+
+        :param expected: The caps as string
+        :returns: True if they intersect
+        """
+        return Gst.Caps.from_string(self.caps).can_intersect(
+            Gst.Caps.from_string(expected))
+
+
+def probe_caps(port, host=FrameGrabber.HOST, timeout=5):
+    """Connect to a port and get its caps as soon as the first buffer
+    arrives
+
+    :param port: The port of the gst-switch-srv
+    :param host: The host of the gst-switch-srv
+    :param timeout: seconds to wait for the first buffer
+    :returns: the ProbedCaps or None if no buffer arrived
+    """
+    return probe_ports([port], host, timeout)[int(port)]
+
+
+def probe_ports(ports, host=FrameGrabber.HOST, timeout=5):
+    """Probe the caps of many ports at once. All ports are connected
+    before the first one is waited for, so probing takes about as long
+    as the slowest port instead of the sum of all.
+
+    :param ports: The ports of the gst-switch-srv
+    :param host: The host of the gst-switch-srv
+    :param timeout: seconds to wait for the first buffers
+    :returns: dict of port -> ProbedCaps, or None if no buffer arrived or
+        the port could not be connected
+    """
+    log = logging.getLogger('probe-caps')
+    grabbers = [FrameGrabber(port, host, max_buffers=1) for port in ports]
+    # the ports are pulled one after the other, so the arrival of the
+    # first buffer is recorded on the streaming thread of every port
+    arrivals = {}
+
+    def cb_new_sample(sink, port):
+        """Record the time the first buffer of port arrived"""
+        arrivals.setdefault(port, time.time())
+        return Gst.FlowReturn.OK
+
+    for grabber in grabbers:
+        grabber.sink.set_property('emit-signals', True)
+        grabber.sink.connect('new-sample', cb_new_sample, grabber.port)
+
+    start = time.time()
+    endtime = start + timeout
+    for grabber in grabbers:
+        grabber.start()
+
+    result = {}
+    try:
+        for grabber in grabbers:
+            try:
+                sample = grabber.pull_sample(endtime - time.time())
+            except ConnectionError as error:
+                log.warning("%s", error)
+                sample = None
+            if sample is None:
+                result[grabber.port] = None
+            else:
+                arrival = arrivals.get(grabber.port, time.time())
+                result[grabber.port] = ProbedCaps.from_sample(
+                    grabber.port, sample, arrival - start)
+    finally:
+        for grabber in grabbers:
+            grabber.stop()
+    return result
@@ -11,7 +11,7 @@ from gstswitch import testsource
 from .exception import RangeError, InvalidIndexError
 
 
-__all__ = ["TestSources", "PreviewSinks"]
+__all__ = ["TestSources", "PreviewSinks", "PreviewMosaic"]
 
 
 class TestSources(object):
@@ -23,14 +23,30 @@ class TestSources(object):
     :param pattern: The videotestsrc pattern of the output video
     :param timeoverlay: True to enable a running time over video
     :param clockoverlay: True to enable current clock time over video
+    :param shared: True to run all sources as branches of one
+    SharedPipeline instead of a pipeline per source
+    :param prerender: Number of frames to render once per distinct video
+    and loop instead of generating every frame, 0 to generate them. Time
+    and clock overlays loop with the frames.
+    :param video_socket: The video input socket of the server the sources
+    connect to instead of the video port, None to use TCP
+    :param audio_socket: The audio input socket of the server the sources
+    connect to instead of the audio port, None to use TCP
     """
 
-    def __init__(self, video_port=None, audio_port=None):
+    def __init__(self, video_port=None, audio_port=None, shared=False,
+                 prerender=0, video_socket=None, audio_socket=None):
         super(TestSources, self).__init__()
         self._running_tests_video = []
         self._running_tests_audio = []
         self._audio_port = None
         self._video_port = None
+        self.shared = shared
+        self._shared_pipeline = None
+        self.prerender = prerender
+        self._rendered = {}
+        self.video_socket = video_socket
+        self.audio_socket = audio_socket
 
         self.log = logging.getLogger('testsources')
 
@@ -123,16 +139,81 @@ class TestSources(object):
         :param timeoverlay: True to enable a running time over video
         :param clockoverlay: True to enable current clock time over video
         """
+        if self.prerender:
+            pattern = testsource.VideoSrc.generate_pattern(pattern)
+            rendered = self._get_rendered(width, height, pattern,
+                                          timeoverlay, clockoverlay)
+        if self.shared:
+            pattern = testsource.VideoSrc.generate_pattern(pattern)
+            pipeline = self._get_shared_pipeline()
+            if self.prerender:
+                branch_id = pipeline.add_rendered_video(self.video_port,
+                                                        rendered)
+            else:
+                branch_id = pipeline.add_video(
+                    self.video_port,
+                    width,
+                    height,
+                    pattern,
+                    timeoverlay,
+                    clockoverlay)
+            testsrc = testsource.SharedSrc(pipeline, branch_id,
+                                           self.video_port, pattern=pattern)
+            self._running_tests_video.append(testsrc)
+            return
+
+        if self.prerender:
+            testsrc = testsource.LoopingVideoSrc(self.video_port, rendered,
+                                                 pattern, self.video_socket)
+            testsrc.run()
+            self._running_tests_video.append(testsrc)
+            return
+
         testsrc = testsource.VideoSrc(
             self.video_port,
             width,
             height,
             pattern,
             timeoverlay,
-            clockoverlay)
+            clockoverlay,
+            self.video_socket)
         testsrc.run()
         self._running_tests_video.append(testsrc)
 
+    def _get_rendered(self, width, height, pattern, timeoverlay,
+                      clockoverlay):
+        """Non-public method: Get the pre-rendered frames of a video,
+        rendering them on first use. Sources of the same video share them.
+        """
+        key = (int(width), int(height), int(pattern), bool(timeoverlay),
+               bool(clockoverlay))
+        if key not in self._rendered:
+            self.log.debug('rendering %d frames of %s', self.prerender, key)
+            self._rendered[key] = testsource.render_video(
+                width, height, pattern, self.prerender,
+                timeoverlay, clockoverlay)
+        return self._rendered[key]
+
+    def _get_shared_pipeline(self):
+        """Non-public method: Get the playing SharedPipeline, creating it
+        on first use
+        """
+        if self._shared_pipeline is None:
+            self._shared_pipeline = testsource.SharedPipeline(
+                video_socket=self.video_socket,
+                audio_socket=self.audio_socket)
+            self._shared_pipeline.play()
+        return self._shared_pipeline
+
+    def _end_shared_pipeline(self):
+        """Non-public method: Stop the SharedPipeline once it has no
+        branches left
+        """
+        if self._shared_pipeline is not None and \
+                not self._shared_pipeline.branches:
+            self._shared_pipeline.disable()
+            self._shared_pipeline = None
+
     def terminate_index_video(self, index):
         """Terminate video test source specified by index
         :param index: The index of the video source to terminate
@@ -161,6 +242,7 @@ class TestSources(object):
         """
         for _ in range(len(self._running_tests_video)):
             self.terminate_index_video(0)
+        self._end_shared_pipeline()
 
     def new_test_audio(self, freq=110, wave=None):
         """Start a new test audio
@@ -172,10 +254,20 @@ class TestSources(object):
         :param timeoverlay: True to enable a running time over audio
         :param clockoverlay: True to enable current clock time over audio
         """
+        if self.shared:
+            wave = testsource.AudioSrc.generate_wave(wave)
+            pipeline = self._get_shared_pipeline()
+            branch_id = pipeline.add_audio(self.audio_port, freq, wave)
+            testsrc = testsource.SharedSrc(pipeline, branch_id,
+                                           self.audio_port, wave=wave)
+            self._running_tests_audio.append(testsrc)
+            return
+
         testsrc = testsource.AudioSrc(
             self.audio_port,
             freq,
-            wave)
+            wave,
+            self.audio_socket)
         testsrc.run()
         self._running_tests_audio.append(testsrc)
 
@@ -211,6 +303,7 @@ class TestSources(object):
         """
         for _ in range(len(self._running_tests_audio)):
             self.terminate_index_audio(0)
+        self._end_shared_pipeline()
 
 
 class PreviewSinks(object):
@@ -271,3 +364,91 @@ class PreviewSinks(object):
             self.preview = None
         except AttributeError:
             raise AttributeError("No preview Sink to terminate")
+
+
+class PreviewMosaic(object):
+
+    """A headless monitor of all video preview ports of gst-switch-srv,
+    shown as tiles of one mosaic in a single pipeline
+    :param controller: The connected Controller to get the preview ports
+    :param tile_width: The width of a tile
+    :param tile_height: The height of a tile
+    :param columns: The number of tiles in a row
+    :param sink: 'fakesink' or 'appsink' to pull the mosaic frames
+    """
+
+    # the serve type of video previews, see get_preview_ports
+    SERVE_VIDEO = 1
+
+    def __init__(self, controller, tile_width=160, tile_height=120,
+                 columns=5, sink='fakesink'):
+        super(PreviewMosaic, self).__init__()
+        self.controller = controller
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.columns = columns
+        self.sink = sink
+        self.pipeline = None
+
+        self.log = logging.getLogger('previewmosaic')
+
+    def video_ports(self):
+        """Get the video preview ports of the server
+        :returns: list of ports
+        """
+        return [port for port, serve, _ in
+                self.controller.get_preview_port_list()
+                if serve == self.SERVE_VIDEO]
+
+    def run(self):
+        """Run the mosaic of all video preview ports"""
+        self.pipeline = testsource.MosaicPipeline(
+            self.video_ports(),
+            tile_width=self.tile_width,
+            tile_height=self.tile_height,
+            columns=self.columns,
+            sink=self.sink)
+        self.log.debug('starting mosaic of %s', self.pipeline.ports)
+        self.pipeline.play()
+
+    def update(self):
+        """Add the preview ports the server opened since and remove the
+        ones it closed
+        :returns: (added ports, removed ports)
+        """
+        if self.pipeline is None:
+            raise AttributeError("No mosaic to update")
+        ports = set(self.video_ports())
+        shown = set(self.pipeline.ports)
+        added = sorted(ports - shown)
+        removed = sorted(shown - ports)
+        for port in removed:
+            self.log.debug('removing preview %d', port)
+            self.pipeline.remove_port(port)
+        for port in added:
+            self.log.debug('adding preview %d', port)
+            self.pipeline.add_port(port)
+        return added, removed
+
+    def pull(self, timeout=5):
+        """Wait for the next mosaic frame of an appsink
+        :param timeout: seconds to wait
+        :returns: the grabber.Frame, which must be released, or None when
+        no frame arrived in time
+        """
+        from .grabber import Frame
+        if self.pipeline is None or self.sink != 'appsink':
+            raise AttributeError("No mosaic appsink to pull from")
+        sample = self.pipeline.pull_sample(timeout)
+        if sample is None:
+            return None
+        return Frame(sample)
+
+    def terminate(self):
+        """End/Terminate the mosaic"""
+        try:
+            self.log.debug('ending mosaic')
+            self.pipeline.disable()
+            self.pipeline = None
+        except AttributeError:
+            raise AttributeError("No mosaic to terminate")
@@ -0,0 +1,388 @@
+"""
+The load generator feeds a gst-switch-srv with a growing number of test
+sources to find out how many inputs it keeps up with. The sources are
+added in steps; after every step the resources of the server and the
+latency of control calls are measured.
+
+Run it against a server it starts itself:
+
+    python -m gstswitch.loadgen --path ../tools/ --video 40 --step 5 \\
+        --drive -o load.json
+
+or against a running server, optionally with its pid for the resources:
+
+    python -m gstswitch.loadgen --address tcp:host=127.0.0.1,port=5000 \\
+        --pid 1234 --video 40
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import argparse
+import json
+import logging
+import random
+import time
+
+from .controller import Controller
+from .exception import ConnectionError
+from .sampler import ResourceSampler
+from .stats import percentile
+from .server import Server
+
+__all__ = ["LoadGenerator", "main", ]
+
+
+class LoadGenerator(object):
+
+    """Adds test sources to a server step by step and measures every step
+
+    All sources are branches of one SharedPipeline, so the load generator
+    itself needs few threads. With prerender the frames of every pattern
+    are rendered once and looped.
+
+    :param controller: The Controller of the server
+    :param video_port: The video input port of the server
+    :param audio_port: The audio input port of the server
+    :param host: The host of the server
+    :param sampler: A running ResourceSampler of the server, or None
+    :param drive: True to make random switches and mode changes as control
+        calls, False to only ask for the compose port
+    :param width: The width of the video sources
+    :param height: The height of the video sources
+    :param framerate: The frames per second of the video sources
+    :param pattern: The videotestsrc pattern, None for a random one per
+        source
+    :param prerender: Number of frames to render once per pattern and loop,
+        0 to generate every frame
+    :param rng: random.Random used for patterns and driving
+    """
+
+    def __init__(self, controller, video_port=3000, audio_port=4000,
+                 host='127.0.0.1', sampler=None, drive=False, width=300,
+                 height=200, framerate=25, pattern=None, prerender=0,
+                 rng=None):
+        super(LoadGenerator, self).__init__()
+        self.log = logging.getLogger('loadgen')
+
+        self.controller = controller
+        self.video_port = video_port
+        self.audio_port = audio_port
+        self.host = host
+        self.sampler = sampler
+        self.drive = drive
+        self.width = width
+        self.height = height
+        self.framerate = framerate
+        self.pattern = pattern
+        self.prerender = prerender
+        self.rng = rng or random.Random()
+
+        self.video_sources = []
+        self.audio_sources = []
+        self._pipeline = None
+        self._rendered = {}
+
+    def _get_pipeline(self):
+        """Non-public method: Get the playing SharedPipeline"""
+        if self._pipeline is None:
+            # GStreamer is only needed once sources are added
+            from . import testsource
+            self._pipeline = testsource.SharedPipeline(self.host)
+            self._pipeline.play()
+        return self._pipeline
+
+    def add_video(self):
+        """Add one video source
+
+        :returns: the id of its branch
+        """
+        pipeline = self._get_pipeline()
+        pattern = self.pattern
+        if pattern is None:
+            pattern = self.rng.randint(0, 19)
+        if self.prerender:
+            if pattern not in self._rendered:
+                from . import testsource
+                self._rendered[pattern] = testsource.render_video(
+                    self.width, self.height, pattern, self.prerender,
+                    framerate=self.framerate)
+            branch_id = pipeline.add_rendered_video(
+                self.video_port, self._rendered[pattern])
+        else:
+            branch_id = pipeline.add_video(
+                self.video_port, self.width, self.height, pattern,
+                framerate=self.framerate)
+        self.video_sources.append(branch_id)
+        return branch_id
+
+    def add_audio(self):
+        """Add one audio source
+
+        :returns: the id of its branch
+        """
+        branch_id = self._get_pipeline().add_audio(
+            self.audio_port, 110 * (len(self.audio_sources) % 20 + 1),
+            self.rng.randint(0, 3))
+        self.audio_sources.append(branch_id)
+        return branch_id
+
+    def stop(self):
+        """Remove all sources"""
+        if self._pipeline is not None:
+            self._pipeline.disable()
+            self._pipeline = None
+        self.video_sources = []
+        self.audio_sources = []
+
+    def control_call(self):
+        """Make one timed control call
+
+        :returns: (seconds, True if the call failed)
+        """
+        if self.drive:
+            choice = self.rng.random()
+            if choice < 0.2:
+                method, args = 'set_composite_mode', (self.rng.randint(0, 3),)
+            else:
+                ports = self.controller.get_preview_ports()
+                if not ports:
+                    method, args = 'get_compose_port', ()
+                else:
+                    channel = (Controller.VIDEO_CHANNEL_A if choice < 0.6
+                               else Controller.VIDEO_CHANNEL_B)
+                    method, args = 'switch', (channel, self.rng.choice(ports))
+        else:
+            method, args = 'get_compose_port', ()
+
+        begin = time.time()
+        failed = False
+        try:
+            getattr(self.controller, method)(*args)
+        except ConnectionError:
+            failed = True
+        return time.time() - begin, failed
+
+    def measure(self, hold, calls):
+        """Spread calls control calls over hold seconds and summarize them
+        with the resources the server used meanwhile
+
+        :returns: dict with the latencies in milliseconds and the resources
+        """
+        begin = time.time()
+        latencies = []
+        errors = 0
+        for num in range(calls):
+            latency, failed = self.control_call()
+            latencies.append(latency)
+            errors += failed
+            wait = begin + hold * (num + 1) / calls - time.time()
+            if wait > 0:
+                time.sleep(wait)
+        end = time.time()
+
+        ordered = sorted(latencies)
+
+        def millis(value):
+            """Seconds to milliseconds, keeping None"""
+            return None if value is None else round(value * 1000, 3)
+
+        result = {
+            'video': len(self.video_sources),
+            'audio': len(self.audio_sources),
+            'calls': len(ordered),
+            'errors': errors,
+            'p50_ms': millis(percentile(ordered, 50)),
+            'p95_ms': millis(percentile(ordered, 95)),
+            'max_ms': millis(ordered[-1] if ordered else None),
+        }
+        result.update(self._resources(begin, end))
+        return result
+
+    def _resources(self, begin, end):
+        """Non-public method: Summarize the samples taken between begin
+        and end
+        """
+        if self.sampler is None:
+            return {}
+        samples = [res for res in list(self.sampler.samples)
+                   if begin <= res.time <= end]
+        cpu = [res.cpu_percent for res in samples
+               if res.cpu_percent is not None]
+        if not samples:
+            return {}
+        return {
+            'cpu_percent': round(sum(cpu) / len(cpu), 2) if cpu else None,
+            'rss': max(res.rss for res in samples),
+            'threads': max(res.threads for res in samples),
+            'fds': max(res.fds for res in samples),
+        }
+
+    def run(self, video, audio=0, step=1, ramp=10.0, hold=5.0, calls=20,
+            max_p95_ms=None, max_cpu=None, report=None):
+        """Add video and audio sources in steps of step sources and measure
+        after every step. Stops early when a limit is exceeded.
+
+        :param video: The number of video sources to reach
+        :param audio: The number of audio sources to reach, they are added
+            in proportion to the video sources
+        :param step: The number of video sources per step
+        :param ramp: sources added per second within a step
+        :param hold: seconds to measure after every step
+        :param calls: control calls per step
+        :param max_p95_ms: stop when the p95 latency exceeds it
+        :param max_cpu: stop when the CPU usage of the server exceeds it
+        :param report: callable getting the result of every step
+        :returns: list of the results of the steps
+        :raises ValueError: step or ramp is not positive
+        """
+        if step <= 0:
+            raise ValueError("step must be positive, not {0}".format(step))
+        if ramp <= 0:
+            raise ValueError("ramp must be positive, not {0}".format(ramp))
+        results = []
+        while len(self.video_sources) < video or \
+                len(self.audio_sources) < audio:
+            target = min(video, len(self.video_sources) + step)
+            while len(self.video_sources) < target:
+                self.add_video()
+                time.sleep(1.0 / ramp)
+            audio_target = audio if target >= video else \
+                audio * target // max(video, 1)
+            while len(self.audio_sources) < audio_target:
+                self.add_audio()
+                time.sleep(1.0 / ramp)
+
+            result = self.measure(hold, calls)
+            results.append(result)
+            if report is not None:
+                report(result)
+
+            reason = self._exceeded(result, max_p95_ms, max_cpu)
+            if reason:
+                result['limit'] = reason
+                self.log.info("stopping at %d video sources: %s",
+                              result['video'], reason)
+                break
+        return results
+
+    @classmethod
+    def _exceeded(cls, result, max_p95_ms, max_cpu):
+        """Non-public method: Get which limit a step exceeded, if any"""
+        if max_p95_ms is not None and result['p95_ms'] is not None and \
+                result['p95_ms'] > max_p95_ms:
+            return 'p95 latency {0}ms > {1}ms'.format(result['p95_ms'],
+                                                      max_p95_ms)
+        if max_cpu is not None and result.get('cpu_percent') is not None \
+                and result['cpu_percent'] > max_cpu:
+            return 'server cpu {0}% > {1}%'.format(result['cpu_percent'],
+                                                    max_cpu)
+        if result['errors']:
+            return '{0} failed control calls'.format(result['errors'])
+        return None
+
+
+def print_step(result):
+    """Print the result of a step as a table row"""
+    print("{video:>5} {audio:>5} {p50_ms!s:>8} {p95_ms!s:>8} "
+          "{cpu:>7} {rss:>9} {threads!s:>7} {fds!s:>5}".format(
+              cpu=result.get('cpu_percent', '-'),
+              rss=(result['rss'] // 1024 if 'rss' in result else '-'),
+              threads=result.get('threads', '-'),
+              fds=result.get('fds', '-'),
+              **result))
+
+
+def main(argv=None):
+    """Parse the arguments and generate the load"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--path', help='start gst-switch-srv from PATH, '
+                        'otherwise use a running server')
+    parser.add_argument('--address', default='tcp:host=127.0.0.1,port=5000',
+                        help='dbus address of a running server '
+                        '(%(default)s)')
+    parser.add_argument('--pid', type=int,
+                        help='pid of the running server to sample')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='host of the server (%(default)s)')
+    parser.add_argument('--video-port', type=int, default=3000)
+    parser.add_argument('--audio-port', type=int, default=4000)
+    parser.add_argument('--video', type=int, default=10,
+                        help='video sources to reach (%(default)s)')
+    parser.add_argument('--audio', type=int, default=0,
+                        help='audio sources to reach (%(default)s)')
+    parser.add_argument('--width', type=int, default=300)
+    parser.add_argument('--height', type=int, default=200)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--pattern', type=int,
+                        help='videotestsrc pattern, random by default')
+    parser.add_argument('--prerender', type=int, default=0, metavar='FRAMES',
+                        help='loop FRAMES pre-rendered frames per pattern')
+    parser.add_argument('--step', type=int, default=1,
+                        help='video sources added per step (%(default)s)')
+    parser.add_argument('--ramp', type=float, default=10.0,
+                        help='sources added per second (%(default)s)')
+    parser.add_argument('--hold', type=float, default=5.0,
+                        help='seconds to measure per step (%(default)s)')
+    parser.add_argument('--calls', type=int, default=20,
+                        help='control calls per step (%(default)s)')
+    parser.add_argument('--drive', action='store_true',
+                        help='make random switches and mode changes')
+    parser.add_argument('--max-p95-ms', type=float,
+                        help='stop when the p95 latency exceeds it')
+    parser.add_argument('--max-cpu', type=float,
+                        help='stop when the server CPU%% exceeds it')
+    parser.add_argument('--seed', type=int, help='seed of the randomness')
+    parser.add_argument('-o', '--output', help='write JSON to OUTPUT')
+    args = parser.parse_args(argv)
+    if args.step <= 0:
+        parser.error('--step must be positive, not {0}'.format(args.step))
+    if args.ramp <= 0:
+        parser.error('--ramp must be positive, not {0}'.format(args.ramp))
+
+    serv = None
+    sampler = None
+    address = args.address
+    if args.path:
+        serv = Server(path=args.path, video_port=args.video_port,
+                      audio_port=args.audio_port, drain_output=True)
+        ready = serv.run(wait_ready=True)
+        print("server ready after {0:.3f}s".format(ready))
+        address = serv.client_address
+        sampler = serv.sample_resources(min(1.0, args.hold / 5))
+    elif args.pid:
+        sampler = ResourceSampler(args.pid, min(1.0, args.hold / 5)).start()
+
+    controller = Controller(address=address)
+    generator = LoadGenerator(
+        controller, args.video_port, args.audio_port, args.host, sampler,
+        args.drive, args.width, args.height, args.fps, args.pattern,
+        args.prerender, random.Random(args.seed))
+
+    print("{0:>5} {1:>5} {2:>8} {3:>8} {4:>7} {5:>9} {6:>7} {7:>5}".format(
+        'video', 'audio', 'p50 ms', 'p95 ms', 'cpu %', 'rss KiB', 'threads',
+        'fds'))
+    try:
+        results = generator.run(args.video, args.audio, args.step, args.ramp,
+                                args.hold, args.calls, args.max_p95_ms,
+                                args.max_cpu, report=print_step)
+    finally:
+        generator.stop()
+        controller.close_connection()
+        if sampler:
+            sampler.stop()
+        if serv and serv.proc:
+            serv.terminate()
+
+    report = {
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'arguments': vars(args),
+        'steps': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -6,13 +6,18 @@ log the full output into a file
 
 from __future__ import absolute_import, print_function, unicode_literals
 
+import codecs
 import subprocess
 import logging
 import sys
 import os
 import time
 import select
+import threading
+from collections import deque
 
+from .events import EventParser
+from .sampler import ResourceSampler
 from .exception import ServerProcessError
 from .exception import MatchTimeoutError, MatchEofError, SelectError
 
@@ -22,18 +27,70 @@ class ProcessMonitor(subprocess.Popen):
 
     Can block until the command prints a certain string and log the full
     output into a file
+
+    The output is kept in a ring buffer of at most max_buffer characters.
+    Every string passed to wait_for_output is counted incrementally as new
+    output arrives, so waiting never rescans the history. Strings which
+    scrolled out of the ring buffer before they were waited for the first
+    time are not counted.
+
+    By default the output is only read while wait_for_output or terminate
+    run, so a process which writes a lot while nobody waits blocks as soon
+    as the pipe is full. With drain a background thread keeps reading the
+    output and wait_for_output just waits to be notified of new matches.
+
+    Complete lines are parsed into ServerEvents which are kept in events.
+    Callbacks can subscribe to them and wait_for_event blocks until one
+    arrives.
+
+    :param cmd: The command to run
+    :param cmd_output_target: File-like object the output is copied to
+    :param max_buffer: Characters of output to keep for new matches
+    :param drain: True to read the output continuously on a background
+    thread
+    :param cpus: Set of CPU numbers to pin the process to, None to let it
+    run on any CPU
     """
 
-    def __init__(self, cmd, cmd_output_target=sys.stderr):
+    MAX_BUFFER = 1024 * 1024
+    MAX_EVENTS = 10000
+
+    def __init__(self, cmd, cmd_output_target=sys.stderr,
+                 max_buffer=MAX_BUFFER, drain=False, cpus=None):
         self.log = logging.getLogger('server-output-monitor')
 
         # Logfile to write to
         self._cmd_output_target = cmd_output_target
 
-        # Internal Buffer to search for matched when wait_for_output is called
-        self._buffer = ""
+        # Internal ring buffer of chunks to search when a new match is
+        # requested, and the counters of the matches requested before
+        self._max_buffer = max_buffer
+        self._chunks = deque()
+        self._buffered = 0
+        self._tail = ""
+        self._match_counts = {}
+
+        # Milestones parsed from the output and their subscribers
+        self._parser = EventParser()
+        self.events = deque(maxlen=self.MAX_EVENTS)
+        self._event_callbacks = []
+
+        # Guards the buffer and signals new output when draining
+        self._cond = threading.Condition()
+        self._eof = False
+        self._drain_thread = None
 
         self.log.debug("starting subprocess")
+        self.start_time = time.time()
+
+        kwargs = {}
+        if cpus is not None:
+            if not hasattr(os, 'sched_setaffinity'):
+                raise ServerProcessError("CPU pinning is not supported on "
+                                         "this platform")
+            cpus = set(cpus)
+            # pin the child before it execs, so all its threads inherit it
+            kwargs['preexec_fn'] = lambda: os.sched_setaffinity(0, cpus)
 
         try:
             super(ProcessMonitor, self).__init__(
@@ -41,18 +98,193 @@ class ProcessMonitor(subprocess.Popen):
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 bufsize=4096,
-                shell=False)
+                shell=False,
+                **kwargs)
         except Exception as err:
             raise ServerProcessError(err)
 
         self.log.debug("subprocess successfully started")
 
+        if drain:
+            self._drain_thread = threading.Thread(
+                target=self._drain, name='server-output-drain')
+            self._drain_thread.daemon = True
+            self._drain_thread.start()
+
+    def _drain(self):
+        """Non-public method: Body of the background thread reading the
+        output until the process closes it
+        """
+        fileno = self.stdout.fileno()
+        # keeps the bytes of a character split across two reads
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        while True:
+            # only this thread reads, so blocking until data arrives is fine
+            data = os.read(fileno, 4096)
+            chunk = decoder.decode(data, final=len(data) == 0)
+            if len(chunk) == 0:
+                if len(data) == 0:
+                    break
+                continue
+
+            with self._cond:
+                events = self._append(chunk)
+                self._cond.notify_all()
+            self._cmd_output_target.write(chunk)
+            self._dispatch_events(events)
+
+        self.log.debug("subprocess closed its output")
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    @property
+    def _buffer(self):
+        """The output kept in the ring buffer"""
+        return "".join(self._chunks)
+
+    @_buffer.setter
+    def _buffer(self, output):
+        """Replace the captured output, forgetting all counters"""
+        self._chunks = deque()
+        self._buffered = 0
+        self._tail = ""
+        self._match_counts = {}
+        self._parser = EventParser()
+        self.events.clear()
+        self._append(output)
+
+    def _append(self, chunk):
+        """Non-public method: Add a chunk of output to the ring buffer and
+        count the requested matches in it. Only the chunk and the last
+        len(match)-1 characters before it are searched.
+
+        :returns: list of the ServerEvents completed by the chunk
+        """
+        if not chunk:
+            return []
+
+        for match in self._match_counts:
+            overlap = self._tail[len(self._tail) - len(match) + 1:] \
+                if len(match) > 1 else ""
+            self._match_counts[match] += (overlap + chunk).count(match)
+
+        longest = max([len(match) for match in self._match_counts] + [1])
+        self._tail = (self._tail + chunk)[-(longest - 1):] \
+            if longest > 1 else ""
+
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        while self._buffered > self._max_buffer:
+            excess = self._buffered - self._max_buffer
+            first = self._chunks[0]
+            if len(first) <= excess:
+                self._chunks.popleft()
+                self._buffered -= len(first)
+            else:
+                self._chunks[0] = first[excess:]
+                self._buffered -= excess
+
+        events = self._parser.feed(chunk, time.time())
+        self.events.extend(events)
+        return events
+
+    def _dispatch_events(self, events):
+        """Non-public method: Pass new events to the subscribers"""
+        for event in events:
+            for callback, kind in list(self._event_callbacks):
+                if kind is None or kind == event.kind:
+                    callback(event)
+
+    def subscribe(self, callback, kind=None):
+        """Register a callback for the ServerEvents parsed from now on.
+        Callbacks are called from the thread reading the output.
+
+        :param callback: callable taking a ServerEvent
+        :param kind: only pass events of this kind, None for all
+        :returns: None
+        """
+        if not callable(callback):
+            raise ValueError('Provided argument callback is not callable')
+        self._event_callbacks.append((callback, kind))
+
+    def unsubscribe(self, callback):
+        """Remove all registrations of callback
+
+        :returns: True if callback was registered
+        """
+        before = len(self._event_callbacks)
+        self._event_callbacks = [entry for entry in self._event_callbacks
+                                 if entry[0] is not callback]
+        return len(self._event_callbacks) < before
+
+    def find_events(self, kind, **data):
+        """Get the events seen so far of kind with the given data
+
+        :param kind: The kind of the events
+        :param data: values the data of the events must have,
+        e.g. port=3000
+        :returns: list of ServerEvent, oldest first
+        """
+        with self._cond:
+            return [event for event in self.events
+                    if event.kind == kind and
+                    all(event.data.get(key) == value
+                        for key, value in data.items())]
+
+    def time_to(self, kind, **data):
+        """Get the seconds from starting the process to the first event of
+        kind, e.g. time_to('controller_listening') for the startup time
+
+        :returns: seconds or None if there was no such event
+        """
+        events = self.find_events(kind, **data)
+        if not events:
+            return None
+        return events[0].time - self.start_time
+
+    def match_count(self, match):
+        """Get how often match was seen in the output. The first request
+        for a match searches the ring buffer, later ones are answered from
+        the counter which is updated with every chunk read.
+
+        :param match: The string to look for
+        :returns: number of occurrences
+        """
+        with self._cond:
+            try:
+                return self._match_counts[match]
+            except KeyError:
+                pass
+
+            buffered = self._buffer
+            self._match_counts[match] = buffered.count(match)
+            if len(match) > 1 and len(self._tail) < len(match) - 1:
+                self._tail = buffered[-(len(match) - 1):]
+            return self._match_counts[match]
+
+    def sample_resources(self, interval=1.0, max_samples=None):
+        """Start sampling the CPU usage, RSS, threads and open file
+        descriptors of the process
+
+        :param interval: seconds between two samples
+        :param max_samples: number of samples to keep, None to keep all
+        :returns: the running ResourceSampler, stop it when done
+        """
+        return ResourceSampler(self.pid, interval, max_samples).start()
+
     def terminate(self):
         """Kills the process and waits for the thread to exit"""
 
         self.log.debug("terminating the subprocess")
         super(ProcessMonitor, self).terminate()
 
+        if self._drain_thread is not None:
+            self.log.info("waiting for the drain thread to read the rest")
+            self._drain_thread.join()
+            super(ProcessMonitor, self).communicate()
+            return
+
         self.log.info("reading remaining data from subprocess")
         while True:
             # select takes three lists of file-descriptors to be monitored:
@@ -101,7 +333,43 @@ class ProcessMonitor(subprocess.Popen):
         timeout. If no match is found until timeout is passed, a RuntimeError
         is raised.
         """
-        if self._buffer.count(match) >= count:
+        self._wait_until(lambda: self.match_count(match) >= count,
+                         timeout, "match '%s' %dx" % (match, count,))
+
+    def wait_for_event(self, kind, timeout=5, count=1, **data):
+        """Block until count events of kind with the given data were
+        parsed from the output, like wait_for_output does for a string.
+
+        :param kind: The kind of the event, see events.EVENT_PATTERNS
+        :param timeout: seconds to wait at most
+        :param count: number of events to wait for
+        :param data: values the data of the events must have
+        :returns: the count-th such ServerEvent
+        :raises MatchTimeoutError: the events did not arrive in time
+        :raises MatchEofError: the process ended before
+        """
+        found = []
+
+        def _found():
+            """Check for the events"""
+            found[:] = self.find_events(kind, **data)
+            return len(found) >= count
+
+        self._wait_until(_found, timeout, "event '%s' %dx" % (kind, count,))
+        return found[count - 1]
+
+    def _wait_until(self, done, timeout, what):
+        """Non-public method: Read the output until done() returns True
+
+        :param done: callable checking the captured output
+        :param timeout: seconds to wait at most
+        :param what: description of the awaited output for errors
+        """
+        if self._drain_thread is not None:
+            self._wait_until_drained(done, timeout, what)
+            return
+
+        if done():
             self.log.debug("match found, returning without reading more data")
             return
 
@@ -125,11 +393,10 @@ class ProcessMonitor(subprocess.Popen):
                 remaining = endtime - time.time()
                 if remaining < 0:
                     raise MatchTimeoutError(
-                        "Timeout while waiting for match "
-                        "'%s' %dx in the subprocess output.\n"
+                        "Timeout while waiting for %s "
+                        "in the subprocess output.\n"
                         "re-run tests with -x and look at "
-                        "server.log to investigate further"
-                        % (match, count,))
+                        "server.log to investigate further" % (what,))
 
                 raise SelectError("select returned without stdout being"
                                   " readable, assuming an exception")
@@ -146,16 +413,37 @@ class ProcessMonitor(subprocess.Popen):
             chunk = os.read(self.stdout.fileno(), 2000).decode('utf-8')
 
             if len(chunk) == 0:
-                raise MatchEofError("Subprocess died while waiting for match "
-                                    "'%s' %dx in the subprocess output."
-                                    % (match, count,))
+                raise MatchEofError("Subprocess died while waiting for %s "
+                                    "in the subprocess output." % (what,))
 
             self.log.debug("read %d bytes, appending to buffer", len(chunk))
-            self._buffer += chunk
+            events = self._append(chunk)
             self._cmd_output_target.write(chunk)
+            self._dispatch_events(events)
 
-            self.log.debug("testing again for %dx '%s' in buffer",
-                           count, match)
-            if self._buffer.count(match) >= count:
+            self.log.debug("testing again for %s in buffer", what)
+            if done():
                 self.log.debug("match found, returning")
                 return
+
+    def _wait_until_drained(self, done, timeout, what):
+        """Non-public method: _wait_until while the drain thread reads the
+        output
+        """
+        endtime = time.time() + timeout
+        with self._cond:
+            while not done():
+                if self._eof:
+                    raise MatchEofError("Subprocess died while waiting for "
+                                        "%s in the subprocess output."
+                                        % (what,))
+
+                remaining = endtime - time.time()
+                if remaining <= 0:
+                    raise MatchTimeoutError(
+                        "Timeout while waiting for %s "
+                        "in the subprocess output.\n"
+                        "re-run tests with -x and look at "
+                        "server.log to investigate further" % (what,))
+                self._cond.wait(remaining)
+        self.log.debug("match found, returning")
@@ -0,0 +1,124 @@
+"""
+The reference module keeps decoded reference images, ie the frames the
+integration tests expect. Every image is decoded once per session and kept
+as uint8. With a cache directory the decoded image is also stored as .npy
+file and memory-mapped by later sessions, until the image file changes.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import os
+import logging
+import tempfile
+import threading
+
+import numpy
+
+__all__ = ["ReferenceStore", ]
+
+
+def read_image(path):
+    """Decode an image file with scipy, which the integration tests use
+
+    :returns: uint8 array
+    """
+    import scipy.misc
+    return scipy.misc.imread(path)
+
+
+class ReferenceStore(object):
+
+    """Decode reference images once and hand out read-only uint8 arrays
+
+    An image is identified by its name and the mtime of its file, so a
+    changed reference image is decoded again.
+
+    :param directory: The directory of the reference images
+    :param cache_dir: The directory to keep decoded images in as .npy
+        files, None to only keep them in memory
+    :param loader: Callable decoding the image at a path to an array
+    """
+
+    def __init__(self, directory, cache_dir=None, loader=read_image):
+        super(ReferenceStore, self).__init__()
+        self.log = logging.getLogger('reference-store')
+
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._images = {}
+
+    def path(self, name):
+        """Get the path of the image file"""
+        return os.path.join(self.directory, name)
+
+    def get(self, name):
+        """Get a reference image
+
+        :param name: The file name of the image in directory
+        :returns: read-only uint8 array, memory-mapped with a cache_dir
+        :raises OSError, IOError: There is no such image
+        """
+        path = self.path(name)
+        stat = os.stat(path)
+        mtime = getattr(stat, 'st_mtime_ns', None)
+        if mtime is None:
+            mtime = int(stat.st_mtime * 1e9)
+
+        with self._lock:
+            entry = self._images.get(name)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            image = self._load(name, path, mtime)
+            self._images[name] = (mtime, image)
+        return image
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    def clear(self):
+        """Forget the images kept in memory"""
+        with self._lock:
+            self._images.clear()
+
+    def _cache_path(self, name, mtime):
+        """Non-public method: Get the .npy file of a version of an image"""
+        return os.path.join(self.cache_dir, '{0}-{1}.npy'.format(name, mtime))
+
+    def _load(self, name, path, mtime):
+        """Non-public method: Get an image from the cache directory or
+        decode it
+        """
+        if self.cache_dir is not None:
+            cached = self._cache_path(name, mtime)
+            if os.path.exists(cached):
+                self.log.debug("mapping %s", cached)
+                return numpy.load(cached, mmap_mode='r')
+
+        self.log.debug("decoding %s", path)
+        image = numpy.ascontiguousarray(self.loader(path), dtype=numpy.uint8)
+        if self.cache_dir is None:
+            image.setflags(write=False)
+            return image
+
+        self._store(name, cached, image)
+        return numpy.load(cached, mmap_mode='r')
+
+    def _store(self, name, cached, image):
+        """Non-public method: Write an image to the cache directory and
+        remove the files of its older versions
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        prefix = name + '-'
+        for entry in os.listdir(self.cache_dir):
+            if entry.startswith(prefix) and entry.endswith('.npy') and \
+                    entry[len(prefix):-len('.npy')].isdigit():
+                os.remove(os.path.join(self.cache_dir, entry))
+        # write to a temporary file first, so a concurrent session never
+        # maps a partly written file
+        handle, temp = tempfile.mkstemp(suffix='.npy', dir=self.cache_dir)
+        with os.fdopen(handle, 'wb') as fileobj:
+            numpy.save(fileobj, image)
+        os.rename(temp, cached)
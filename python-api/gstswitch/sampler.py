@@ -0,0 +1,205 @@
+"""
+The sampler measures the resources a process uses over time. It reads
+/proc/<pid>/stat, /proc/<pid>/status and /proc/<pid>/fd in a background
+thread, so the gst-switch-srv can be watched while sources and clients come
+and go, and exports the samples as CSV or JSON.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import csv
+import errno
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+__all__ = ["ResourceSample", "ResourceSampler", ]
+
+
+ResourceSample = namedtuple('ResourceSample', ['time', 'cpu_percent', 'rss',
+                                               'threads', 'fds'])
+ResourceSample.__doc__ = """The resources of a process at one point in time
+
+:param time: time.time() of the sample
+:param cpu_percent: CPU time used since the previous sample in percent of
+    the wall time, may exceed 100 with several threads. None for the first
+    sample.
+:param rss: resident set size in bytes
+:param threads: number of threads
+:param fds: number of open file descriptors
+"""
+
+# clock ticks per second of the utime and stime fields of /proc/<pid>/stat
+CLOCK_TICKS = os.sysconf(str('SC_CLK_TCK')) if hasattr(os, 'sysconf') \
+    else 100
+
+
+class ResourceSampler(object):
+
+    """Sample the CPU usage, RSS, thread count and open file descriptors
+    of a process
+
+    Every sample reads two small files and lists one directory, so the
+    sampler can run next to a benchmark without disturbing it. Sampling
+    stops by itself when the process exits.
+
+    :param pid: The process id
+    :param interval: seconds between two samples of the background thread
+    :param max_samples: number of samples to keep, None to keep all
+    :param proc_dir: The mount point of procfs
+    """
+
+    def __init__(self, pid, interval=1.0, max_samples=None, proc_dir='/proc'):
+        super(ResourceSampler, self).__init__()
+        self.log = logging.getLogger('resource-sampler')
+
+        if interval <= 0:
+            raise ValueError("interval must be positive, not {0}"
+                             .format(interval))
+        self.pid = pid
+        self.interval = interval
+        self.samples = deque(maxlen=max_samples)
+        self._path = os.path.join(proc_dir, str(pid))
+        self._last_cpu = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_cpu_ticks(self):
+        """Non-public method: Get utime + stime of the process in ticks"""
+        with open(os.path.join(self._path, 'stat')) as stat:
+            data = stat.read()
+        # the command name in parentheses may contain spaces, the fields
+        # after it start with the state (field 3), utime is field 14
+        fields = data[data.rindex(')') + 2:].split()
+        return int(fields[11]) + int(fields[12])
+
+    def _read_status(self):
+        """Non-public method: Get RSS in bytes and the threads"""
+        rss = threads = None
+        with open(os.path.join(self._path, 'status')) as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith('Threads:'):
+                    threads = int(line.split()[1])
+        # kernel threads and zombies have no VmRSS
+        return rss or 0, threads
+
+    def sample(self):
+        """Take a sample now and append it to samples
+
+        :returns: the ResourceSample
+        :raises OSError, IOError: The process does not exist (anymore)
+        """
+        now = time.time()
+        ticks = self._read_cpu_ticks()
+        rss, threads = self._read_status()
+        fds = len(os.listdir(os.path.join(self._path, 'fd')))
+
+        cpu_percent = None
+        if self._last_cpu is not None:
+            last_now, last_ticks = self._last_cpu
+            if now > last_now:
+                cpu_percent = round(100.0 * (ticks - last_ticks) /
+                                    CLOCK_TICKS / (now - last_now), 2)
+        self._last_cpu = (now, ticks)
+
+        res = ResourceSample(now, cpu_percent, rss, threads, fds)
+        self.samples.append(res)
+        return res
+
+    def start(self):
+        """Sample every interval seconds on a background thread
+
+        :returns: the ResourceSampler
+        """
+        if self._thread is not None:
+            raise RuntimeError("ResourceSampler is already running")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='resource-sampler')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the background thread
+
+        :param timeout: seconds to wait for the thread
+        :returns: None
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        """Non-public method: Body of the background thread"""
+        while True:
+            try:
+                self.sample()
+            except (IOError, OSError) as error:
+                if error.errno not in (errno.ENOENT, errno.ESRCH):
+                    self.log.exception("sampling %d failed", self.pid)
+                self.log.info("process %d is gone, stop sampling", self.pid)
+                return
+            if self._stop.wait(self.interval):
+                return
+
+    def summary(self):
+        """Get the minimum, mean and maximum of every measurement
+
+        :returns: dict of measurement -> dict with min, mean and max
+        """
+        samples = list(self.samples)
+        result = {}
+        for field in ResourceSample._fields[1:]:
+            values = [getattr(res, field) for res in samples
+                      if getattr(res, field) is not None]
+            if not values:
+                result[field] = None
+                continue
+            result[field] = {
+                'min': min(values),
+                'mean': round(float(sum(values)) / len(values), 2),
+                'max': max(values),
+            }
+        return result
+
+    def to_dicts(self):
+        """Get the samples as list of dicts, ie to embed them in a report"""
+        return [dict(zip(ResourceSample._fields, res))
+                for res in self.samples]
+
+    def write_csv(self, fileobj):
+        """Write the samples to fileobj as CSV with a header line
+
+        :param fileobj: File-like object opened for writing text
+        :returns: None
+        """
+        writer = csv.writer(fileobj, lineterminator='\n')
+        writer.writerow(ResourceSample._fields)
+        for res in list(self.samples):
+            writer.writerow(['' if value is None else value
+                             for value in res])
+
+    def write_json(self, fileobj):
+        """Write the pid, the summary and the samples to fileobj as JSON
+
+        :param fileobj: File-like object opened for writing text
+        :returns: None
+        """
+        json.dump({'pid': self.pid,
+                   'interval': self.interval,
+                   'summary': self.summary(),
+                   'samples': self.to_dicts()},
+                  fileobj, indent=2, sort_keys=True)
@@ -8,20 +8,27 @@ from __future__ import absolute_import, print_function, unicode_literals
 from six import string_types
 import os
 import signal
+import socket
 import subprocess
+import time
 from distutils import spawn
 import logging
 
 from errno import ENOENT
 from .process_monitor import ProcessMonitor
-from .exception import PathError, ServerProcessError
+from .connection import Connection
+from .controller import Controller
+from .exception import PathError, ServerProcessError, ConnectionError
 
 
-__all__ = ["Server", ]
+__all__ = ["Server", "ServerPool", ]
 
 
 TOOLS_DIR = '/'.join(os.getcwd().split('/')[:-1]) + '/tools/'
 
+# hosts a server listens on which a client cannot connect to
+WILDCARD_HOSTS = ('', '::', '0.0.0.0')
+
 
 class Server(object):
 
@@ -36,6 +43,15 @@ class Server(object):
         default = tcp:host=::,port=5000
     :param record_file: The record file format
     :param video_format: The video format to use on the server.
+    :param drain_output: True to read the output of the server continuously
+        on a background thread, so it never blocks on a full pipe
+    :param cpus: Set of CPU numbers to pin the server to, None to let it
+        run on any CPU
+    :param log_file: File the output is written to with log_to_file
+    :param video_socket: Path of a unix-domain socket the server accepts
+        video inputs on in addition to the video port, None for none
+    :param audio_socket: Path of a unix-domain socket the server accepts
+        audio inputs on in addition to the audio port, None for none
     :returns: nothing
     """
 
@@ -47,7 +63,12 @@ class Server(object):
             controller_address='tcp:host=::,port=5000',
             record_file=False,
             video_format=None,
-            log_to_file=True):
+            log_to_file=True,
+            drain_output=False,
+            cpus=None,
+            log_file='server.log',
+            video_socket=None,
+            audio_socket=None):
 
         super(Server, self).__init__()
 
@@ -68,9 +89,16 @@ class Server(object):
         self.video_format = video_format
 
         self.log_to_file = log_to_file
+        self.log_file = log_file
+        self.drain_output = drain_output
+        self.cpus = cpus
+        self.video_socket = video_socket
+        self.audio_socket = audio_socket
 
         self.proc = None
         self.pid = None
+        self.start_time = None
+        self.ready_time = None
 
     @property
     def path(self):
@@ -164,6 +192,20 @@ class Server(object):
                                  " one Colon. It is '{0}'"
                                  .format(controller_address))
 
+    @property
+    def client_address(self):
+        """Get the DBus-Address a client connects to, the controller address
+        with a wildcard host replaced by 127.0.0.1
+        """
+        transport, _, params = self.controller_address.partition(':')
+        parts = []
+        for param in params.split(','):
+            key, _, value = param.partition('=')
+            if key == 'host' and value in WILDCARD_HOSTS:
+                param = 'host=127.0.0.1'
+            parts.append(param)
+        return '{0}:{1}'.format(transport, ','.join(parts))
+
     @property
     def record_file(self):
         """Get the record file"""
@@ -191,14 +233,18 @@ class Server(object):
                     raise ValueError("Record File: '{0}' "
                                      "cannot have forward slashes".format(rec))
 
-    def run(self, gst_option=''):
+    def run(self, gst_option='', wait_ready=False, timeout=10):
         """Launch the server process
 
         :param: None
         :gst-option: Any gstreamer option.
         Refer to http://www.linuxmanpages.com/man1/gst-launch-0.8.1.php#lbAF.
         Multiple can be added separated by spaces
-        :returns: nothing
+        :param wait_ready: True to return only once the server answers
+        over DBus, see wait_ready
+        :param timeout: seconds to wait for the server to get ready
+        :returns: the seconds until the server was ready if wait_ready,
+        otherwise nothing
         :raises IOError: Fail to open /dev/null (os.devnull)
         :raises PathError: Unable to find gst-switch-srv at path specified
         :raises ServerProcessError: Running gst-switch-srv
@@ -206,9 +252,58 @@ class Server(object):
         """
         self.gst_option_string = gst_option
         self.log.debug("Starting server")
+        self.start_time = time.time()
+        self.ready_time = None
         self.proc = self._run_process()
         if self.proc:
             self.pid = self.proc.pid
+        if wait_ready:
+            return self.wait_ready(timeout)
+
+    def wait_ready(self, timeout=10, initial_delay=0.005, max_delay=0.25):
+        """Probe the controller until get_compose_port answers. The delay
+        between the probes starts at initial_delay and doubles up to
+        max_delay.
+
+        The seconds from starting the process until the server was ready
+        are stored in ready_time.
+
+        :param timeout: seconds to wait at most
+        :returns: ready_time
+        :raises ServerProcessError: The server exited or did not get ready
+        within timeout
+        """
+        endtime = time.time() + timeout
+        delay = initial_delay
+        probes = 0
+        conn = Connection(address=self.client_address)
+        while True:
+            probes += 1
+            try:
+                conn.connect_dbus()
+                conn.get_compose_port()
+                break
+            except ConnectionError as error:
+                last_error = error
+            finally:
+                conn.disconnect_dbus()
+
+            if not self.is_alive():
+                raise ServerProcessError(
+                    "gst-switch-srv exited with {0} before it was ready"
+                    .format(self.proc.poll()))
+            remaining = endtime - time.time()
+            if remaining <= 0:
+                raise ServerProcessError(
+                    "gst-switch-srv not ready after {0}s: {1}"
+                    .format(timeout, last_error))
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+        self.ready_time = time.time() - self.start_time
+        self.log.info("Server ready after %.3fs and %d probes",
+                      self.ready_time, probes)
+        return self.ready_time
 
     def is_alive(self):
         """Returns True if the Process did not yet return"""
@@ -219,6 +314,31 @@ class Server(object):
         ProcessMonitor"""
         self.proc.wait_for_output(match, timeout, count)
 
+    def wait_for_event(self, kind, timeout=5, count=1, **data):
+        """Calls wait_for_event with the given parameters on the underlying
+        ProcessMonitor
+
+        :returns: the ServerEvent waited for
+        """
+        return self.proc.wait_for_event(kind, timeout, count, **data)
+
+    def subscribe_events(self, callback, kind=None):
+        """Calls subscribe on the underlying ProcessMonitor"""
+        self.proc.subscribe(callback, kind)
+
+    def sample_resources(self, interval=1.0, max_samples=None):
+        """Calls sample_resources on the underlying ProcessMonitor
+
+        :returns: the running ResourceSampler
+        """
+        return self.proc.sample_resources(interval, max_samples)
+
+    def startup_time(self):
+        """Seconds from starting the process until the controller
+        listened, or None if it did not yet
+        """
+        return self.proc.time_to('controller_listening')
+
     def _run_process(self):
         """Non-public method: Runs the gst-switch-srv process
         """
@@ -237,6 +357,10 @@ class Server(object):
         cmd.append("--video-input-port={0}".format(self.video_port))
         cmd.append("--audio-input-port={0}".format(self.audio_port))
         cmd.append("--controller-address={0}".format(self.controller_address))
+        if self.video_socket is not None:
+            cmd.append("--video-input-socket={0}".format(self.video_socket))
+        if self.audio_socket is not None:
+            cmd.append("--audio-input-socket={0}".format(self.audio_socket))
         if self.record_file is False:
             pass
         elif self.record_file is True:
@@ -258,11 +382,17 @@ class Server(object):
         :returns: process created
         """
         self.log.info('Starting process %s', cmd)
+        kwargs = {}
+        if self.drain_output:
+            kwargs['drain'] = True
+        if self.cpus is not None:
+            kwargs['cpus'] = self.cpus
         try:
             if self.log_to_file:
-                process = ProcessMonitor(cmd, open('server.log', 'w'))
+                process = ProcessMonitor(cmd, open(self.log_file, 'w'),
+                                         **kwargs)
             else:
-                process = ProcessMonitor(cmd)
+                process = ProcessMonitor(cmd, **kwargs)
 
             return process
 
@@ -357,3 +487,177 @@ class Server(object):
                 return True
             except OSError:
                 raise ServerProcessError('Unable to send signal')
+
+
+class ServerPool(object):
+
+    """Run several gst-switch-srv side by side on one host
+
+    Every server gets its own block of port_span ports starting at
+    base_port. The video port is the first port of the block, the compose,
+    encode and preview ports follow it, the audio port is the second to last
+    and the controller port the last port of the block. The server binds
+    the compose, encode and preview ports in order after the video port, so
+    blocks with any port in use are skipped.
+
+    :param size: The number of servers
+    :param path: Path where the executable gst-switch-srv is located
+    :param base_port: The first port of the first block - default = 3000
+    :param port_span: The number of ports of a block - default = 100
+    :param cpus: None not to pin the servers, True to pin every server to
+        one of the CPUs this process may use, or a list of sets of CPU
+        numbers. The CPUs are assigned round robin.
+    :param server_args: Further arguments of every Server
+    """
+
+    def __init__(self, size, path=None, base_port=3000, port_span=100,
+                 cpus=None, **server_args):
+        super(ServerPool, self).__init__()
+        self.log = logging.getLogger('server-pool')
+
+        if size < 1:
+            raise ValueError("size must be at least 1, not {0}".format(size))
+        # video, compose, encode, audio and controller port
+        if port_span < 5:
+            raise ValueError("port_span must be at least 5, not {0}"
+                             .format(port_span))
+        self.size = size
+        self.path = path
+        self.base_port = base_port
+        self.port_span = port_span
+        self.cpu_sets = self._cpu_sets(cpus)
+        self.server_args = server_args
+        self.servers = []
+
+    @classmethod
+    def _cpu_sets(cls, cpus):
+        """Non-public method: Get the list of CPU sets to assign"""
+        if cpus is None:
+            return None
+        if cpus is True:
+            if not hasattr(os, 'sched_getaffinity'):
+                raise ServerProcessError("CPU pinning is not supported on "
+                                         "this platform")
+            return [set([cpu]) for cpu in sorted(os.sched_getaffinity(0))]
+        cpu_sets = [set([cpu]) if isinstance(cpu, int) else set(cpu)
+                    for cpu in cpus]
+        if not cpu_sets:
+            raise ValueError("cpus must not be empty")
+        return cpu_sets
+
+    @classmethod
+    def port_is_free(cls, port):
+        """Check whether nothing listens on port"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(('', port))
+            return True
+        except socket.error:
+            return False
+        finally:
+            sock.close()
+
+    def allocate_ports(self):
+        """Find a free port block for every server
+
+        :returns: list of (video_port, audio_port, controller_port)
+        :raises ServerProcessError: Not enough free blocks below 65536
+        """
+        blocks = []
+        start = self.base_port
+        while len(blocks) < self.size:
+            end = start + self.port_span - 1
+            if end > 65535:
+                raise ServerProcessError(
+                    "Only {0} of {1} free port blocks from {2}"
+                    .format(len(blocks), self.size, self.base_port))
+            if all(self.port_is_free(port) for port in range(start, end + 1)):
+                blocks.append((start, end - 1, end))
+            else:
+                self.log.info("skipping port block at %d, it is in use",
+                              start)
+            start += self.port_span
+        return blocks
+
+    def start(self, wait_ready=True, timeout=10):
+        """Launch the servers. When one fails to start, the ones already
+        running are terminated.
+
+        :param wait_ready: True to wait until every server answers over DBus
+        :param timeout: seconds to wait for every server to get ready
+        :returns: self
+        """
+        if self.servers:
+            raise ServerProcessError("ServerPool is already running")
+        blocks = self.allocate_ports()
+        try:
+            for index, (video, audio, control) in enumerate(blocks):
+                cpus = None
+                if self.cpu_sets:
+                    cpus = self.cpu_sets[index % len(self.cpu_sets)]
+                args = dict(self.server_args)
+                args.setdefault('log_file', 'server-{0}.log'.format(index))
+                serv = Server(
+                    path=self.path,
+                    video_port=video,
+                    audio_port=audio,
+                    controller_address='tcp:host=::,port={0}'.format(control),
+                    cpus=cpus,
+                    **args)
+                self.servers.append(serv)
+                serv.run()
+            if wait_ready:
+                for serv in self.servers:
+                    serv.wait_ready(timeout)
+        except Exception:
+            self.terminate()
+            raise
+        return self
+
+    def terminate(self):
+        """Terminate all running servers"""
+        servers, self.servers = self.servers, []
+        for serv in servers:
+            if serv.proc is not None:
+                try:
+                    serv.terminate()
+                except ServerProcessError:
+                    self.log.exception("terminating %s failed", serv.pid)
+
+    def controller(self, index):
+        """Make a Controller for a server of the pool
+
+        :param index: The index of the server
+        :returns: Controller connected to the server
+        """
+        controller = Controller(address=self.servers[index].client_address)
+        controller.establish_connection()
+        return controller
+
+    def test_sources(self, index):
+        """Make TestSources feeding into a server of the pool
+
+        :param index: The index of the server
+        :returns: TestSources
+        """
+        # helpers initializes GStreamer, which the servers do not need
+        from .helpers import TestSources
+        serv = self.servers[index]
+        return TestSources(video_port=serv.video_port,
+                           audio_port=serv.audio_port)
+
+    def __len__(self):
+        return len(self.servers)
+
+    def __iter__(self):
+        return iter(self.servers)
+
+    def __getitem__(self, index):
+        return self.servers[index]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.terminate()
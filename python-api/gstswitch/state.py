@@ -0,0 +1,245 @@
+"""
+Client side mirrors of the state of the gst-switch-srv.
+They take one snapshot over dbus and then follow the signals sent by the
+server, so reading them does not need a round trip.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import threading
+from collections import namedtuple
+
+__all__ = ["PreviewPort", "PreviewPortTable", "ServerState", ]
+
+
+PreviewPort = namedtuple('PreviewPort', ['port', 'serve', 'type'])
+
+
+class PreviewPortTable(object):
+
+    """The preview ports of the gst-switch-srv, kept up to date from the
+    preview_port_added and preview_port_removed Signals of a Controller.
+    Signals are only delivered while the GLib main context of the
+    Controller is dispatched.
+
+    :param controller: The Controller to follow
+    :param refresh: True to take a snapshot of the ports right away
+    """
+
+    SERVE_NOTHING = 0
+    SERVE_VIDEO_STREAM = 1
+    SERVE_AUDIO_STREAM = 2
+
+    TYPE_BRANCH_VIDEO_A = 7
+    TYPE_BRANCH_VIDEO_B = 8
+    TYPE_BRANCH_AUDIO = 9
+    TYPE_BRANCH_PREVIEW = 10
+
+    def __init__(self, controller, refresh=True):
+        super(PreviewPortTable, self).__init__()
+        self.controller = controller
+        self._lock = threading.Lock()
+        self._ports = {}
+
+        # subscribe first, so no port gets lost while taking the snapshot
+        controller.on_preview_port_added(self.cb_port_added)
+        controller.on_preview_port_removed(self.cb_port_removed)
+        if refresh:
+            self.refresh()
+
+    def refresh(self):
+        """Replace the table with a snapshot taken from the server
+
+        :param: None
+        :returns: None
+        """
+        ports = self.controller.get_preview_port_list()
+        with self._lock:
+            self._ports = dict(
+                (port[0], PreviewPort(*port)) for port in ports)
+
+    def cb_port_added(self, port, serve, type_):
+        """Callback for the preview_port_added Signal"""
+        with self._lock:
+            self._ports[port] = PreviewPort(port, serve, type_)
+
+    def cb_port_removed(self, port, serve, type_):
+        """Callback for the preview_port_removed Signal"""
+        with self._lock:
+            self._ports.pop(port, None)
+
+    def get(self, port, default=None):
+        """Get the PreviewPort for a port number
+
+        :param port: the port number
+        :param default: returned if the port is unknown
+        :returns: a PreviewPort with port, serve and type
+        """
+        with self._lock:
+            return self._ports.get(port, default)
+
+    def ports(self):
+        """Get the numbers of all known preview ports
+
+        :returns: sorted list of port numbers
+        """
+        with self._lock:
+            return sorted(self._ports)
+
+    def video_ports(self):
+        """Get the numbers of all preview ports serving video
+
+        :returns: sorted list of port numbers
+        """
+        return self._ports_serving(self.SERVE_VIDEO_STREAM)
+
+    def audio_ports(self):
+        """Get the numbers of all preview ports serving audio
+
+        :returns: sorted list of port numbers
+        """
+        return self._ports_serving(self.SERVE_AUDIO_STREAM)
+
+    def _ports_serving(self, serve):
+        """Non-public method: The sorted ports serving serve"""
+        with self._lock:
+            return sorted(port.port for port in self._ports.values()
+                          if port.serve == serve)
+
+    def __contains__(self, port):
+        with self._lock:
+            return port in self._ports
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ports)
+
+    def __iter__(self):
+        with self._lock:
+            ports = sorted(self._ports.values())
+        return iter(ports)
+
+
+class ServerState(object):
+
+    """Mirror of the state of the gst-switch-srv. Takes one snapshot of
+    the ports and the composite mode and then updates itself from the
+    Signals received by a Controller, so reading it is a local attribute
+    lookup instead of a dbus round trip.
+
+    Every change increments version and is announced to the callbacks
+    registered with on_change.
+
+    Attributes:
+      compose_port (int): The compose port
+      encode_port (int): The encode port
+      audio_port (int): The audio port
+      composite_mode (int): The current composite mode
+      preview_ports (PreviewPortTable): The preview ports
+      face_markers (list): (x, y, w, h) of the last marked faces
+      track_markers (list): (x, y, w, h) of the last tracked regions
+      selected_face (tuple): (x, y) of the last selected face
+
+    :param controller: The Controller to follow
+    :param refresh: True to take a snapshot right away
+    """
+
+    def __init__(self, controller, refresh=True):
+        super(ServerState, self).__init__()
+        self.controller = controller
+        self._lock = threading.Lock()
+        self._version = 0
+        self._callbacks = []
+
+        self.compose_port = None
+        self.encode_port = None
+        self.audio_port = None
+        self.composite_mode = None
+        self.face_markers = []
+        self.track_markers = []
+        self.selected_face = None
+
+        # the table registers its callbacks first, so it is up to date
+        # when the change is announced
+        self.preview_ports = PreviewPortTable(controller, refresh=False)
+        controller.on_preview_port_added(self.cb_preview_ports_changed)
+        controller.on_preview_port_removed(self.cb_preview_ports_changed)
+        controller.on_new_mode_online(self.cb_new_mode_online)
+        controller.on_show_face_marker(self.cb_show_face_marker)
+        controller.on_show_track_marker(self.cb_show_track_marker)
+        controller.on_select_face(self.cb_select_face)
+
+        if refresh:
+            self.refresh()
+
+    @property
+    def version(self):
+        """Get the number of changes seen so far"""
+        return self._version
+
+    def on_change(self, callback):
+        """Register a Callback which is called after every change.
+
+        The Callback takes the following Arguments:
+            str name   - The name of the changed attribute, 'snapshot'
+                         after refresh
+            value      - The new value of the attribute
+            int version - The version after the change
+        """
+        if not callable(callback):
+            raise ValueError('Provided argument callback is not callable')
+
+        self._callbacks.append(callback)
+
+    def refresh(self):
+        """Take a snapshot of the ports and the composite mode
+
+        :param: None
+        :returns: None
+        """
+        compose_port = self.controller.get_compose_port()
+        encode_port = self.controller.get_encode_port()
+        audio_port = self.controller.get_audio_port()
+        composite_mode = self.controller.get_composite_mode()
+        self.preview_ports.refresh()
+
+        with self._lock:
+            self.compose_port = compose_port
+            self.encode_port = encode_port
+            self.audio_port = audio_port
+            self.composite_mode = composite_mode
+        self._changed('snapshot', self)
+
+    def _changed(self, name, value):
+        """Non-public method: Count and announce a change"""
+        with self._lock:
+            self._version += 1
+            version = self._version
+        for callback in self._callbacks:
+            callback(name, value, version)
+
+    def _set(self, name, value):
+        """Non-public method: Change an attribute and announce it"""
+        with self._lock:
+            setattr(self, name, value)
+        self._changed(name, value)
+
+    def cb_preview_ports_changed(self, port, serve, type_):
+        """Callback for the preview_port_added/removed Signals"""
+        self._changed('preview_ports', self.preview_ports)
+
+    def cb_new_mode_online(self, mode):
+        """Callback for the new_mode_online Signal"""
+        self._set('composite_mode', mode)
+
+    def cb_show_face_marker(self, faces):
+        """Callback for the show_face_marker Signal"""
+        self._set('face_markers', [tuple(face) for face in faces])
+
+    def cb_show_track_marker(self, faces):
+        """Callback for the show_track_marker Signal"""
+        self._set('track_markers', [tuple(face) for face in faces])
+
+    def cb_select_face(self, xpos, ypos):
+        """Callback for the select_face Signal"""
+        self._set('selected_face', (xpos, ypos))
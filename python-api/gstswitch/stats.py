@@ -0,0 +1,24 @@
+"""
+The stats module summarizes measurements, ie the latencies of the control
+calls the benchmark and the load generator make.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import math
+
+__all__ = ["percentile", ]
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list
+
+    :param ordered: The sorted values
+    :param pct: The percentile, 0 to 100
+    :returns: The smallest value with at least pct percent of the values
+    less or equal to it, None without values
+    """
+    if not ordered:
+        return None
+    rank = int(math.ceil(pct / 100.0 * len(ordered))) - 1
+    return ordered[max(0, min(rank, len(ordered) - 1))]
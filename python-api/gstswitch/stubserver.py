@@ -0,0 +1,530 @@
+"""
+The stub server answers the dbus interface of the gst-switch-srv from
+inside the Python process, without any GStreamer pipeline behind it.
+Client code, tests and benchmarks can run against it in milliseconds
+instead of launching the real server.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import socket
+import threading
+from gi.repository import Gio, GLib
+
+__all__ = ["StubServer", ]
+
+
+class StubServer(object):
+
+    """A Gio.DBusServer implementing the SwitchControllerInterface of
+    gstswitchcontrollerintrospection.c.
+
+    It keeps the state a client can observe (ports, composite mode,
+    channels and PIP), answers the remote methods from it and emits the
+    same Signals as the gst-switch-srv. The server runs its own GLib main
+    loop on a background thread, so blocking calls from the thread which
+    owns the StubServer do not dead-lock.
+
+    Attributes:
+      calls (dict): Number of calls received per remote method
+
+    :param address: The address to listen on, port 0 picks a free port.
+    Use client_address to connect.
+    :param video_port: The video port number, compose and encode ports
+    and the preview ports are derived from it like in the gst-switch-srv
+    :param audio_port: The audio port number
+    """
+
+    OBJECT_PATH = '/us/timvideos/gstswitch/SwitchController'
+    INTERFACE = 'us.timvideos.gstswitch.SwitchControllerInterface'
+
+    SERVE_VIDEO_STREAM = 1
+    SERVE_AUDIO_STREAM = 2
+    TYPE_BRANCH_VIDEO_A = 7
+    TYPE_BRANCH_VIDEO_B = 8
+    TYPE_BRANCH_AUDIO = 9
+    TYPE_BRANCH_PREVIEW = 10
+
+    COMPOSITE_DUAL_EQUAL = 3
+    WIDTH = 1280
+    HEIGHT = 720
+
+    INTROSPECTION_XML = """
+<node>
+  <interface name='us.timvideos.gstswitch.SwitchControllerInterface'>
+    <method name='get_compose_port'>
+      <arg type='i' name='port' direction='out'/>
+    </method>
+    <method name='get_encode_port'>
+      <arg type='i' name='port' direction='out'/>
+    </method>
+    <method name='get_audio_port'>
+      <arg type='i' name='port' direction='out'/>
+    </method>
+    <method name='get_preview_ports'>
+      <arg type='s' name='ports' direction='out'/>
+    </method>
+    <method name='get_preview_port_list'>
+      <arg type='a(iii)' name='ports' direction='out'/>
+    </method>
+    <method name='set_composite_mode'>
+      <arg type='i' name='channel' direction='in'/>
+      <arg type='b' name='result' direction='out'/>
+    </method>
+    <method name='get_composite_mode'>
+      <arg type='i' name='result' direction='out'/>
+    </method>
+    <method name='set_encode_mode'>
+      <arg type='i' name='channel' direction='in'/>
+      <arg type='b' name='result' direction='out'/>
+    </method>
+    <method name='new_record'>
+      <arg type='b' name='result' direction='out'/>
+    </method>
+    <method name='adjust_pip'>
+      <arg type='i' name='dx' direction='in'/>
+      <arg type='i' name='dy' direction='in'/>
+      <arg type='i' name='dw' direction='in'/>
+      <arg type='i' name='dh' direction='in'/>
+      <arg type='u' name='result' direction='out'/>
+    </method>
+    <method name='switch'>
+      <arg type='i' name='channel' direction='in'/>
+      <arg type='i' name='port' direction='in'/>
+      <arg type='b' name='result' direction='out'/>
+    </method>
+    <method name='apply_scene'>
+      <arg type='i' name='mode' direction='in'/>
+      <arg type='i' name='port_a' direction='in'/>
+      <arg type='i' name='port_b' direction='in'/>
+      <arg type='i' name='x' direction='in'/>
+      <arg type='i' name='y' direction='in'/>
+      <arg type='i' name='w' direction='in'/>
+      <arg type='i' name='h' direction='in'/>
+      <arg type='b' name='result' direction='out'/>
+    </method>
+    <method name='click_video'>
+      <arg type='i' name='x' direction='in'/>
+      <arg type='i' name='y' direction='in'/>
+      <arg type='i' name='fw' direction='in'/>
+      <arg type='i' name='fh' direction='in'/>
+      <arg type='b' name='result' direction='out'/>
+    </method>
+    <method name='mark_face'>
+      <arg type='a(iiii)' name='faces' direction='in'/>
+    </method>
+    <method name='mark_tracking'>
+      <arg type='a(iiii)' name='faces' direction='in'/>
+    </method>
+
+    <signal name='preview_port_added'>
+      <arg type='i' name='port'/>
+      <arg type='i' name='serve'/>
+      <arg type='i' name='type'/>
+    </signal>
+    <signal name='preview_port_removed'>
+      <arg type='i' name='port'/>
+      <arg type='i' name='serve'/>
+      <arg type='i' name='type'/>
+    </signal>
+    <signal name='new_mode_online'>
+      <arg type='i' name='mode'/>
+    </signal>
+    <signal name='show_face_marker'>
+      <arg type='a(iiii)' name='mode'/>
+    </signal>
+    <signal name='show_track_marker'>
+      <arg type='a(iiii)' name='mode'/>
+    </signal>
+    <signal name='select_face'>
+      <arg type='i' name='x'/>
+      <arg type='i' name='y'/>
+    </signal>
+  </interface>
+</node>
+"""
+
+    def __init__(self, address='tcp:host=127.0.0.1,port=0',
+                 video_port=3000, audio_port=4000):
+        super(StubServer, self).__init__()
+        self.address = address
+        self.video_port = video_port
+        self.audio_port = audio_port
+
+        node_info = Gio.DBusNodeInfo.new_for_xml(self.INTROSPECTION_XML)
+        self._interface_info = node_info.interfaces[0]
+
+        self._lock = threading.Lock()
+        self.calls = {}
+        self.composite_mode = self.COMPOSITE_DUAL_EQUAL
+        self.channels = {ord('A'): None, ord('B'): None, ord('a'): None}
+        self.pip = self._default_pip(self.composite_mode)
+        self.preview_ports = []
+        self.records = 0
+
+        self._connections = []
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._client_address = None
+
+    @property
+    def client_address(self):
+        """Get the address clients connect to"""
+        return self._client_address
+
+    def start(self, timeout=5):
+        """Start listening and answering calls on a background thread
+
+        :param timeout: seconds to wait for the server to listen
+        :returns: the StubServer
+        :raises RuntimeError: the server did not start in time
+        """
+        ready = threading.Event()
+        errors = []
+        self._thread = threading.Thread(target=self._run,
+                                        args=(ready, errors),
+                                        name='gstswitch-stub-server')
+        self._thread.daemon = True
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise RuntimeError('StubServer did not start in time')
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self, timeout=5):
+        """Close all client connections and stop the server
+
+        :param timeout: seconds to wait for the background thread
+        :returns: None
+        """
+        if self._loop is None:
+            return
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for connection in connections:
+            try:
+                connection.close_sync(None)
+            except GLib.GError:
+                pass
+        self._loop.quit()
+        self._thread.join(timeout)
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self, ready, errors):
+        """Non-public method: Body of the background thread"""
+        context = GLib.MainContext()
+        context.push_thread_default()
+        try:
+            try:
+                self._server = Gio.DBusServer.new_sync(
+                    self.address,
+                    Gio.DBusServerFlags.AUTHENTICATION_ALLOW_ANONYMOUS,
+                    Gio.dbus_generate_guid(),
+                    None,
+                    None)
+            except GLib.GError as error:
+                errors.append(RuntimeError(
+                    "Cannot listen on '{0}': {1}".format(self.address,
+                                                         error.message)))
+                ready.set()
+                return
+
+            # new-connection is emitted in the thread-default context
+            self._server.connect('new-connection', self._on_new_connection)
+            self._server.start()
+            self._client_address = self._server.get_client_address()
+            self._loop = GLib.MainLoop(context)
+            # a quit() before run() is lost, so only report ready from
+            # inside the running loop
+            idle = GLib.idle_source_new()
+            idle.set_callback(lambda *args: ready.set())
+            idle.attach(context)
+            self._loop.run()
+            self._server.stop()
+        finally:
+            context.pop_thread_default()
+
+    def _on_new_connection(self, server, connection):
+        """Non-public method: Export the controller object to a client"""
+        stream = connection.get_stream()
+        if isinstance(stream, Gio.TcpConnection):
+            # Signals are small writes next to the reply, do not let
+            # them wait for the delayed ACK of the client
+            stream.get_socket().set_option(socket.IPPROTO_TCP,
+                                           socket.TCP_NODELAY, 1)
+        connection.register_object(self.OBJECT_PATH, self._interface_info,
+                                   self._on_method_call, None, None)
+        connection.connect('closed', self._on_connection_closed)
+        with self._lock:
+            self._connections.append(connection)
+        return True
+
+    def _on_connection_closed(self, connection, vanished, error):
+        """Non-public method: Forget a client which went away"""
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+
+    def _on_method_call(self, connection, sender, object_path,
+                        interface_name, method_name, parameters, invocation):
+        """Non-public method: Answer a remote method call"""
+        handler = getattr(self, '_do_' + method_name, None)
+        with self._lock:
+            self.calls[method_name] = self.calls.get(method_name, 0) + 1
+        if handler is None:
+            # the gst-switch-srv does not implement it either
+            invocation.return_dbus_error(
+                'org.freedesktop.DBus.Error.UnknownMethod',
+                'Unsupported call {0}'.format(method_name))
+            return
+        # pylint: disable=broad-except
+        try:
+            result = handler(*parameters.unpack())
+        except Exception as error:
+            invocation.return_dbus_error(
+                'org.freedesktop.DBus.Error.Failed',
+                '{0}: {1}'.format(method_name, error))
+            return
+        invocation.return_value(result)
+
+    def emit_signal(self, signal_name, *args):
+        """Emit a Signal to all connected clients
+
+        :param signal_name: one of the signals of the interface
+        :param args: the arguments of the Signal
+        :returns: None
+        """
+        signal_info = self._interface_info.lookup_signal(signal_name)
+        if signal_info is None:
+            raise ValueError("Unknown signal '{0}'".format(signal_name))
+        signature = '({0})'.format(
+            ''.join(arg.signature for arg in signal_info.args))
+        parameters = GLib.Variant(signature, args)
+
+        with self._lock:
+            self._connections = [connection for connection
+                                 in self._connections
+                                 if not connection.is_closed()]
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.emit_signal(None, self.OBJECT_PATH,
+                                       self.INTERFACE, signal_name,
+                                       parameters)
+            except GLib.GError:
+                # the client went away in the meantime
+                pass
+
+    def add_preview_port(self, serve=SERVE_VIDEO_STREAM, type_=None):
+        """Simulate a new source connecting to the server
+
+        The first two video sources become the A and B channels and
+        the first audio source the audio channel, like in the
+        gst-switch-srv.
+
+        :param serve: SERVE_VIDEO_STREAM or SERVE_AUDIO_STREAM
+        :param type_: the branch type, derived from serve by default
+        :returns: the new preview port
+        """
+        with self._lock:
+            port = self.video_port + 3 + len(self.preview_ports)
+            if self.preview_ports:
+                port = max(port, self.preview_ports[-1][0] + 1)
+            if type_ is None:
+                type_ = self._next_type(serve)
+            self.preview_ports.append((port, serve, type_))
+            channel = {self.TYPE_BRANCH_VIDEO_A: ord('A'),
+                       self.TYPE_BRANCH_VIDEO_B: ord('B'),
+                       self.TYPE_BRANCH_AUDIO: ord('a')}.get(type_)
+            if channel is not None:
+                self.channels[channel] = port
+        self.emit_signal('preview_port_added', port, serve, type_)
+        return port
+
+    def _next_type(self, serve):
+        """Non-public method: The branch type of the next source"""
+        if serve == self.SERVE_AUDIO_STREAM:
+            if self.channels[ord('a')] is None:
+                return self.TYPE_BRANCH_AUDIO
+            return self.TYPE_BRANCH_PREVIEW
+        if self.channels[ord('A')] is None:
+            return self.TYPE_BRANCH_VIDEO_A
+        if self.channels[ord('B')] is None:
+            return self.TYPE_BRANCH_VIDEO_B
+        return self.TYPE_BRANCH_PREVIEW
+
+    def remove_preview_port(self, port):
+        """Simulate a source disconnecting from the server
+
+        :param port: the preview port of the source
+        :returns: True if the port was known
+        """
+        with self._lock:
+            for entry in self.preview_ports:
+                if entry[0] == port:
+                    self.preview_ports.remove(entry)
+                    break
+            else:
+                return False
+            for channel, channel_port in self.channels.items():
+                if channel_port == port:
+                    self.channels[channel] = None
+        self.emit_signal('preview_port_removed', *entry)
+        return True
+
+    def _default_pip(self, mode):
+        """Non-public method: The geometry of channel B in mode, like
+        gst_composite_layout_mode computes it
+        """
+        width, height = self.WIDTH, self.HEIGHT
+        if mode == 1:
+            return [int(width * 0.08 + 0.5), int(height * 0.08 + 0.5),
+                    int(width * 0.3 + 0.5), int(height * 0.3 + 0.5)]
+        if mode == 2:
+            a_width = int(width * 0.7 + 0.5)
+            a_height = int(height * 0.7 + 0.5)
+            return [a_width + 1, 0, width - a_width, height - a_height]
+        if mode == 3:
+            a_width = int(width * 0.5 + 0.5)
+            a_height = int(height * 0.5 + 0.5)
+            return [a_width + 1, (height - a_height) // 2,
+                    width - a_width, a_height]
+        return [0, 0, 0, 0]
+
+    def _set_mode(self, mode):
+        """Non-public method: Change the composite mode, announcing it"""
+        with self._lock:
+            self.composite_mode = mode
+            self.pip = self._default_pip(mode)
+        self.emit_signal('new_mode_online', mode)
+
+    def _do_get_compose_port(self):
+        """get_compose_port remote method"""
+        return GLib.Variant('(i)', (self.video_port + 1,))
+
+    def _do_get_encode_port(self):
+        """get_encode_port remote method"""
+        return GLib.Variant('(i)', (self.video_port + 2,))
+
+    def _do_get_audio_port(self):
+        """get_audio_port remote method"""
+        return GLib.Variant('(i)', (self.audio_port,))
+
+    def _do_get_preview_ports(self):
+        """get_preview_ports remote method"""
+        with self._lock:
+            ports = GLib.Variant('a(iii)', self.preview_ports)
+        return GLib.Variant('(s)', (ports.print_(False),))
+
+    def _do_get_preview_port_list(self):
+        """get_preview_port_list remote method"""
+        with self._lock:
+            return GLib.Variant('(a(iii))', (self.preview_ports,))
+
+    def _do_set_composite_mode(self, mode):
+        """set_composite_mode remote method"""
+        if mode == self.composite_mode or mode not in range(0, 4):
+            return GLib.Variant('(b)', (False,))
+        self._set_mode(mode)
+        return GLib.Variant('(b)', (True,))
+
+    def _do_get_composite_mode(self):
+        """get_composite_mode remote method"""
+        return GLib.Variant('(i)', (self.composite_mode,))
+
+    def _do_new_record(self):
+        """new_record remote method"""
+        with self._lock:
+            self.records += 1
+        return GLib.Variant('(b)', (True,))
+
+    def _do_adjust_pip(self, dx, dy, dw, dh):
+        """adjust_pip remote method"""
+        result = 0
+        with self._lock:
+            pip = self.pip
+            pip[0] = max(0, pip[0] + dx)
+            pip[1] = max(0, pip[1] + dy)
+            pip[2] = max(1, pip[2] + dw)
+            pip[3] = max(1, pip[3] + dh)
+        for bit, delta in enumerate((dx, dy, dw, dh)):
+            if delta != 0:
+                result |= 1 << bit
+        return GLib.Variant('(u)', (result,))
+
+    def _switch(self, channel, port):
+        """Non-public method: Switch channel to port like
+        gst_switch_server_switch. The two streams trade places, so the
+        previous port of channel moves to the other video channel when
+        port was on it, and the ports exchange their types.
+        """
+        with self._lock:
+            entries = dict((entry[0], entry) for entry in self.preview_ports)
+            current = self.channels.get(channel)
+            if port not in entries or current not in entries or \
+                    port == current:
+                return False
+            candidate, compose = entries[port], entries[current]
+            if candidate[1] != compose[1]:
+                return False
+
+            for other, other_port in self.channels.items():
+                if other_port == port:
+                    self.channels[other] = current
+            self.channels[channel] = port
+            self.preview_ports = [
+                (entry[0], entry[1], compose[2]) if entry is candidate else
+                (entry[0], entry[1], candidate[2]) if entry is compose else
+                entry for entry in self.preview_ports]
+            return True
+
+    def _do_switch(self, channel, port):
+        """switch remote method"""
+        return GLib.Variant('(b)', (self._switch(channel, port),))
+
+    def _do_apply_scene(self, mode, port_a, port_b, xpos, ypos,
+                        width, height):
+        """apply_scene remote method, like gst_switch_server_apply_scene
+        an unknown mode keeps the current one and the PIP is at least a
+        quarter of the output
+        """
+        result = True
+        if port_a > 0 and self.channels[ord('A')] != port_a:
+            result = self._switch(ord('A'), port_a) and result
+        if port_b > 0 and self.channels[ord('B')] != port_b:
+            result = self._switch(ord('B'), port_b) and result
+        if mode < 0 and (width <= 0 or height <= 0):
+            return GLib.Variant('(b)', (result,))
+
+        if mode not in range(0, 4):
+            mode = self.composite_mode
+        # the scene is laid out anew, even in the same mode
+        self._set_mode(mode)
+        if width > 0 and height > 0:
+            with self._lock:
+                self.pip = [max(0, xpos), max(0, ypos),
+                            max(width, self.WIDTH // 4),
+                            max(height, self.HEIGHT // 4)]
+        return GLib.Variant('(b)', (result,))
+
+    def _do_click_video(self, xpos, ypos, width, height):
+        """click_video remote method"""
+        self.emit_signal('select_face', xpos, ypos)
+        return GLib.Variant('(b)', (True,))
+
+    def _do_mark_face(self, faces):
+        """mark_face remote method"""
+        self.emit_signal('show_face_marker', faces)
+
+    def _do_mark_tracking(self, faces):
+        """mark_tracking remote method"""
+        self.emit_signal('show_track_marker', faces)
@@ -0,0 +1,332 @@
+"""
+The supervisor keeps a gst-switch-srv running. When the process exits
+unexpectedly, ie with a segmentation fault, it is restarted and the control
+state set through the supervisor is replayed, so the output looks the same
+again as quickly as possible.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from .controller import Controller
+from .exception import ServerProcessError
+
+__all__ = ["Recovery", "Supervisor", ]
+
+
+Recovery = namedtuple('Recovery', ['returncode', 'crash_time',
+                                   'time_to_ready', 'time_to_recover',
+                                   'missing_ports'])
+Recovery.__doc__ = """A restart of the gst-switch-srv
+
+:param returncode: The returncode of the exited process, -11 for a
+    segmentation fault
+:param crash_time: time.time() when the exit was noticed
+:param time_to_ready: seconds from the exit until the new process answered
+:param time_to_recover: seconds from the exit until the state was replayed
+:param missing_ports: ports of the channels which did not come back
+"""
+
+
+class Supervisor(object):
+
+    """Restart a Server whose process exits and replay its control state
+
+    The composite mode, the ports of the channels and the PIP are recorded
+    when they are changed through the set_composite_mode, switch,
+    adjust_pip and apply_scene methods of the Supervisor, which forward to
+    the Controller. A background thread waits for the process to exit.
+
+    After a restart the ports switched to only exist again once the sources
+    reconnected, so the replay waits up to port_timeout for them. A restart
+    which fails is attempted again after restart_delay, which doubles with
+    every further failure up to max_restart_delay.
+
+    Nothing reads the output of the process while the thread waits for it
+    to exit, so the server must drain its output. A Server which is not
+    running yet is switched to drain_output.
+
+    :param server: The Server to supervise, it is started if not running
+    :param controller: The Controller of the server, by default one
+        connecting to server.client_address
+    :param ready_timeout: seconds to wait for a restarted server to answer
+    :param port_timeout: seconds to wait for the ports of the channels
+    :param on_restart: callable taking the Supervisor, called when the
+        restarted server answers and before the state is replayed, ie to
+        reconnect the sources
+    :param max_restarts: number of restart attempts, failed ones
+        included, after which a process exit is final, None to always
+        restart
+    :param restart_delay: seconds to wait after the first failed restart
+    :param max_restart_delay: seconds to wait between failed restarts at
+        most
+    :raises ServerProcessError: The server is running without draining
+        its output
+    """
+
+    PORT_POLL_INTERVAL = 0.05
+
+    def __init__(self, server, controller=None, ready_timeout=10,
+                 port_timeout=5, on_restart=None, max_restarts=None,
+                 restart_delay=0.5, max_restart_delay=10):
+        super(Supervisor, self).__init__()
+        self.log = logging.getLogger('supervisor')
+
+        if server.proc is None:
+            server.drain_output = True
+        elif not server.drain_output:
+            raise ServerProcessError("A supervised Server must be run with "
+                                     "drain_output")
+        self.server = server
+        if controller is None:
+            controller = Controller(address=server.client_address)
+        self.controller = controller
+        self.ready_timeout = ready_timeout
+        self.port_timeout = port_timeout
+        self.on_restart = on_restart
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        # the control state to replay
+        self._lock = threading.Lock()
+        self.composite_mode = None
+        self.channels = {}
+        self.pip = None
+        self.pip_delta = (0, 0, 0, 0)
+
+        self.recoveries = []
+        self.restarts = 0
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Run the server if required and start watching it
+
+        :returns: the Supervisor
+        """
+        if self._thread is not None:
+            raise ServerProcessError("Supervisor is already running")
+        if self.server.proc is None:
+            self.server.run(wait_ready=True, timeout=self.ready_timeout)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='gstswitch-supervisor')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop watching and terminate the server
+
+        :param timeout: seconds to wait for the background thread
+        :returns: None
+        """
+        self._stopping.set()
+        if self.server.proc is not None:
+            try:
+                self.server.terminate()
+            except ServerProcessError:
+                self.log.exception("terminating the server failed")
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        """Non-public method: Body of the background thread"""
+        proc = self.server.proc
+        while proc is not None:
+            returncode = proc.wait()
+            crash_time = time.time()
+            if self._stopping.is_set():
+                return
+
+            self.log.error("gst-switch-srv exited with %s", returncode)
+            if not self._restart(returncode, crash_time):
+                return
+            proc = self.server.proc
+
+    def _restart(self, returncode, crash_time):
+        """Non-public method: Attempt to recover until it succeeds,
+        waiting longer after every failed attempt
+
+        :returns: True once recovered, False when max_restarts is reached
+            or the Supervisor is stopped
+        """
+        delay = self.restart_delay
+        while True:
+            if self.max_restarts is not None and \
+                    self.restarts >= self.max_restarts:
+                self.log.error("not restarting after %d attempts",
+                               self.restarts)
+                return False
+            self.restarts += 1
+            # pylint: disable=broad-except
+            try:
+                self.recover(returncode, crash_time)
+                return True
+            except Exception:
+                # ie PathError or a failing on_restart, the next attempt
+                # terminates whatever process this one left behind
+                self.log.exception("recovering gst-switch-srv failed")
+            if self._stopping.wait(delay):
+                return False
+            delay = min(delay * 2, self.max_restart_delay)
+
+    def recover(self, returncode, crash_time):
+        """Restart the server and replay the state. Called by the
+        background thread when the process exited.
+
+        :param returncode: The returncode of the exited process
+        :param crash_time: time.time() when the exit was noticed
+        :returns: the Recovery, which is also appended to recoveries
+        """
+        try:
+            self.server.terminate()
+        except ServerProcessError:
+            # the process is gone anyway, this only closes its pipes
+            pass
+        self.server.run(self.server.gst_option_string, wait_ready=True,
+                        timeout=self.ready_timeout)
+        time_to_ready = time.time() - crash_time
+        self.controller.establish_connection(force=True)
+
+        if self.on_restart is not None:
+            self.on_restart(self)
+        missing = self.replay()
+
+        recovery = Recovery(returncode, crash_time, time_to_ready,
+                            time.time() - crash_time, missing)
+        self.recoveries.append(recovery)
+        self.log.info("recovered after %.3fs, ready after %.3fs",
+                      recovery.time_to_recover, recovery.time_to_ready)
+        return recovery
+
+    def replay(self):
+        """Apply the recorded state to the server. The video channels,
+        the composite mode and an absolute PIP are applied with one
+        apply_scene, so the server only goes through one transition.
+
+        :returns: list of the ports of the channels which did not come back
+        """
+        with self._lock:
+            mode = self.composite_mode
+            channels = dict(self.channels)
+            pip = self.pip
+            pip_delta = self.pip_delta
+
+        missing = self._wait_for_ports(set(channels.values()))
+        ports = dict((channel, port) for channel, port in channels.items()
+                     if port not in missing)
+
+        scene = [-1 if mode is None else mode,
+                 ports.pop(Controller.VIDEO_CHANNEL_A, -1),
+                 ports.pop(Controller.VIDEO_CHANNEL_B, -1)]
+        scene += list(pip) if pip is not None else [0, 0, -1, -1]
+        if scene != [-1, -1, -1, 0, 0, -1, -1]:
+            self.controller.apply_scene(*scene)
+        for channel, port in ports.items():
+            self.controller.switch(channel, port)
+        if any(pip_delta):
+            self.controller.adjust_pip(*pip_delta)
+        return sorted(missing)
+
+    def _wait_for_ports(self, ports):
+        """Non-public method: Wait until the server offers ports
+
+        :returns: set of the ports missing after port_timeout
+        """
+        endtime = time.time() + self.port_timeout
+        while True:
+            missing = ports - set(self.controller.get_preview_ports())
+            if not missing or time.time() >= endtime:
+                return missing
+            time.sleep(self.PORT_POLL_INTERVAL)
+
+    def set_composite_mode(self, mode):
+        """Set the composite mode and record it, see
+        Controller.set_composite_mode. The server resets the PIP to the
+        default of the new mode.
+        """
+        res = self.controller.set_composite_mode(mode)
+        if res:
+            with self._lock:
+                self.composite_mode = mode
+                self.pip = None
+                self.pip_delta = (0, 0, 0, 0)
+        return res
+
+    def switch(self, channel, port):
+        """Switch the channel to the port and record it, see
+        Controller.switch
+        """
+        res = self.controller.switch(channel, port)
+        if res:
+            with self._lock:
+                self._record_switch(channel, port)
+        return res
+
+    def _record_switch(self, channel, port):
+        """Non-public method: Record a switch like the server does it. A
+        port on the other video channel trades places with the previous
+        port of channel. Must be called holding the lock.
+        """
+        other = {Controller.VIDEO_CHANNEL_A: Controller.VIDEO_CHANNEL_B,
+                 Controller.VIDEO_CHANNEL_B: Controller.VIDEO_CHANNEL_A
+                 }.get(channel)
+        if other is not None and self.channels.get(other) == port:
+            previous = self.channels.get(channel)
+            if previous is None:
+                del self.channels[other]
+            else:
+                self.channels[other] = previous
+        self.channels[channel] = port
+
+    def adjust_pip(self, xpos, ypos, width, height):
+        """Move and resize the PIP by the given deltas and record it, see
+        Controller.adjust_pip
+        """
+        res = self.controller.adjust_pip(xpos, ypos, width, height)
+        if not res:
+            # the server changed nothing
+            return res
+        delta = (xpos, ypos, width, height)
+        with self._lock:
+            if self.pip is None:
+                self.pip_delta = tuple(
+                    old + new for old, new in zip(self.pip_delta, delta))
+            else:
+                self.pip = tuple(
+                    old + new for old, new in zip(self.pip, delta))
+        return res
+
+    def apply_scene(self, mode=-1, port_a=-1, port_b=-1,
+                    xpos=0, ypos=0, width=-1, height=-1):
+        """Apply a scene and record it, see Controller.apply_scene"""
+        res = self.controller.apply_scene(mode, port_a, port_b,
+                                          xpos, ypos, width, height)
+        if res:
+            with self._lock:
+                if port_a > 0:
+                    self._record_switch(Controller.VIDEO_CHANNEL_A, port_a)
+                if port_b > 0:
+                    self._record_switch(Controller.VIDEO_CHANNEL_B, port_b)
+                if mode >= 0:
+                    self.composite_mode = mode
+                if width > 0 and height > 0:
+                    self.pip = (max(xpos, 0), max(ypos, 0), width, height)
+                    self.pip_delta = (0, 0, 0, 0)
+                elif mode >= 0:
+                    self.pip = None
+                    self.pip_delta = (0, 0, 0, 0)
+        return res
@@ -13,8 +13,12 @@ from gi.repository import GObject, Gst
 GObject.threads_init()
 Gst.init(None)
 
-from .exception import RangeError
+from .exception import RangeError, InvalidIndexError
 import random
+import socket
+import threading
+import time
+from collections import namedtuple
 
 # from pipeline import *
 # IMPORTS
@@ -30,6 +34,7 @@ class BasePipeline(Gst.Pipeline):
     def __init__(self):
         Gst.Pipeline.__init__(self)
         self._playing = False
+        self._sockets = {}
 
     def play(self):
         """Set the pipeline as playing"""
@@ -45,6 +50,8 @@ class BasePipeline(Gst.Pipeline):
         """Disable the pipeline"""
         self._playing = False
         self.set_state(Gst.State.NULL)
+        for name in list(self._sockets):
+            self._close_socket(name)
 
     @classmethod
     def make(cls, elem, description=''):
@@ -56,6 +63,31 @@ class BasePipeline(Gst.Pipeline):
         element = Gst.ElementFactory.make(elem, description)
         return element
 
+    def make_unixsink(self, path, description='fdsink'):
+        """Return a sink writing into a unix-domain socket of the server,
+        ie the --video-input-socket. Unlike the tcpclientsink it connects
+        right away, the connection is closed by disable().
+        :param path: The path of the socket
+        :param description: The name of the element
+        :returns: A fd sink element
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+        except socket.error:
+            sock.close()
+            raise
+        self._sockets[description] = sock
+        element = self.make('fdsink', description)
+        element.set_property('fd', sock.fileno())
+        return element
+
+    def _close_socket(self, description):
+        """Non-public method: Close the socket of a unix sink"""
+        sock = self._sockets.pop(description, None)
+        if sock is not None:
+            sock.close()
+
 
 class VideoPipeline(BasePipeline):
     """A Video Pipeline which can be used by a Video Test Source
@@ -66,14 +98,17 @@ class VideoPipeline(BasePipeline):
     :param pattern: The videotestsrc pattern of the output video
     :param timeoverlay: True to enable a running time over video
     :param clockoverlay: True to enable current clock time over video
+    :param socket_path: The video input socket of the server to send to
+    instead of the port, None to use TCP
     """
 
     VIDEO_CAPS = """
 video/x-raw,
   format=(string)I420, pixel-aspect-ratio=(fraction)1/1,
   width=(int){0}, height=(int){1},
-  framerate=(fraction)25/1
+  framerate=(fraction){2}/1
 """
+    FRAMERATE = 25
 
     def __init__(
             self,
@@ -83,7 +118,8 @@ video/x-raw,
             height=200,
             pattern=None,
             timeoverlay=False,
-            clockoverlay=False):
+            clockoverlay=False,
+            socket_path=None):
         super(VideoPipeline, self).__init__()
 
         self.host = host
@@ -116,7 +152,10 @@ video/x-raw,
         else:
             vfilter.link(gdppay)
 
-        sink = self.make_tcpclientsink(port)
+        if socket_path is None:
+            sink = self.make_tcpclientsink(port)
+        else:
+            sink = self.make_unixsink(socket_path)
         self.add(sink)
         gdppay.link(sink)
 
@@ -138,7 +177,7 @@ video/x-raw,
         element = self.make("capsfilter", "vfilter")
         width = str(width)
         height = str(height)
-        capsstring = self.VIDEO_CAPS.format(width, height)
+        capsstring = self.VIDEO_CAPS.format(width, height, self.FRAMERATE)
         caps = Gst.Caps.from_string(capsstring)
         element.set_property('caps', caps)
         return element
@@ -178,7 +217,10 @@ video/x-raw,
 
 
 class AudioPipeline(BasePipeline):
-    """docstring for AudioPipeline"""
+    """docstring for AudioPipeline
+    :param socket_path: The audio input socket of the server to send to
+    instead of the port, None to use TCP
+    """
 
     AUDIO_CAPS = """
 audio/x-raw,
@@ -191,7 +233,8 @@ audio/x-raw,
             port,
             host='127.0.0.1',
             freq=110,
-            wave=None):
+            wave=None,
+            socket_path=None):
         super(AudioPipeline, self).__init__()
 
         self.host = host
@@ -204,7 +247,10 @@ audio/x-raw,
         gdppay = self.make_gdppay()
         self.add(gdppay)
         afilter.link(gdppay)
-        sink = self.make_tcpclientsink(port)
+        if socket_path is None:
+            sink = self.make_tcpclientsink(port)
+        else:
+            sink = self.make_unixsink(socket_path)
         self.add(sink)
         gdppay.link(sink)
 
@@ -246,6 +292,389 @@ audio/x-raw,
         return element
 
 
+class SharedPipeline(BasePipeline):
+    """A single pipeline hosting any number of test source branches
+    (src ! capsfilter ! gdppay ! tcpclientsink), so many sources share one
+    clock and its streaming threads instead of a pipeline each.
+
+    Branches can be added and removed while the pipeline is playing. Their
+    sources are live, so a branch added late starts at the current running
+    time instead of catching up from zero.
+
+    :param host: The host the TCP streams are sent to
+    :param video_socket: The video input socket of the server the video
+    branches send to instead of their port, None to use TCP
+    :param audio_socket: The audio input socket of the server the audio
+    branches send to instead of their port, None to use TCP
+    """
+
+    def __init__(self, host='127.0.0.1', video_socket=None,
+                 audio_socket=None):
+        super(SharedPipeline, self).__init__()
+        self.host = host
+        self.video_socket = video_socket
+        self.audio_socket = audio_socket
+        self._lock = threading.Lock()
+        self._branches = {}
+        self._next_id = 0
+
+    @property
+    def branches(self):
+        """Get the ids of the branches"""
+        with self._lock:
+            return sorted(self._branches)
+
+    def add_video(self, port, width=300, height=200, pattern=0,
+                  timeoverlay=False, clockoverlay=False,
+                  framerate=VideoPipeline.FRAMERATE):
+        """Add a video test source branch
+        :param port: The port of where the TCP stream will be sent
+        :param width: The width of the output video
+        :param height: The height of the output video
+        :param pattern: The videotestsrc pattern of the output video
+        :param timeoverlay: True to enable a running time over video
+        :param clockoverlay: True to enable current clock time over video
+        :param framerate: The frames per second of the output video
+        :returns: The id of the branch
+        """
+        branch_id = self._new_id()
+        prefix = 'video{0}_'.format(branch_id)
+        src = self.make('videotestsrc', prefix + 'src')
+        src.set_property('pattern', int(pattern))
+        src.set_property('is-live', True)
+        vfilter = self.make('capsfilter', prefix + 'vfilter')
+        vfilter.set_property('caps', Gst.Caps.from_string(
+            VideoPipeline.VIDEO_CAPS.format(width, height, int(framerate))))
+        elements = [src, vfilter]
+        if timeoverlay:
+            overlay = self.make('timeoverlay', prefix + 'timeoverlay')
+            overlay.set_property('font-desc', "Verdana bold 50")
+            elements.append(overlay)
+        if clockoverlay:
+            overlay = self.make('clockoverlay', prefix + 'clockoverlay')
+            overlay.set_property('font-desc', "Verdana bold 50")
+            elements.append(overlay)
+        self._add_branch(branch_id, prefix, port, elements,
+                         self.video_socket)
+        return branch_id
+
+    def add_rendered_video(self, port, rendered):
+        """Add a branch looping pre-rendered frames
+        :param port: The port of where the TCP stream will be sent
+        :param rendered: The RenderedVideo to loop
+        :returns: The id of the branch
+        """
+        branch_id = self._new_id()
+        prefix = 'video{0}_'.format(branch_id)
+        src = self.make('appsrc', prefix + 'src')
+        # the FrameLoop lives as long as the signal handler of the appsrc
+        FrameLoop(src, rendered)
+        self._add_branch(branch_id, prefix, port, [src], self.video_socket)
+        return branch_id
+
+    def add_audio(self, port, freq=110, wave=0):
+        """Add an audio test source branch
+        :param port: The port of where the TCP stream will be sent
+        :param freq: The frequency of the output audio
+        :param wave: The wave pattern of the output audio (0-12)
+        :returns: The id of the branch
+        """
+        branch_id = self._new_id()
+        prefix = 'audio{0}_'.format(branch_id)
+        src = self.make('audiotestsrc', prefix + 'src')
+        src.set_property('freq', int(freq))
+        src.set_property('wave', int(wave))
+        src.set_property('is-live', True)
+        afilter = self.make('capsfilter', prefix + 'afilter')
+        afilter.set_property('caps', Gst.Caps.from_string(
+            AudioPipeline.AUDIO_CAPS))
+        self._add_branch(branch_id, prefix, port, [src, afilter],
+                         self.audio_socket)
+        return branch_id
+
+    def remove_branch(self, branch_id):
+        """Stop a branch and remove its elements from the pipeline. The
+        other branches keep running.
+        :param branch_id: The id returned by add_video or add_audio
+        :raises InvalidIndexError: There is no such branch
+        """
+        with self._lock:
+            try:
+                elements = self._branches.pop(branch_id)
+            except KeyError:
+                raise InvalidIndexError(
+                    "No branch with id:{0}".format(branch_id))
+        for element in elements:
+            element.set_state(Gst.State.NULL)
+            self.remove(element)
+        self._close_socket(elements[-1].get_name())
+
+    def _new_id(self):
+        """Non-public method: Reserve the id of a new branch"""
+        with self._lock:
+            branch_id = self._next_id
+            self._next_id += 1
+        return branch_id
+
+    def _add_branch(self, branch_id, prefix, port, elements,
+                    socket_path=None):
+        """Non-public method: Append gdppay and a tcpclientsink, or a unix
+        sink with socket_path, to elements, add all of them and bring them
+        to the state of the pipeline
+        """
+        elements.append(self.make('gdppay', prefix + 'gdppay'))
+        if socket_path is None:
+            sink = self.make('tcpclientsink', prefix + 'tcpclientsink')
+            sink.set_property('host', self.host)
+            sink.set_property('port', int(port))
+        else:
+            sink = self.make_unixsink(socket_path, prefix + 'fdsink')
+        elements.append(sink)
+
+        for element in elements:
+            self.add(element)
+        for upstream, downstream in zip(elements, elements[1:]):
+            upstream.link(downstream)
+        # downstream first, so no element pushes into one not yet running
+        for element in reversed(elements):
+            element.sync_state_with_parent()
+        with self._lock:
+            self._branches[branch_id] = elements
+
+
+# seconds between two checks of the bus while rendering
+RENDER_POLL = 0.1
+
+RenderedVideo = namedtuple('RenderedVideo', ['caps', 'buffers',
+                                             'frame_duration'])
+
+
+def render_video(width=300, height=200, pattern=0, frames=25,
+                 timeoverlay=False, clockoverlay=False,
+                 framerate=VideoPipeline.FRAMERATE, timeout=10):
+    """Render the frames of a test video once, so they can be looped by
+    FrameLoop without generating every frame again
+    :param width: The width of the video
+    :param height: The height of the video
+    :param pattern: The videotestsrc pattern of the video
+    :param frames: The number of frames to render
+    :param timeoverlay: True to render a running time over the video
+    :param clockoverlay: True to render the clock time over the video
+    :param framerate: The frames per second of the video
+    :param timeout: seconds to wait for a frame at most
+    :returns: A RenderedVideo with the caps, the buffers and the duration
+    of a frame in nanoseconds
+    :raises RuntimeError: The pipeline failed or no frame arrived in time
+    """
+    if int(frames) < 1:
+        raise RangeError('frames must be a positive value')
+
+    pipeline = Gst.Pipeline()
+    src = BasePipeline.make('videotestsrc', 'src')
+    src.set_property('pattern', int(pattern))
+    src.set_property('num-buffers', int(frames))
+    vfilter = BasePipeline.make('capsfilter', 'vfilter')
+    vfilter.set_property('caps', Gst.Caps.from_string(
+        VideoPipeline.VIDEO_CAPS.format(width, height, int(framerate))))
+    elements = [src, vfilter]
+    if timeoverlay:
+        overlay = BasePipeline.make('timeoverlay', 'timeoverlay')
+        overlay.set_property('font-desc', "Verdana bold 50")
+        elements.append(overlay)
+    if clockoverlay:
+        overlay = BasePipeline.make('clockoverlay', 'clockoverlay')
+        overlay.set_property('font-desc', "Verdana bold 50")
+        elements.append(overlay)
+    sink = BasePipeline.make('appsink', 'sink')
+    sink.set_property('sync', False)
+    elements.append(sink)
+    for element in elements:
+        pipeline.add(element)
+    for upstream, downstream in zip(elements, elements[1:]):
+        upstream.link(downstream)
+
+    caps = None
+    buffers = []
+    bus = pipeline.get_bus()
+    pipeline.set_state(Gst.State.PLAYING)
+    try:
+        while not sink.get_property('eos'):
+            sample = _pull_rendered(sink, bus, timeout)
+            if sample is None:
+                # EOS after num-buffers frames
+                break
+            caps = sample.get_caps()
+            buffers.append(sample.get_buffer())
+    finally:
+        pipeline.set_state(Gst.State.NULL)
+
+    if not buffers:
+        raise RuntimeError('videotestsrc did not render any frame')
+    duration = buffers[0].duration
+    if duration == Gst.CLOCK_TIME_NONE:
+        duration = Gst.SECOND // int(framerate)
+    return RenderedVideo(caps, buffers, duration)
+
+
+def _pull_rendered(sink, bus, timeout):
+    """Non-public function: Pull the next frame of render_video. An error
+    of the pipeline does not wake up the appsink, so the bus is checked
+    every RENDER_POLL seconds.
+
+    :returns: The Gst.Sample or None at EOS
+    :raises RuntimeError: The pipeline failed or no frame arrived in time
+    """
+    endtime = time.time() + timeout
+    while True:
+        sample = sink.emit('try-pull-sample', int(RENDER_POLL * Gst.SECOND))
+        if sample is not None:
+            return sample
+        message = bus.pop_filtered(Gst.MessageType.ERROR)
+        if message is not None:
+            error, _ = message.parse_error()
+            raise RuntimeError("Rendering the test video failed: {0}"
+                               .format(error.message))
+        if sink.get_property('eos'):
+            return None
+        if time.time() >= endtime:
+            raise RuntimeError("No frame was rendered within {0}s"
+                               .format(timeout))
+
+
+class FrameLoop(object):
+
+    """Feeds the frames of a RenderedVideo into an appsrc over and over.
+    Every frame is pushed as a new buffer sharing the rendered memory,
+    with timestamps continuing the running time of the pipeline.
+
+    :param appsrc: The appsrc element
+    :param rendered: The RenderedVideo to loop
+    """
+
+    def __init__(self, appsrc, rendered):
+        super(FrameLoop, self).__init__()
+        self.rendered = rendered
+        self._index = 0
+        self._base = None
+
+        appsrc.set_property('caps', rendered.caps)
+        appsrc.set_property('format', Gst.Format.TIME)
+        appsrc.set_property('is-live', True)
+        # a few frames ahead are enough, the rest waits in the loop
+        appsrc.set_property('max-bytes', 4 * rendered.buffers[0].get_size())
+        appsrc.connect('need-data', self.cb_need_data)
+
+    def cb_need_data(self, appsrc, length):
+        """Callback for the need-data signal, pushes the next frame"""
+        if self._base is None:
+            # start at the current running time, ie when added to a
+            # pipeline which is already playing
+            clock = appsrc.get_clock()
+            self._base = 0
+            if clock is not None:
+                self._base = max(0, clock.get_time() - appsrc.get_base_time())
+
+        buffers = self.rendered.buffers
+        frame = buffers[self._index % len(buffers)]
+        buf = frame.copy_region(Gst.BufferCopyFlags.FLAGS |
+                                Gst.BufferCopyFlags.META |
+                                Gst.BufferCopyFlags.MEMORY,
+                                0, frame.get_size())
+        buf.pts = self._base + self._index * self.rendered.frame_duration
+        buf.dts = buf.pts
+        buf.duration = self.rendered.frame_duration
+        self._index += 1
+        appsrc.emit('push-buffer', buf)
+
+
+class LoopingVideoPipeline(BasePipeline):
+    """A Video Pipeline looping pre-rendered frames
+    (appsrc ! gdppay ! tcpclientsink)
+    :param port: The port of where the TCP stream will be sent
+    :param rendered: The RenderedVideo to loop
+    :param host: The host the TCP stream is sent to
+    :param socket_path: The video input socket of the server to send to
+    instead of the port, None to use TCP
+    """
+
+    def __init__(self, port, rendered, host='127.0.0.1', socket_path=None):
+        super(LoopingVideoPipeline, self).__init__()
+        self.host = host
+
+        src = self.make('appsrc', 'src')
+        self.loop = FrameLoop(src, rendered)
+        self.add(src)
+        gdppay = self.make('gdppay', 'gdppay')
+        self.add(gdppay)
+        src.link(gdppay)
+        if socket_path is None:
+            sink = self.make('tcpclientsink', 'tcpclientsink')
+            sink.set_property('host', self.host)
+            sink.set_property('port', int(port))
+        else:
+            sink = self.make_unixsink(socket_path)
+        self.add(sink)
+        gdppay.link(sink)
+
+
+class LoopingVideoSrc(object):
+
+    """A Test Video Source looping pre-rendered frames, so every frame is
+    generated once instead of once per source and frame
+    :param port: The port of where the TCP stream will be sent
+    :param rendered: The RenderedVideo to loop, it may be shared by many
+    sources
+    :param pattern: The pattern the frames were rendered with
+    :param socket_path: The video input socket of the server to send to
+    instead of the port, None to use TCP
+    """
+    HOST = '127.0.0.1'
+
+    def __init__(self, port, rendered, pattern=None, socket_path=None):
+        super(LoopingVideoSrc, self).__init__()
+        self.port = port
+        self.pattern = pattern
+        self.pipeline = LoopingVideoPipeline(port, rendered, self.HOST,
+                                             socket_path)
+
+    def run(self):
+        """Run the pipeline"""
+        self.pipeline.play()
+
+    def pause(self):
+        """Pause the pipeline"""
+        self.pipeline.pause()
+
+    def end(self):
+        """End/disable the pipeline"""
+        self.pipeline.disable()
+
+
+class SharedSrc(object):
+
+    """A test source running as a branch of a SharedPipeline.
+    It offers end() like VideoSrc and AudioSrc.
+
+    :param pipeline: The SharedPipeline
+    :param branch_id: The id of the branch
+    :param port: The port the branch sends to
+    :param pattern: The videotestsrc pattern of a video branch
+    :param wave: The wave of an audio branch
+    """
+
+    def __init__(self, pipeline, branch_id, port, pattern=None, wave=None):
+        super(SharedSrc, self).__init__()
+        self.pipeline = pipeline
+        self.branch_id = branch_id
+        self.port = port
+        self.pattern = pattern
+        self.wave = wave
+
+    def end(self):
+        """Remove the branch from the pipeline"""
+        self.pipeline.remove_branch(self.branch_id)
+
+
 class PreviewPipeline(BasePipeline):
 
     """Pipeline for usage by a Preview
@@ -319,6 +748,139 @@ class PreviewPipeline(BasePipeline):
         return element
 
 
+class MosaicPipeline(BasePipeline):
+
+    """Pipeline showing many preview ports as tiles of one mosaic
+    (tcpclientsrc ! gdpdepay ! videoscale ! capsfilter per port, all into
+    one compositor ! sink)
+
+    Every preview is scaled down to the tile size right after it is
+    received, in I420 as sent by the server, so no colourspace conversion
+    is needed and the compositor only blends small frames. The sink is an
+    appsink or a fakesink, so the pipeline runs without a display. The
+    mosaic grows with the rows of tiles.
+
+    Ports can be added and removed while the pipeline is playing.
+
+    :param ports: The preview ports to show
+    :param host: The host of the gst-switch-srv
+    :param tile_width: The width of a tile
+    :param tile_height: The height of a tile
+    :param columns: The number of tiles in a row
+    :param sink: 'fakesink' or 'appsink' to pull the mosaic frames
+    """
+
+    def __init__(self, ports=(), host='127.0.0.1', tile_width=160,
+                 tile_height=120, columns=5, sink='fakesink'):
+        super(MosaicPipeline, self).__init__()
+        if sink not in ('fakesink', 'appsink'):
+            raise ValueError("sink must be 'fakesink' or 'appsink', not {0}"
+                             .format(sink))
+        self.host = host
+        self.tile_width = int(tile_width)
+        self.tile_height = int(tile_height)
+        self.columns = int(columns)
+        self._lock = threading.Lock()
+        self._tiles = {}
+
+        self.compositor = self.make('compositor', 'compositor')
+        # black instead of the checker pattern behind missing tiles
+        self.compositor.set_property('background', 1)
+        self.add(self.compositor)
+        self.sink = self.make(sink, 'sink')
+        self.sink.set_property('sync', False)
+        if sink == 'appsink':
+            self.sink.set_property('max-buffers', 1)
+            self.sink.set_property('drop', True)
+        self.add(self.sink)
+        self.compositor.link(self.sink)
+
+        for port in ports:
+            self.add_port(port)
+
+    @property
+    def ports(self):
+        """Get the ports shown"""
+        with self._lock:
+            return sorted(self._tiles)
+
+    def pull_sample(self, timeout=5):
+        """Wait for the next mosaic of the appsink
+        :param timeout: seconds to wait
+        :returns: The Gst.Sample or None when none arrived in time
+        """
+        return self.sink.emit('try-pull-sample',
+                              int(max(timeout, 0) * Gst.SECOND))
+
+    def tile_position(self, slot):
+        """Get the position of a tile in the mosaic
+        :param slot: The index of the tile, row by row
+        :returns: (x, y) of the upper left corner
+        """
+        return ((slot % self.columns) * self.tile_width,
+                (slot // self.columns) * self.tile_height)
+
+    def add_port(self, port):
+        """Show a preview port in the first free tile
+        :param port: The preview port
+        :returns: The slot of the tile
+        """
+        port = int(port)
+        with self._lock:
+            if port in self._tiles:
+                raise ValueError("Port {0} is already shown".format(port))
+            used = set(tile[0] for tile in self._tiles.values())
+            slot = next(index for index in range(len(used) + 1)
+                        if index not in used)
+            # reserve the slot until the tile is complete
+            self._tiles[port] = (slot, [], None)
+
+        prefix = 'port{0}_'.format(port)
+        src = self.make('tcpclientsrc', prefix + 'src')
+        src.set_property('host', self.host)
+        src.set_property('port', port)
+        scale = self.make('videoscale', prefix + 'scale')
+        sfilter = self.make('capsfilter', prefix + 'filter')
+        sfilter.set_property('caps', Gst.Caps.from_string(
+            'video/x-raw,width={0},height={1},pixel-aspect-ratio=1/1'
+            .format(self.tile_width, self.tile_height)))
+        elements = [src, self.make('gdpdepay', prefix + 'gdpdepay'),
+                    scale, sfilter]
+
+        for element in elements:
+            self.add(element)
+        for upstream, downstream in zip(elements, elements[1:]):
+            upstream.link(downstream)
+        pad = self.compositor.get_request_pad('sink_%u')
+        xpos, ypos = self.tile_position(slot)
+        pad.set_property('xpos', xpos)
+        pad.set_property('ypos', ypos)
+        sfilter.get_static_pad('src').link(pad)
+        # downstream first, so no element pushes into one not yet running
+        for element in reversed(elements):
+            element.sync_state_with_parent()
+
+        with self._lock:
+            self._tiles[port] = (slot, elements, pad)
+        return slot
+
+    def remove_port(self, port):
+        """Stop showing a preview port, its tile turns black
+        :param port: The preview port
+        :raises InvalidIndexError: The port is not shown
+        """
+        with self._lock:
+            try:
+                _, elements, pad = self._tiles.pop(int(port))
+            except KeyError:
+                raise InvalidIndexError(
+                    "Port {0} is not shown".format(port))
+        for element in elements:
+            element.set_state(Gst.State.NULL)
+            self.remove(element)
+        self.compositor.release_request_pad(pad)
+
+
 class VideoSrc(object):
 
     """A Test Video Source
@@ -328,6 +890,8 @@ class VideoSrc(object):
     None for random
     :param timeoverlay: True to enable a running time over video
     :param clockoverlay: True to enable current clock time over video
+    :param socket_path: The video input socket of the server to send to
+    instead of the port, None to use TCP
     """
     HOST = '127.0.0.1'
 
@@ -362,7 +926,8 @@ class VideoSrc(object):
             height=200,
             pattern=None,
             timeoverlay=False,
-            clockoverlay=False):
+            clockoverlay=False,
+            socket_path=None):
         super(VideoSrc, self).__init__()
         self._port = None
         self._width = None
@@ -384,7 +949,8 @@ class VideoSrc(object):
             self.height,
             self.pattern,
             self.timeoverlay,
-            self.clockoverlay)
+            self.clockoverlay,
+            socket_path)
 
     @property
     def port(self):
@@ -543,7 +1109,10 @@ class VideoSrc(object):
 
 class AudioSrc(object):
 
-    """docstring for AudioSrc"""
+    """docstring for AudioSrc
+    :param socket_path: The audio input socket of the server to send to
+    instead of the port, None to use TCP
+    """
 
     HOST = '127.0.0.1'
 
@@ -565,7 +1134,8 @@ class AudioSrc(object):
             self,
             port,
             freq=110,
-            wave=None):
+            wave=None,
+            socket_path=None):
         super(AudioSrc, self).__init__()
         self._port = None
         self._freq = None
@@ -578,7 +1148,8 @@ class AudioSrc(object):
             self.port,
             self.HOST,
             self.freq,
-            self.wave)
+            self.wave,
+            socket_path)
 
     @property
     def port(self):
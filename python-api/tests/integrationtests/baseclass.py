@@ -6,14 +6,11 @@ import sys
 import os
 import logging
 import tempfile
-import shlex
-import shutil
 try:
     import subprocess32 as subprocess
 except ImportError:
     import subprocess
 
-from glob import glob
 import numpy
 import scipy.misc
 import scipy.linalg
@@ -31,12 +28,21 @@ sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
 from gstswitch.server import Server
 from gstswitch.helpers import TestSources
 from gstswitch.controller import Controller
+from gstswitch.grabber import FrameGrabber, probe_ports
+from gstswitch.compare import FrameMatcher
+from gstswitch.reference import ReferenceStore
 from gi.repository import GLib
 from gstswitch.testsource import VideoSrc, AudioSrc
 
 # PATH = os.getenv("HOME") + '/gst/stage/bin/'
 PATH = '../tools/'
 
+# decoded once per session, and kept as .npy files between sessions
+REFERENCE_FRAMES = ReferenceStore(
+    os.path.join(os.path.dirname(__file__), 'reference_frames'),
+    cache_dir=os.path.join(tempfile.gettempdir(),
+                           'gst-switch-reference-frames'))
+
 
 class IntegrationTestbase(object):
     """Base class for integration tests."""
@@ -185,123 +191,76 @@ class IntegrationTestbaseCompare(IntegrationTestbase):
     and comparison. Used for Video- and Audio-Tests.
     """
 
-    def expect_frame(self, filename, port, turns=5, timeout=0.5):
-        """Start the command-line returned by get_capture_command() and
-        let it run for up to timeout seconds. Compare the generated frames
-        against the image in filename.
-
-        If none of the generated frames match the image in filename, try
-        up to turns time.
-
-        This way, the minimum time the comparison runs is timeout seconds,
-        while the maximum time it can take is turns * timeout seconds. This
-        is implemented to speed up the successful integration tests.
+    def expect_frame(self, filename, port, turns=5, timeout=0.5,
+                     **tolerances):
+        """Receive frames with the FrameGrabber returned by get_grabber()
+        for up to turns * timeout seconds. Compare the frames as they
+        arrive against the image in filename and stop at the first match,
+        so a successful test only takes as long as the server needs to
+        produce the expected frame.
+
+        The tolerances are passed to the FrameMatcher, ie region to only
+        compare the PIP rectangle or min_psnr to allow for noise. Without
+        them the frame has to match pixel-perfect.
         """
 
-        filepath = os.path.join(
-            os.path.dirname(__file__),
-            'reference_frames',
-            filename)
-
-        self.log.debug("loading reference image %s", filepath)
-        expected = scipy.misc.imread(filepath).astype(float)
-
-        for turn in range(0, turns):
-            folder = tempfile.mkdtemp()
-
-            # build frame-fetching gstreamer pipeline
-            command = self.get_capture_command(
-                port, os.path.join(folder, "frame%d.png"))
-
-            self.log.info("running command for 0.5s (turn %u of %u)",
-                          turn, turns)
-            self.log.debug("%s", command)
-            proc = subprocess.Popen(shlex.split(command))
-            try:
-                proc.wait(timeout=timeout)
-                assert proc.poll() == 0
-            except subprocess.TimeoutExpired:
-                proc.kill()
-                proc.wait()
-
-            self.log.debug("command finished, comparing generated frames")
-            (success, img, diff) = self.compare_frames(expected, folder)
-
-            self.log.debug("removing temp-folder")
-            shutil.rmtree(folder)
+        self.log.debug("loading reference image %s",
+                       REFERENCE_FRAMES.path(filename))
+        expected = REFERENCE_FRAMES.get(filename)
+        matcher = FrameMatcher(expected, **tolerances)
 
-            if success:
-                break
+        grabber = self.get_grabber(port)
+        self.log.info("grabbing frames for up to %.1fs", turns * timeout)
+        self.log.debug("%s", grabber.description())
+        with grabber:
+            (success, img) = self.compare_frames(
+                matcher, grabber.frames(turns * timeout))
 
-        if not success:
-            self.log.debug("last turn failed, "
+        if not success and img is not None:
+            self.log.debug("comparison failed, "
                            "saving images for human inspection")
-            self.save_images(filename, img, expected, diff)
+            self.save_images(filename, img, expected,
+                             matcher.difference(img))
 
         assert success
 
-    def compare_frames(self, expected, folder):
-        """compare frames generated by the pipeline-command
-        against an expected image"""
-        for frame in sorted(glob(os.path.join(folder, "*.png"))):
-            # load generared image
-            img = scipy.misc.imread(frame).astype(float)
-
-            # Calulcate image-difference
-            diff = abs(img - expected)
-
-            # Calculate comparison-score
-            #   # Manhattan norm
-            #   m_norm = sum(abs(diff))
-            #
-            #   # Zero norm
-            #   z_norm = scipy.linalg.norm(diff.ravel(), 0) / img.size
-
-            # Maximal deviation between individual subpixels
-            max_dev = max(diff.ravel())
-
-            self.log.debug("comparison-results on frame %s: max_dev=%f",
-                           frame, max_dev)
-
-            # max_dev is the maximal value two subpixels deviate in color.
-            # say the expected pixel is #808080 and the actual pixel is #808182
-            # then max_dev will be 2 = abs(0x80 - 0x82)
-            # max_dev <= 0 requires the images to match pixel-perfect.
-            if max_dev <= 0:
-                # Score is small enough to succeed
-                self.log.info("comparison succeeded on frame %s "
-                              "with max_dev=%f", frame, max_dev)
-
-                return (True, img, diff)
-
-        self.log.info("comparison failed")
-        return (False, img, diff)
+    def compare_frames(self, matcher, frames):
+        """compare frames received by the FrameGrabber against the
+        expected image of matcher until one matches"""
+        result, img = matcher.first_match(frames)
+        if result is None:
+            self.log.info("comparison failed, no frame received")
+            return (False, None)
+
+        # max_dev is the maximal value two subpixels deviate in color.
+        # say the expected pixel is #808080 and the actual pixel is #808182
+        # then max_dev will be 2 = abs(0x80 - 0x82)
+        if result.match:
+            self.log.info("comparison succeeded: %s", result)
+        else:
+            self.log.info("comparison failed on the last frame: %s", result)
+        return (result.match, img)
 
     def expect_caps(self, port, expected):
-        """Fetch a sample-frame from the server and return its
-        caps as string"""
-        self.log.debug("building caps-expecting commandline")
-
-        command = ("gst-launch-1.0 "
-                   "tcpclientsrc host=localhost port=%u ! "
-                   "gdpdepay ! "
-                   "%s ! "
-                   "fakesink num-buffers=1") % (port, expected)
-
-        self.log.info("running command for up to 5s")
-        self.log.debug("%s", command)
-        proc = subprocess.Popen(shlex.split(command))
-        try:
-            proc.wait(timeout=5)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            proc.wait()
-
-        returncode = proc.poll()
-        self.log.debug("command finished, returncode=%d", returncode)
-
-        assert returncode == 0, ("caps received from port %u don't meet "
-                                 "expectation: %s" % (port, expected))
+        """Fetch a sample-frame from the server and check that its
+        caps meet the expected caps"""
+        self.expect_caps_all([port], expected)
+
+    def expect_caps_all(self, ports, expected, timeout=5):
+        """Fetch a sample-frame from every port at once and check that
+        their caps meet the expected caps"""
+        self.log.info("probing caps of ports %s for up to %us",
+                      ports, timeout)
+        probed = probe_ports(ports, timeout=timeout)
+
+        for port in ports:
+            caps = probed[port]
+            self.log.debug("caps of port %u: %s", port, caps)
+            assert caps is not None, ("no caps received from port %u"
+                                      % port)
+            assert caps.matches(expected), (
+                "caps received from port %u don't meet expectation: %s, "
+                "received: %s" % (port, expected, caps.caps))
 
     def is_running_in_ci(self):
         """Test if the testsuite is ran by Travis-CI"""
@@ -372,29 +331,23 @@ class IntegrationTestbaseVideo(IntegrationTestbaseCompare):
     PORT_BLUE = 3005
     PORTS = (PORT_RED, PORT_GREEN, PORT_BLUE,)
 
-    def expect_video_frame(self, filename, port=3001, timeout=5):
+    def expect_video_frame(self, filename, port=3001, timeout=5,
+                           **tolerances):
         """Read frames from the server and compare them against filename.
         Return when a match is found or timeout seconds have passed
         Source-Port defaults to 3001=video compose-port"""
 
-        # run the capture_command for 1 seconds, up to timeout times
+        # grab frames for up to timeout seconds
         self.expect_frame(
             filename, port,
             turns=timeout,
-            timeout=1)
-
-    def get_capture_command(self, port, filename_pattern):
-        """Construct a Gstreamer-Pipeline which receives frames,
-        converts them to PNG-Files and writed them to Files.
-        A gst-alunch-command is returned"""
+            timeout=1,
+            **tolerances)
 
-        return """gst-launch-1.0
-                  tcpclientsrc host=localhost port=%u !
-                  gdpdepay !
-                  videoconvert !
-                  pngenc !
-                  multifilesink location=%s
-               """ % (port, filename_pattern)
+    def get_grabber(self, port):
+        """Construct a FrameGrabber which receives frames and converts
+        them to RGB like the reference images"""
+        return FrameGrabber(port, video_format='RGB')
 
     def setup_test(self):
         """Setup Server, Controller and two Video-Test-Sources"""
@@ -425,31 +378,27 @@ class IntegrationTestbaseAudio(IntegrationTestbaseCompare):
     # PORT_220 = 3004
     PORTS = (PORT_110,)
 
-    def expect_audio_spectrascope(self, filename, port=3003, timeout=5):
+    def expect_audio_spectrascope(self, filename, port=3003, timeout=5,
+                                  **tolerances):
         """Read frames from the server and compare them against filename.
         Return when a match is found or timeout seconds have passed
         Source-Port defaults to 3003=monitor port of 1st audio-source """
 
-        # run the capture_command for timeout seconds but only once
+        # grab frames for up to timeout seconds
         self.expect_frame(
             filename, port,
             turns=1,
-            timeout=timeout)
-
-    def get_capture_command(self, port, filename_pattern):
-        """Construct a Gstreamer-Pipeline which receives frames,
-        converts them to PNG-Files and writed them to Files.
-        A gst-alunch-command is returned"""
-
-        return """gst-launch-1.0
-                  tcpclientsrc num-buffers=75 host=localhost port=%u !
-                  gdpdepay !
-                  spectrascope shader=none !
-                  video/x-raw,width=400,height=200 !
-                  videoconvert !
-                  pngenc !
-                  multifilesink location=%s
-               """ % (port, filename_pattern)
+            timeout=timeout,
+            **tolerances)
+
+    def get_grabber(self, port):
+        """Construct a FrameGrabber which receives audio, draws its
+        spectrum and converts it to RGB like the reference images"""
+        return FrameGrabber(
+            port,
+            convert=("spectrascope shader=none ! "
+                     "video/x-raw,width=400,height=200"),
+            video_format='RGB')
 
     def setup_test(self):
         """Setup Server, Controller and two Video-Test-Sources"""
@@ -54,6 +54,5 @@ class TestPreviewPorts(IntegrationTestbaseAudio):
         caps = ('audio/x-raw, rate=(int)48000, channels=(int)2, '
                 'format=(string)S16LE, layout=(string)interleaved')
 
-        for port in self.PORTS:
-            self.log.info("testing caps of preview-port %u", port)
-            self.expect_caps(port, caps)
+        self.log.info("testing caps of preview-ports %s", self.PORTS)
+        self.expect_caps_all(self.PORTS, caps)
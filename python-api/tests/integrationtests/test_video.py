@@ -185,9 +185,8 @@ class TestPreviewPorts(IntegrationTestbaseVideo):
                 'width=(int)300, height=(int)200, '
                 'framerate=(fraction)25/1')
 
-        for port in self.PORTS:
-            self.log.info("testing caps of preview-port %u", port)
-            self.expect_caps(port, caps)
+        self.log.info("testing caps of preview-ports %s", self.PORTS)
+        self.expect_caps_all(self.PORTS, caps)
 
 
 # class TestClickVideo(object):
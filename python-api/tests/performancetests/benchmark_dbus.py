@@ -0,0 +1,257 @@
+"""
+Benchmark of the DBus control plane. Measures latency percentiles and
+throughput of every remote method of Connection, with one or several
+clients calling concurrently, and writes the results as JSON so runs can
+be compared.
+
+Run against a gst-switch-srv started from --path, against the in-process
+StubServer with --stub for client-only numbers, or against any server
+already listening on --address:
+
+    python benchmark_dbus.py --path ../tools/ --clients 1,4 -o before.json
+
+With --sample the CPU usage, RSS, threads and open file descriptors of the
+started gst-switch-srv are sampled during the run and added to the JSON.
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.server import Server
+from gstswitch.connection import Connection
+from gstswitch.stubserver import StubServer
+from gstswitch.exception import ConnectionError
+from gstswitch.stats import percentile
+import argparse
+import json
+import threading
+import time
+
+PATH = '../tools/'
+ADDRESS = 'tcp:host=127.0.0.1,port=5000'
+VIDEO_PORT = 3000
+
+# remote method -> function of the call number returning its arguments
+METHOD_ARGS = {
+    'get_compose_port': lambda i: (),
+    'get_encode_port': lambda i: (),
+    'get_audio_port': lambda i: (),
+    'get_preview_ports': lambda i: (),
+    'get_preview_port_list': lambda i: (),
+    'get_composite_mode': lambda i: (),
+    'set_composite_mode': lambda i: (i % 4,),
+    'set_encode_mode': lambda i: (0,),
+    'new_record': lambda i: (),
+    'adjust_pip': lambda i: (1 - 2 * (i % 2), 0, 0, 0),
+    'switch': lambda i: (ord('A'), VIDEO_PORT + 3 + i % 2),
+    'apply_scene': lambda i: (-1, -1, -1, 0, 0, -1, -1),
+    'click_video': lambda i: (10, 10, 1280, 720),
+    'mark_face': lambda i: ([(i % 100, 10, 20, 20)],),
+    'mark_tracking': lambda i: ([(i % 100, 10, 20, 20)],),
+}
+
+
+def summarize(method, clients, latencies, errors, wall):
+    """Build the result record of one method and client count"""
+    ordered = sorted(latencies)
+    total = len(ordered)
+
+    def millis(value):
+        """Seconds to milliseconds, keeping None"""
+        return None if value is None else round(value * 1000, 4)
+
+    return {
+        'method': method,
+        'clients': clients,
+        'calls': total,
+        'errors': errors,
+        'mean_ms': millis(sum(ordered) / len(ordered) if ordered else None),
+        'p50_ms': millis(percentile(ordered, 50)),
+        'p95_ms': millis(percentile(ordered, 95)),
+        'p99_ms': millis(percentile(ordered, 99)),
+        'max_ms': millis(ordered[-1] if ordered else None),
+        'throughput': round(total / wall, 2) if wall > 0 else None,
+    }
+
+
+def bench_method(address, method, calls, clients):
+    """Let clients connections call method calls times each at the same
+    time and summarize the latencies
+    """
+    connections = []
+    for _ in range(clients):
+        conn = Connection(address=address)
+        conn.connect_dbus()
+        connections.append(conn)
+
+    make_args = METHOD_ARGS[method]
+    start = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+    errors = [0]
+
+    def client(conn):
+        """Call the method and collect the latencies of one client"""
+        remote = getattr(conn, method)
+        own = []
+        failed = 0
+        start.wait()
+        for i in range(calls):
+            args = make_args(i)
+            begin = time.time()
+            try:
+                remote(*args)
+            except ConnectionError:
+                # the round trip was made all the same
+                failed += 1
+            own.append(time.time() - begin)
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(conn,))
+               for conn in connections]
+    for thread in threads:
+        thread.start()
+    begin = time.time()
+    start.set()
+    for thread in threads:
+        thread.join()
+    wall = time.time() - begin
+
+    for conn in connections:
+        conn.disconnect_dbus()
+    return summarize(method, clients, latencies, errors[0], wall)
+
+
+def run_benchmark(address, methods, calls, client_counts):
+    """Benchmark every method with every number of clients
+
+    :returns: dict ready to be dumped as JSON
+    """
+    results = []
+    for clients in client_counts:
+        for method in methods:
+            results.append(bench_method(address, method, calls, clients))
+    return {
+        'address': address,
+        'calls_per_client': calls,
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def print_results(report):
+    """Print the results as a table"""
+    print("{0:<22} {1:>7} {2:>7} {3:>9} {4:>9} {5:>9} {6:>10}".format(
+        'method', 'clients', 'errors', 'p50 ms', 'p95 ms', 'p99 ms',
+        'calls/s'))
+    for res in report['results']:
+        print("{method:<22} {clients:>7} {errors:>7} {p50_ms:>9} "
+              "{p95_ms:>9} {p99_ms:>9} {throughput:>10}".format(**res))
+
+
+def start_server(path):
+    """Start a gst-switch-srv from path and wait until it answers"""
+    serv = Server(path=path, video_port=VIDEO_PORT)
+    ready = serv.run(wait_ready=True)
+    print("server ready after {0:.3f}s".format(ready))
+    serv.wait_for_output(':::{0}'.format(VIDEO_PORT))
+    return serv
+
+
+def stop_server(serv):
+    """Terminate the gst-switch-srv reporting how it ended"""
+    if serv.proc:
+        poll = serv.proc.poll()
+        if poll == -11:
+            print("SEGMENTATION FAULT OCCURRED")
+        print("ERROR CODE - {0}".format(poll))
+        serv.terminate(1)
+
+
+def main(argv=None):
+    """Parse the arguments and run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--path', help='start gst-switch-srv from PATH, '
+                        'otherwise connect to a running server')
+    parser.add_argument('--stub', action='store_true',
+                        help='run against the in-process StubServer')
+    parser.add_argument('--address', default=ADDRESS,
+                        help='dbus address of the server (%(default)s)')
+    parser.add_argument('--calls', type=int, default=200,
+                        help='calls per client and method (%(default)s)')
+    parser.add_argument('--clients', default='1,4',
+                        help='comma separated client counts (%(default)s)')
+    parser.add_argument('--methods', default=','.join(sorted(METHOD_ARGS)),
+                        help='comma separated methods (all)')
+    parser.add_argument('--sample', type=float, metavar='INTERVAL',
+                        help='sample the resources of the server started '
+                        'from --path every INTERVAL seconds')
+    parser.add_argument('-o', '--output', help='write JSON to OUTPUT')
+    args = parser.parse_args(argv)
+
+    methods = args.methods.split(',')
+    unknown = set(methods) - set(METHOD_ARGS)
+    if unknown:
+        parser.error('unknown methods: {0}'.format(', '.join(unknown)))
+    client_counts = [int(count) for count in args.clients.split(',')]
+
+    if args.stub:
+        with StubServer(video_port=VIDEO_PORT) as stub:
+            stub.add_preview_port()
+            stub.add_preview_port()
+            report = run_benchmark(stub.client_address, methods, args.calls,
+                                   client_counts)
+    else:
+        serv = start_server(args.path) if args.path else None
+        sampler = None
+        if serv and args.sample:
+            sampler = serv.sample_resources(args.sample)
+        try:
+            report = run_benchmark(args.address, methods, args.calls,
+                                   client_counts)
+        finally:
+            if sampler:
+                sampler.stop()
+            if serv:
+                stop_server(serv)
+        if sampler:
+            report['resources'] = {'summary': sampler.summary(),
+                                   'samples': sampler.to_dicts()}
+            print("server resources: {0}".format(sampler.summary()))
+
+    print_results(report)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+    return report
+
+
+class TestBenchmark(object):
+    """Run a short benchmark against a local gst-switch-srv"""
+
+    def test_all_methods(self):
+        """Benchmark every method with one and four clients"""
+        serv = start_server(PATH)
+        try:
+            report = run_benchmark(ADDRESS, sorted(METHOD_ARGS), 50, [1, 4])
+        finally:
+            stop_server(serv)
+        print_results(report)
+        assert len(report['results']) == 2 * len(METHOD_ARGS)
+        for res in report['results']:
+            assert res['p50_ms'] <= res['p95_ms'] <= res['p99_ms']
+
+    def test_stub(self):
+        """Benchmark every method against the StubServer"""
+        report = main(['--stub', '--calls', '200', '--clients', '1,4'])
+        for res in report['results']:
+            assert res['p50_ms'] <= res['p95_ms'] <= res['p99_ms']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Performance test comparing the per-call latency of a Controller which
+opens a fresh DBus connection for every call with one that reuses a
+persistent connection
+"""
+
+from __future__ import absolute_import, print_function, unicode_literals
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.server import Server
+from gstswitch.helpers import TestSources
+from gstswitch.controller import Controller
+import time
+
+PATH = '../tools/'
+
+
+def measure_switch_latency(num, reconnect):
+    """Switch channel A back and forth num times and return the latency
+    of every call in seconds.
+    :param reconnect: True to force a new connection before every call,
+    like the Controller did before connections were reused
+    """
+    video_port = 3000
+    serv = Server(path=PATH, video_port=video_port)
+    try:
+        serv.run()
+        serv.wait_for_output('tcp:host=::,port=5000')
+        serv.wait_for_output(':::{0}'.format(video_port))
+        sources = TestSources(video_port=video_port)
+        sources.new_test_video(pattern=4)
+        sources.new_test_video(pattern=5)
+        serv.wait_for_output('tcpserversink name=sink', count=2)
+
+        controller = Controller()
+        controller.establish_connection()
+        ports = [video_port + 3, video_port + 4]
+
+        latencies = []
+        for i in range(num):
+            start = time.time()
+            if reconnect:
+                controller.establish_connection(force=True)
+            controller.switch(Controller.VIDEO_CHANNEL_A, ports[i % 2])
+            latencies.append(time.time() - start)
+
+        controller.close_connection()
+        sources.terminate_video()
+        return latencies
+    finally:
+        if serv.proc:
+            poll = serv.proc.poll()
+            if poll == -11:
+                print("SEGMENTATION FAULT OCCURRED")
+            print("ERROR CODE - {0}".format(poll))
+            serv.terminate(1)
+
+
+def print_latencies(name, latencies):
+    """Print mean and median of the measured latencies in milliseconds"""
+    ordered = sorted(latencies)
+    mean = sum(ordered) / len(ordered)
+    median = ordered[len(ordered) // 2]
+    print("{0}: {1} calls, mean {2:.3f}ms, median {3:.3f}ms".format(
+        name, len(ordered), mean * 1000, median * 1000))
+    return median
+
+
+class TestConnectionReuse(object):
+    """Per-call latency with and without connection reuse"""
+
+    def test_100(self):
+        """Compare 100 switch calls"""
+        num = 100
+        before = print_latencies(
+            'new connection per call', measure_switch_latency(num, True))
+        after = print_latencies(
+            'persistent connection', measure_switch_latency(num, False))
+        assert after <= before
@@ -22,7 +22,7 @@ def get_compose_port(num):
         video_port = 8000
         serv = Server(path=PATH, video_port=video_port)
         try:
-            serv.run()
+            serv.run(wait_ready=True)
             sources = TestSources(video_port=video_port)
             sources.new_test_video()
 
@@ -83,7 +83,7 @@ def get_encode_port(num):
         video_port = 3000
         serv = Server(path=PATH, video_port=video_port)
         try:
-            serv.run()
+            serv.run(wait_ready=True)
             sources = TestSources(video_port=video_port)
             sources.new_test_video()
 
@@ -142,7 +142,7 @@ def get_audio_port(num):
         audio_port = 8000
         serv = Server(path=PATH, audio_port=audio_port)
         try:
-            serv.run()
+            serv.run(wait_ready=True)
             sources = TestSources(audio_port=audio_port)
             sources.new_test_audio()
 
@@ -204,7 +204,7 @@ def get_preview_ports(num):
     video_port = 3000
     serv = Server(path=PATH, video_port=video_port)
     try:
-        serv.run()
+        serv.run(wait_ready=True)
         sources = TestSources(video_port=video_port)
 
 
@@ -266,7 +266,7 @@ def permutate_composite_mode(num, delay):
     video_port = 3000
     serv = Server(path=PATH, video_port=video_port)
     try:
-        serv.run()
+        serv.run(wait_ready=True)
         sources = TestSources(video_port=video_port)
         sources.new_test_video(pattern=6)
         sources.new_test_video(pattern=5)
@@ -328,7 +328,7 @@ def permutate_adjust_pip(num, delay):
     video_port = 3000
     serv = Server(path=PATH, video_port=video_port)
     try:
-        serv.run()
+        serv.run(wait_ready=True)
         sources = TestSources(video_port=video_port)
         sources.new_test_video(pattern=6)
         sources.new_test_video(pattern=5)
@@ -0,0 +1,133 @@
+"""Unittests for MarkerCoalescer class in coalescer.py"""
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch import coalescer as coalescer_module
+from gstswitch.coalescer import MarkerCoalescer
+from gstswitch.exception import ConnectionError
+import pytest
+from mock import Mock
+
+
+def make_controller():
+    """Create a Controller, the Connection of the sender is mocked by
+    setup_method
+    """
+    controller = Mock()
+    controller.address = 'unix:abstract=gstswitch'
+    return controller
+
+
+class TestMarkerCoalescer(object):
+
+    """Test the MarkerCoalescer"""
+
+    def setup_method(self, method):
+        """Mock the Connection the sender creates"""
+        self.connection = Mock()
+        self.connection.is_connected.return_value = True
+        self.make_connection = Mock(return_value=self.connection)
+        self.connection_class = coalescer_module.Connection
+        coalescer_module.Connection = self.make_connection
+
+    def teardown_method(self, method):
+        """Restore the Connection"""
+        coalescer_module.Connection = self.connection_class
+
+    def test_negative_interval(self):
+        """Test that a negative interval is rejected"""
+        with pytest.raises(ValueError):
+            MarkerCoalescer(make_controller(), interval=-1)
+
+    def test_latest_is_sent(self):
+        """Test that only the latest marker set of an interval is sent"""
+        controller = make_controller()
+        # a long interval keeps everything after the first set pending
+        coalescer = MarkerCoalescer(controller, interval=60)
+        sent = threading.Event()
+        self.connection.call_oneway.side_effect = \
+            lambda *args: sent.set()
+
+        coalescer.mark_face([(1, 1, 1, 1)])
+        assert sent.wait(5)
+        coalescer.mark_face([(2, 2, 2, 2)])
+        coalescer.mark_face([(3, 3, 3, 3)])
+        coalescer.mark_tracking([(4, 4, 4, 4)])
+        coalescer.close(5)
+
+        calls = [args for args, _ in
+                 self.connection.call_oneway.call_args_list]
+        assert calls[0] == ('mark_face', [(1, 1, 1, 1)])
+        assert sorted(calls[1:]) == [('mark_face', [(3, 3, 3, 3)]),
+                                     ('mark_tracking', [(4, 4, 4, 4)])]
+
+        stats = coalescer.stats()
+        assert stats['mark_face'] == {'submitted': 3, 'sent': 2,
+                                      'dropped': 1, 'failed': 0}
+        assert stats['mark_tracking'] == {'submitted': 1, 'sent': 1,
+                                          'dropped': 0, 'failed': 0}
+
+    def test_failed(self):
+        """Test that failing sends are counted"""
+        controller = make_controller()
+        self.connection.call_oneway.side_effect = ConnectionError()
+        coalescer = MarkerCoalescer(controller, interval=60)
+        coalescer.mark_tracking([])
+        coalescer.close(5)
+        assert coalescer.failed['mark_tracking'] == 1
+        assert coalescer.sent['mark_tracking'] == 0
+
+    def test_closed(self):
+        """Test that nothing can be submitted after close"""
+        coalescer = MarkerCoalescer(make_controller())
+        coalescer.close(5)
+        with pytest.raises(RuntimeError):
+            coalescer.mark_tracking([])
+
+    def test_context_manager(self):
+        """Test that leaving the with block sends pending sets"""
+        controller = make_controller()
+        with MarkerCoalescer(controller, interval=60) as coalescer:
+            coalescer.mark_tracking([(1, 2, 3, 4)])
+        self.connection.call_oneway.assert_called_with(
+            'mark_tracking', [(1, 2, 3, 4)])
+        assert coalescer.sent['mark_tracking'] == 1
+
+    def test_unexpected_error(self):
+        """Test that any error is counted and the thread keeps sending"""
+        failed = threading.Event()
+        sent = threading.Event()
+
+        def call_oneway(method, faces):
+            """Fail like building an invalid Variant, then succeed"""
+            if not failed.is_set():
+                failed.set()
+                raise TypeError()
+            sent.set()
+
+        self.connection.call_oneway.side_effect = call_oneway
+        coalescer = MarkerCoalescer(make_controller(), interval=0)
+        coalescer.mark_tracking([(1, 1, 1, 1)])
+        assert failed.wait(5)
+        coalescer.mark_tracking([(2, 2, 2, 2)])
+        assert sent.wait(5)
+        coalescer.close(5)
+        assert coalescer.failed['mark_tracking'] == 1
+        assert coalescer.sent['mark_tracking'] == 1
+
+    def test_own_connection(self):
+        """Test that the sender connects once and disconnects on close"""
+        controller = make_controller()
+        coalescer = MarkerCoalescer(controller, interval=60)
+        coalescer.mark_face([])
+        coalescer.flush()
+        coalescer.mark_face([])
+        coalescer.close(5)
+        self.make_connection.assert_called_once_with(
+            address=controller.address, bus_name=controller.bus_name,
+            object_path=controller.object_path,
+            default_interface=controller.default_interface)
+        assert self.connection.disconnect_dbus.called
+        assert not controller.establish_connection.called
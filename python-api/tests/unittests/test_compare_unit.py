@@ -0,0 +1,147 @@
+"""Unittests for the frame comparison in compare.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.compare import FrameMatcher, abs_diff, max_deviation
+from gstswitch.compare import psnr, ssim
+import pytest
+import numpy
+from mock import Mock
+
+
+def make_image(value=128, shape=(20, 30, 3)):
+    """Create a flat uint8 image"""
+    return numpy.full(shape, value, dtype=numpy.uint8)
+
+
+class TestMetrics(object):
+
+    """Test the metrics of two images"""
+
+    def test_abs_diff(self):
+        """Test that the difference does not overflow"""
+        image = numpy.array([0, 10, 255], dtype=numpy.uint8)
+        expected = numpy.array([255, 12, 0], dtype=numpy.uint8)
+        assert abs_diff(image, expected).tolist() == [255, 2, 255]
+        assert max_deviation(image, expected) == 255
+
+    def test_equal(self):
+        """Test the metrics of equal images"""
+        image = make_image()
+        assert max_deviation(image, image) == 0
+        assert psnr(image, image) == float('inf')
+        assert ssim(image, image) == pytest.approx(1.0)
+
+    def test_psnr(self):
+        """Test the PSNR of an image off by one everywhere"""
+        assert psnr(make_image(129), make_image(128)) == \
+            pytest.approx(48.13, abs=0.01)
+
+    def test_ssim(self):
+        """Test that noise lowers the SSIM"""
+        rng = numpy.random.RandomState(1)
+        expected = rng.randint(0, 256, (20, 30)).astype(numpy.uint8)
+        noise = rng.randint(0, 256, (20, 30)).astype(numpy.uint8)
+        assert ssim(noise, expected) < 0.2
+        assert ssim(expected, expected) == pytest.approx(1.0)
+
+
+class TestFrameMatcher(object):
+
+    """Test comparing frames against an expected image"""
+
+    def test_not_uint8(self):
+        """Test that float images are rejected"""
+        with pytest.raises(ValueError):
+            FrameMatcher(make_image().astype(float))
+
+    def test_shape(self):
+        """Test that images of another size are rejected"""
+        matcher = FrameMatcher(make_image())
+        with pytest.raises(ValueError):
+            matcher.compare(make_image(shape=(20, 30, 4)))
+
+    def test_pixel_perfect(self):
+        """Test that by default any deviation fails"""
+        matcher = FrameMatcher(make_image())
+        assert matcher.compare(make_image()).match
+        result = matcher.compare(make_image(129))
+        assert not result.match
+        assert result.max_dev == 1
+        assert result.psnr is None and result.ssim is None
+
+    def test_tolerances(self):
+        """Test that the PSNR is only computed when required"""
+        matcher = FrameMatcher(make_image(), max_dev=None, min_psnr=40)
+        result = matcher.compare(make_image(129))
+        assert result.match
+        assert result.psnr == pytest.approx(48.13, abs=0.01)
+        matcher = FrameMatcher(make_image(), max_dev=0, min_psnr=40)
+        assert matcher.compare(make_image(129)).psnr is None
+
+    def test_region_rectangle(self):
+        """Test that only the rectangle is compared"""
+        image = make_image()
+        image[0:5, 0:5] = 0
+        matcher = FrameMatcher(make_image(), region=(10, 5, 15, 10))
+        assert matcher.compare(image).match
+        matcher = FrameMatcher(make_image(), region=(4, 4, 15, 10))
+        assert not matcher.compare(image).match
+
+    def test_region_mask(self):
+        """Test that only the masked pixels are compared"""
+        image = make_image()
+        image[0, 0] = 0
+        mask = numpy.ones((20, 30), dtype=bool)
+        mask[0, 0] = False
+        assert FrameMatcher(make_image(), region=mask).compare(image).match
+
+    def test_difference(self):
+        """Test the difference image for inspection"""
+        matcher = FrameMatcher(make_image())
+        diff = matcher.difference(make_image(120))
+        assert diff.dtype == numpy.uint8
+        assert diff.max() == 8
+
+
+class TestFirstMatch(object):
+
+    """Test comparing frames as they arrive"""
+
+    def test_stops_at_match(self):
+        """Test that frames after the match are not pulled"""
+        matcher = FrameMatcher(make_image())
+        pulled = []
+
+        def frames():
+            """Yield two wrong frames, the expected one and another"""
+            for value in (0, 64, 128, 255):
+                pulled.append(value)
+                yield make_image(value)
+
+        result, image = matcher.first_match(frames())
+        assert result.match
+        assert pulled == [0, 64, 128]
+        assert image.max() == 128
+
+    def test_no_match(self):
+        """Test that the last frame is returned without a match"""
+        matcher = FrameMatcher(make_image())
+        result, image = matcher.first_match([make_image(0), make_image(1)])
+        assert not result.match
+        assert result.max_dev == 127
+        assert image.max() == 1
+
+    def test_no_frames(self):
+        """Test the result without frames"""
+        assert FrameMatcher(make_image()).first_match([]) == (None, None)
+
+    def test_grabber_frames(self):
+        """Test that the last image is kept after the frame is gone"""
+        frame = Mock()
+        frame.array = make_image(1)
+        matcher = FrameMatcher(make_image())
+        _, image = matcher.first_match([frame])
+        frame.array[:] = 0
+        assert image.max() == 1
@@ -209,6 +209,156 @@ class TestSignalSubscribe(object):
             conn.signal_subscribe(test_cb)
 
 
+class TestIsConnected(object):
+
+    """Unittests for is_connected"""
+
+    def test_not_connected(self):
+        """Test if there is no connection yet"""
+        conn = Connection()
+        assert conn.is_connected() is False
+
+    def test_open(self):
+        """Test if the connection is open"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.connection.is_closed = Mock(return_value=False)
+        assert conn.is_connected() is True
+
+    def test_closed(self):
+        """Test if the connection got closed"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.connection.is_closed = Mock(return_value=True)
+        assert conn.is_connected() is False
+
+
+class TestDisconnectDBus(object):
+
+    """Unittests for disconnect_dbus"""
+
+    def test_not_connected(self):
+        """Test that nothing happens without a connection"""
+        conn = Connection()
+        conn.disconnect_dbus()
+        assert conn.connection is None
+
+    def test_close(self):
+        """Test that the subscription is dropped and the connection closed"""
+        conn = Connection()
+        gio_connection = Mock()
+        gio_connection.signal_subscribe = Mock(return_value=7)
+        gio_connection.is_closed = Mock(return_value=False)
+        conn.connection = gio_connection
+        conn.signal_subscribe(Mock())
+        conn.disconnect_dbus()
+        gio_connection.signal_unsubscribe.assert_called_once_with(7)
+        gio_connection.close_sync.assert_called_once_with(None)
+        assert conn.connection is None
+
+    def test_gio_error_is_ignored(self):
+        """Test that errors while closing are swallowed"""
+        conn = Connection()
+        gio_connection = Mock()
+        gio_connection.is_closed = Mock(return_value=False)
+        gio_connection.close_sync = Mock(side_effect=GLib.GError('Boom!'))
+        conn.connection = gio_connection
+        conn.disconnect_dbus()
+        assert conn.connection is None
+
+
+class TestCallAsync(object):
+
+    """Unittests for call_async"""
+
+    def test_unknown_method(self):
+        """Test if the method is not known"""
+        conn = Connection()
+        conn.connection = Mock()
+        with pytest.raises(ValueError):
+            conn.call_async('foobar')
+
+    def test_arguments_are_packed(self):
+        """Test if the arguments are passed to Gio as GVariant"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.call_async('switch', 65, 3003, timeout=1000)
+
+        # pylint: disable=unpacking-non-sequence
+        args, _ = conn.connection.call.call_args
+        assert args[3] == 'switch'
+        assert args[4].unpack() == (65, 3003)
+        assert args[5].dup_string() == '(b)'
+        assert args[7] == 1000
+
+    def test_reply(self):
+        """Test if the future resolves to the reply"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.connection.call_finish = Mock(
+            return_value=GLib.Variant('(b)', (True,)))
+        future = conn.call_async('switch', 65, 3003)
+
+        args, _ = conn.connection.call.call_args
+        args[9](conn.connection, None, None)
+        assert future.result().unpack() == (True,)
+
+    def test_reply_error(self):
+        """Test if a GError in the reply is converted"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.connection.call_finish = Mock(side_effect=GLib.GError('Boom!'))
+        future = conn.call_async('get_compose_port')
+
+        args, _ = conn.connection.call.call_args
+        args[9](conn.connection, None, None)
+        with pytest.raises(ConnectionError):
+            future.result()
+
+    def test_send_error(self):
+        """Test if a GError while sending is converted"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.connection.call = Mock(side_effect=GLib.GError('Boom!'))
+        with pytest.raises(ConnectionError):
+            conn.call_async('get_compose_port')
+
+
+class TestCallOneway(object):
+
+    """Unittests for call_oneway"""
+
+    def test_unknown_method(self):
+        """Test if the method is not known"""
+        conn = Connection()
+        conn.connection = Mock()
+        with pytest.raises(ValueError):
+            conn.call_oneway('foobar')
+
+    def test_no_reply_requested(self):
+        """Test if the call neither waits for nor expects a reply"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.call_oneway('mark_face', [(1, 2, 3, 4)])
+
+        # pylint: disable=unpacking-non-sequence
+        args, _ = conn.connection.call.call_args
+        assert args[3] == 'mark_face'
+        assert args[4].unpack() == ([(1, 2, 3, 4)],)
+        assert args[5] is None
+        assert args[6] == Gio.DBusCallFlags.NO_AUTO_START
+        assert args[9] is None
+        assert not conn.connection.call_sync.called
+
+    def test_send_error(self):
+        """Test if a GError while sending is converted"""
+        conn = Connection()
+        conn.connection = Mock()
+        conn.connection.call = Mock(side_effect=GLib.GError('Boom!'))
+        with pytest.raises(ConnectionError):
+            conn.call_oneway('mark_tracking', [])
+
+
 class MockConnection(object):
 
     """A class which mocks the Connection class"""
@@ -218,12 +368,14 @@ class MockConnection(object):
         'get_encode_port': (3002,),
         'get_audio_port': (4000,),
         'get_preview_ports': ('[(3002, 1, 7), (3003, 1, 8)]',),
+        'get_preview_port_list': ([(3002, 1, 7), (3003, 1, 8)],),
         'set_composite_mode': (False,),
         'get_composite_mode': (0,),
         'set_encode_mode': (False,),
         'new_record': (False,),
         'adjust_pip': (1,),
         'switch': (True,),
+        'apply_scene': (True,),
         'click_video': (True,),
         'mark_face': None,
         'mark_tracking': None
@@ -308,6 +460,20 @@ def test_get_preview_ports():
     assert conn.get_preview_ports() == ('[(3002, 1, 7), (3003, 1, 8)]',)
 
 
+def test_get_preview_port_list():
+    """Test the get_preview_port_list method"""
+    default_interface = "us.timvideos.gstswitch"
+    conn = Connection(default_interface=default_interface)
+    conn.connection = MockConnection('get_preview_port_list')
+    with pytest.raises(ConnectionError):
+        conn.get_preview_port_list()
+
+    default_interface = "us.timvideos.gstswitch.SwitchControllerInterface"
+    conn = Connection(default_interface=default_interface)
+    conn.connection = MockConnection('get_preview_port_list')
+    assert conn.get_preview_port_list() == ([(3002, 1, 7), (3003, 1, 8)],)
+
+
 def test_set_composite_mode():
     """Test the set_composite_mode method"""
     default_interface = "us.timvideos.gstswitch"
@@ -392,6 +558,20 @@ def test_switch():
     assert conn.switch(1, 2) == (True,)
 
 
+def test_apply_scene():
+    """Test the apply_scene method"""
+    default_interface = "us.timvideos.gstswitch"
+    conn = Connection(default_interface=default_interface)
+    conn.connection = MockConnection('apply_scene')
+    with pytest.raises(ConnectionError):
+        conn.apply_scene(1, 3003, 3004, 0, 0, -1, -1)
+
+    default_interface = "us.timvideos.gstswitch.SwitchControllerInterface"
+    conn = Connection(default_interface=default_interface)
+    conn.connection = MockConnection('apply_scene')
+    assert conn.apply_scene(1, 3003, 3004, 0, 0, -1, -1) == (True,)
+
+
 def test_click_video():
     """Test the click_video method"""
     default_interface = "us.timvideos.gstswitch"
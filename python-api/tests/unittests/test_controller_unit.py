@@ -1,13 +1,15 @@
 """Unittests for Controller class in controller.py"""
 import sys
 import os
+import threading
 sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
 
 from gstswitch.controller import Controller
-from gstswitch.exception import ConnectionReturnError
+from gstswitch.exception import ConnectionReturnError, ConnectionError
 import pytest
 from mock import Mock
 from gstswitch.connection import Connection
+from gstswitch.future import DBusFuture
 from gi.repository import GLib
 
 
@@ -115,6 +117,89 @@ class TestEstablishConnection(object):
         controller.establish_connection()
         assert controller.connection is not None
 
+    def test_connection_is_reused(self, monkeypatch):
+        """Test that an open connection is reused instead of opening
+        a new one for every call"""
+        connect_dbus = Mock()
+        monkeypatch.setattr(Connection, 'connect_dbus', connect_dbus)
+        monkeypatch.setattr(Connection, 'signal_subscribe', Mock())
+        monkeypatch.setattr(Connection, 'is_connected',
+                            Mock(return_value=True))
+        controller = Controller(address='unix:abstract=abcd')
+        controller.establish_connection()
+        connection = controller.connection
+        controller.establish_connection()
+        controller.establish_connection()
+        assert controller.connection is connection
+        assert connect_dbus.call_count == 1
+
+    def test_reconnect_when_closed(self, monkeypatch):
+        """Test that a closed connection is replaced by a new one"""
+        connect_dbus = Mock()
+        monkeypatch.setattr(Connection, 'connect_dbus', connect_dbus)
+        monkeypatch.setattr(Connection, 'signal_subscribe', Mock())
+        monkeypatch.setattr(Connection, 'is_connected',
+                            Mock(return_value=False))
+        disconnect_dbus = Mock()
+        monkeypatch.setattr(Connection, 'disconnect_dbus', disconnect_dbus)
+        controller = Controller(address='unix:abstract=abcd')
+        controller.establish_connection()
+        connection = controller.connection
+        controller.establish_connection()
+        assert controller.connection is not connection
+        assert connect_dbus.call_count == 2
+        disconnect_dbus.assert_called_once_with()
+
+    def test_force(self, monkeypatch):
+        """Test that force always opens a new connection"""
+        connect_dbus = Mock()
+        monkeypatch.setattr(Connection, 'connect_dbus', connect_dbus)
+        monkeypatch.setattr(Connection, 'signal_subscribe', Mock())
+        monkeypatch.setattr(Connection, 'is_connected',
+                            Mock(return_value=True))
+        monkeypatch.setattr(Connection, 'disconnect_dbus', Mock())
+        controller = Controller(address='unix:abstract=abcd')
+        controller.establish_connection()
+        controller.establish_connection(force=True)
+        assert connect_dbus.call_count == 2
+
+
+class TestCallRemote(object):
+
+    """Test the reconnect behaviour of remote calls"""
+
+    def test_retry_on_lost_connection(self):
+        """Test that a call failing on a lost connection is retried once
+        on a new connection"""
+        controller = Controller(address='unix:abstract=abcd')
+        lost = Mock()
+        lost.switch = Mock(side_effect=ConnectionError('lost'))
+        lost.is_connected = Mock(return_value=False)
+        fresh = Mock()
+        fresh.switch = Mock(return_value=GLib.Variant('(b)', (True,)))
+
+        def reconnect(force=False):
+            """replace the connection when forced"""
+            if force:
+                controller.connection = fresh
+
+        controller.connection = lost
+        controller.establish_connection = Mock(side_effect=reconnect)
+        assert controller.switch(Controller.VIDEO_CHANNEL_A, 3003) is True
+        fresh.switch.assert_called_once_with(Controller.VIDEO_CHANNEL_A, 3003)
+
+    def test_no_retry_on_open_connection(self):
+        """Test that errors on a healthy connection are not retried"""
+        controller = Controller(address='unix:abstract=abcd')
+        connection = Mock()
+        connection.switch = Mock(side_effect=ConnectionError('failed'))
+        connection.is_connected = Mock(return_value=True)
+        controller.connection = connection
+        controller.establish_connection = Mock()
+        with pytest.raises(ConnectionError):
+            controller.switch(Controller.VIDEO_CHANNEL_A, 3003)
+        assert connection.switch.call_count == 1
+
 
 class TestSignalHandler(object):
 
@@ -202,6 +287,110 @@ class TestSignalHandler(object):
             assert test_cbs[signal].call_count == 3
 
 
+def emit_signal(controller, signal, *args):
+    """Deliver a Signal with int arguments to the Controller"""
+    controller.cb_signal_handler(
+        None,
+        ':0',
+        '/us/timvideos/gstswitch/SwitchControllerInterface',
+        'us.timvideos.gstswitch.SwitchControllerInterface',
+        signal,
+        GLib.Variant('(' + 'i' * len(args) + ')', args),
+        None)
+
+
+class TestSubscribe(object):
+
+    """Test subscribing to and unsubscribing from Signals"""
+
+    def test_unknown_signal(self):
+        """Test that an unknown signal name is rejected"""
+        controller = Controller(address='unix:abstract=abcd')
+        with pytest.raises(ValueError):
+            controller.subscribe('foobar', Mock())
+        with pytest.raises(ValueError):
+            controller.unsubscribe('foobar', Mock())
+
+    def test_invalid_accept(self):
+        """Test that a not-callable filter is rejected"""
+        controller = Controller(address='unix:abstract=abcd')
+        with pytest.raises(ValueError):
+            controller.subscribe('new_mode_online', Mock(), accept=123)
+
+    def test_unsubscribe(self):
+        """Test that an unsubscribed Callback is not called anymore"""
+        controller = Controller(address='unix:abstract=abcd')
+        test_cb = Mock()
+        filtered_cb = Mock()
+        controller.on_new_mode_online(test_cb)
+        controller.on_new_mode_online(filtered_cb, accept=lambda mode: True)
+
+        assert controller.unsubscribe('new_mode_online', test_cb)
+        assert controller.unsubscribe('new_mode_online', filtered_cb)
+        assert not controller.unsubscribe('new_mode_online', test_cb)
+
+        emit_signal(controller, 'new_mode_online', 1)
+        assert not test_cb.called
+        assert not filtered_cb.called
+
+    def test_unsubscribe_while_dispatching(self):
+        """Test that a Callback can unsubscribe itself"""
+        controller = Controller(address='unix:abstract=abcd')
+        other_cb = Mock()
+
+        def once(mode):
+            """Unsubscribe on the first Signal"""
+            controller.unsubscribe('new_mode_online', once)
+
+        controller.on_new_mode_online(once)
+        controller.on_new_mode_online(other_cb)
+        emit_signal(controller, 'new_mode_online', 1)
+        emit_signal(controller, 'new_mode_online', 2)
+        assert other_cb.call_count == 2
+        assert controller.callbacks_new_mode_online == [other_cb]
+
+    def test_accept(self):
+        """Test that only accepted Signals are delivered"""
+        controller = Controller(address='unix:abstract=abcd')
+        test_cb = Mock()
+        controller.on_preview_port_added(
+            test_cb, accept=lambda port, serve, type_: port == 3004)
+
+        emit_signal(controller, 'preview_port_added', 3003, 1, 7)
+        emit_signal(controller, 'preview_port_added', 3004, 1, 8)
+        test_cb.assert_called_once_with(3004, 1, 8)
+
+    def test_threaded(self):
+        """Test that threaded Callbacks are called from the worker"""
+        controller = Controller(address='unix:abstract=abcd')
+        threads = []
+        done = threading.Event()
+
+        def test_cb(mode):
+            """Remember the calling thread"""
+            threads.append((threading.current_thread(), mode))
+            done.set()
+
+        controller.on_new_mode_online(test_cb, threaded=True)
+        emit_signal(controller, 'new_mode_online', 3)
+        assert done.wait(5)
+        controller.stop_signal_worker(5)
+
+        assert threads[0][0] is not threading.current_thread()
+        assert threads[0][1] == 3
+
+    def test_threaded_restarts_worker(self):
+        """Test that the worker is started again after it was stopped"""
+        controller = Controller(address='unix:abstract=abcd')
+        done = threading.Event()
+        controller.on_new_mode_online(lambda mode: done.set(), threaded=True)
+        controller.stop_signal_worker()
+
+        emit_signal(controller, 'new_mode_online', 3)
+        assert done.wait(5)
+        controller.stop_signal_worker(5)
+
+
 class MockConnection(object):
 
     """A class which mocks the Connection class"""
@@ -221,6 +410,11 @@ class MockConnection(object):
         self.return_variant = return_variant
         self.should_fail = should_fail
 
+    @classmethod
+    def is_connected(cls):
+        """mock of is_connected"""
+        return True
+
     def get_compose_port(self):
         """mock of get_compose_port"""
         if self.return_variant:
@@ -249,6 +443,13 @@ class MockConnection(object):
         else:
             return (0,)
 
+    def get_preview_port_list(self):
+        """mock of get_preview_port_list"""
+        if self.return_variant:
+            return GLib.Variant('(a(iii))', ([(3002, 1, 7), (3003, 1, 8)],))
+        else:
+            return (0,)
+
     def set_composite_mode(self, mode):
         """mock of set_composite_mode"""
         if self.return_variant:
@@ -291,6 +492,13 @@ class MockConnection(object):
         else:
             return (not self.should_fail,)
 
+    def apply_scene(self, mode, port_a, port_b, xpos, ypos, width, height):
+        """mock of apply_scene"""
+        if self.return_variant:
+            return GLib.Variant('(b)', (not self.should_fail,))
+        else:
+            return (not self.should_fail,)
+
     def click_video(self, xpos, ypos, width, height):
         """mock of click_video"""
         if self.return_variant:
@@ -380,6 +588,25 @@ class TestGetPreviewPorts(object):
         assert controller.get_preview_ports() == [3001, 3002]
 
 
+class TestGetPreviewPortList(object):
+
+    """Test the get_preview_port_list method"""
+
+    def test_unpack(self):
+        """Test if unpack fails"""
+        controller = Controller(address='unix:abstract=abcdefghijk')
+        controller.connection = MockConnection(return_variant=False)
+        with pytest.raises(ConnectionReturnError):
+            controller.get_preview_port_list()
+
+    def test_normal_unpack(self):
+        """Test if valid"""
+        controller = Controller(address='unix:abstract=abcdef')
+        controller.connection = MockConnection(return_variant=True)
+        assert controller.get_preview_port_list() == [
+            (3002, 1, 7), (3003, 1, 8)]
+
+
 class TestSetCompositeMode(object):
 
     """Test the set_composite_mode method"""
@@ -524,6 +751,81 @@ class TestSwitch(object):
         assert controller.switch(Controller.VIDEO_CHANNEL_A, 2) is True
 
 
+class TestApplyScene(object):
+
+    """Test the apply_scene method"""
+
+    def test_unpack(self):
+        """Test if unpack fails"""
+        controller = Controller(address='unix:abstract=abcde')
+        controller.establish_connection = Mock(return_value=None)
+        controller.connection = MockConnection(return_variant=False)
+        with pytest.raises(ConnectionReturnError):
+            controller.apply_scene(mode=Controller.COMPOSITE_PIP)
+
+    def test_normal_unpack(self):
+        """Test if valid"""
+        controller = Controller(address='unix:abstract=abcdef')
+        controller.establish_connection = Mock(return_value=None)
+        controller.connection = MockConnection(return_variant=True)
+        assert controller.apply_scene(mode=Controller.COMPOSITE_PIP) is True
+
+
+class TestSceneBatch(object):
+
+    """Test collecting a scene with SceneBatch"""
+
+    def test_defaults(self):
+        """Test that nothing is changed by an empty batch"""
+        controller = Controller(address='unix:abstract=abcde')
+        controller.apply_scene = Mock(return_value=True)
+        assert controller.batch().commit() is True
+        controller.apply_scene.assert_called_once_with(
+            -1, -1, -1, 0, 0, -1, -1)
+
+    def test_collect(self):
+        """Test that all operations are sent in one call"""
+        controller = Controller(address='unix:abstract=abcde')
+        controller.apply_scene = Mock(return_value=True)
+        controller.batch() \
+            .switch(Controller.VIDEO_CHANNEL_A, 3004) \
+            .switch(Controller.VIDEO_CHANNEL_B, 3003) \
+            .set_composite_mode(Controller.COMPOSITE_PIP) \
+            .set_pip(10, 20, 300, 200) \
+            .commit()
+        controller.apply_scene.assert_called_once_with(
+            Controller.COMPOSITE_PIP, 3004, 3003, 10, 20, 300, 200)
+
+    def test_context_manager(self):
+        """Test that leaving the with-block commits the batch"""
+        controller = Controller(address='unix:abstract=abcde')
+        controller.apply_scene = Mock(return_value=True)
+        with controller.batch() as scene:
+            scene.set_composite_mode(Controller.COMPOSITE_DUAL_EQUAL)
+        controller.apply_scene.assert_called_once_with(
+            Controller.COMPOSITE_DUAL_EQUAL, -1, -1, 0, 0, -1, -1)
+
+    def test_context_manager_exception(self):
+        """Test that an exception in the with-block discards the batch"""
+        controller = Controller(address='unix:abstract=abcde')
+        controller.apply_scene = Mock(return_value=True)
+        with pytest.raises(KeyError):
+            with controller.batch() as scene:
+                scene.set_composite_mode(Controller.COMPOSITE_DUAL_EQUAL)
+                raise KeyError()
+        assert not controller.apply_scene.called
+
+    def test_invalid(self):
+        """Test that invalid operations are rejected"""
+        scene = Controller(address='unix:abstract=abcde').batch()
+        with pytest.raises(ValueError):
+            scene.switch(Controller.AUDIO_CHANNEL, 4001)
+        with pytest.raises(ValueError):
+            scene.set_composite_mode(5)
+        with pytest.raises(ValueError):
+            scene.set_pip(0, 0, 0, 100)
+
+
 class TestClickVideo(object):
 
     """Test the click_video method"""
@@ -578,6 +880,58 @@ class TestMarkTracking(object):
         controller.mark_tracking(face)
 
 
+class TestAsyncCalls(object):
+
+    """Test the non-blocking variants of the remote methods"""
+
+    @classmethod
+    def make_controller(cls, reply):
+        """Create a Controller whose connection replies with reply"""
+        controller = Controller(address='unix:abstract=abcde')
+        controller.establish_connection = Mock(return_value=None)
+        controller.connection = Mock()
+
+        def call_async(method, *args):
+            """complete the call right away"""
+            future = DBusFuture(method)
+            future.set_result(reply)
+            return future
+
+        controller.connection.call_async = Mock(side_effect=call_async)
+        return controller
+
+    def test_switch(self):
+        """Test if switch_async resolves to the unpacked result"""
+        controller = self.make_controller(GLib.Variant('(b)', (True,)))
+        future = controller.switch_async(Controller.VIDEO_CHANNEL_A, 3003)
+        assert future.result() is True
+        controller.connection.call_async.assert_called_once_with(
+            'switch', Controller.VIDEO_CHANNEL_A, 3003)
+
+    def test_adjust_pip(self):
+        """Test if adjust_pip_async resolves to the unpacked result"""
+        controller = self.make_controller(GLib.Variant('(u)', (1,)))
+        assert controller.adjust_pip_async(1, 2, 3, 4).result() == 1
+
+    def test_get_preview_ports(self):
+        """Test if get_preview_ports_async parses the ports"""
+        controller = self.make_controller(
+            GLib.Variant('(s)', ('[(3002, 1, 7), (3003, 1, 8)]',)))
+        assert controller.get_preview_ports_async().result() == [3002, 3003]
+
+    def test_invalid_reply(self):
+        """Test if an invalid reply raises ConnectionReturnError"""
+        controller = self.make_controller((0,))
+        with pytest.raises(ConnectionReturnError):
+            controller.get_compose_port_async().result()
+
+    def test_invalid_mode(self):
+        """Test if an unknown composite mode is rejected"""
+        controller = self.make_controller(GLib.Variant('(b)', (True,)))
+        with pytest.raises(ValueError):
+            controller.set_composite_mode_async(7)
+
+
 class TestParsePreviewPorts(object):
 
     """Test the parse_preview_ports class method"""
@@ -0,0 +1,83 @@
+"""Unittests for the event parser in events.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.events import EventParser, ServerEvent, durations
+
+
+class TestEventParser(object):
+
+    """Test the EventParser class"""
+
+    def test_milestones(self):
+        """Test that the lines of the server become events"""
+        parser = EventParser()
+        events = parser.feed(
+            "./tools/gstswitchserver.c:900:info: Controller is listening at: "
+            "tcp:host=::,port=5000\n"
+            "./tools/gstswitchserver.c:300:info: Listening on video "
+            "(:::3000)\n"
+            "./tools/gstswitchcontroller.c:400:info: registered: 1, "
+            "/info/duzy/gst/switch/SwitchUI, "
+            "info.duzy.gst.switch.UIInterface\n"
+            "online: case-3 @123456\n"
+            "offline: case-3 @-1\n"
+            "./tools/gstcase.c:50:info: Removed case-3 (3)\n"
+            "pipeline(0x1234): videotestsrc ! fakesink\n"
+            "./tools/gstcomposite.c:10:info: starting transition\n"
+            "./tools/gstcomposite.c:20:info: ending transition\n"
+            "something else\n", 1.0)
+        assert [event.kind for event in events] == [
+            'controller_listening', 'port_opened', 'client_registered',
+            'case_started', 'case_ended', 'case_removed', 'pipeline_created',
+            'transition_started', 'transition_ended']
+        assert events[0].data == {'address': 'tcp:host=::,port=5000'}
+        assert events[1].data == {'host': '::', 'port': 3000}
+        assert events[2].data['id'] == 1
+        assert events[3].data == {'name': 'case-3', 'clock': 123456}
+        assert events[4].data['clock'] == -1
+        assert events[6].data == {'case': '0x1234',
+                                  'description': 'videotestsrc ! fakesink'}
+        assert all(event.time == 1.0 for event in events)
+
+    def test_partial_line(self):
+        """Test that a line is parsed once it is complete"""
+        parser = EventParser()
+        assert parser.feed("starting trans", 1.0) == []
+        events = parser.feed("ition\nending", 2.0)
+        assert [event.kind for event in events] == ['transition_started']
+        assert events[0].line == 'starting transition'
+        assert events[0].time == 2.0
+
+    def test_unix_socket(self):
+        """Test that a unix socket is no port"""
+        parser = EventParser()
+        event = parser.parse_line(
+            "./tools/gstswitchserver.c:900:info: "
+            "Listening on unix socket /tmp/video.sock", 1.0)
+        assert event.kind == 'socket_opened'
+        assert event.data == {'path': '/tmp/video.sock'}
+
+    def test_no_match(self):
+        """Test that a literal alone does not make an event"""
+        parser = EventParser()
+        assert parser.parse_line("online: ", 0) is None
+
+
+class TestDurations(object):
+
+    """Test the durations function"""
+
+    def test_durations(self):
+        """Test that starts are paired with the next end"""
+        events = [ServerEvent(kind, time, {}, '') for kind, time in (
+            ('transition_ended', 0.5),
+            ('transition_started', 1.0),
+            ('transition_started', 1.5),
+            ('transition_ended', 2.0),
+            ('transition_started', 3.0),
+            ('transition_ended', 3.25),
+            ('transition_started', 4.0))]
+        assert durations(events, 'transition_started',
+                         'transition_ended') == [1.0, 0.25]
@@ -0,0 +1,124 @@
+"""Unittests for DBusFuture class in future.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.future import DBusFuture, gather
+from gstswitch.exception import CallTimeoutError, ConnectionError
+import pytest
+from mock import Mock
+from gi.repository import GLib
+
+
+class TestCompletion(object):
+
+    """Test completing a DBusFuture"""
+
+    def test_result(self):
+        """Test that the result is returned once set"""
+        future = DBusFuture('switch')
+        assert not future.done()
+        future.set_result(True)
+        assert future.done()
+        assert future.result() is True
+        assert future.exception() is None
+
+    def test_exception(self):
+        """Test that the exception is raised by result"""
+        future = DBusFuture('switch')
+        future.set_exception(ConnectionError('Boom!'))
+        with pytest.raises(ConnectionError):
+            future.result()
+        assert isinstance(future.exception(), ConnectionError)
+
+    def test_complete_twice(self):
+        """Test that a future can only be completed once"""
+        future = DBusFuture('switch')
+        future.set_result(True)
+        with pytest.raises(RuntimeError):
+            future.set_result(False)
+
+
+class TestCallbacks(object):
+
+    """Test the done-callbacks"""
+
+    def test_not_callable(self):
+        """Test that a not-callable callback is rejected"""
+        future = DBusFuture('switch')
+        with pytest.raises(ValueError):
+            future.add_done_callback(123)
+
+    def test_called_on_completion(self):
+        """Test that callbacks are called once the future is done"""
+        future = DBusFuture('switch')
+        callback = Mock()
+        future.add_done_callback(callback)
+        assert not callback.called
+        future.set_result(True)
+        callback.assert_called_once_with(future)
+
+    def test_called_when_done(self):
+        """Test that callbacks are called right away on a done future"""
+        future = DBusFuture('switch')
+        future.set_result(True)
+        callback = Mock()
+        future.add_done_callback(callback)
+        callback.assert_called_once_with(future)
+
+    def test_then(self):
+        """Test that then transforms the result"""
+        future = DBusFuture('get_compose_port')
+        chained = future.then(lambda res: res + 1)
+        future.set_result(3000)
+        assert chained.result() == 3001
+
+    def test_then_passes_exceptions(self):
+        """Test that then passes on exceptions"""
+        future = DBusFuture('get_compose_port')
+        transform = Mock()
+        chained = future.then(transform)
+        future.set_exception(ConnectionError('Boom!'))
+        with pytest.raises(ConnectionError):
+            chained.result()
+        assert not transform.called
+
+    def test_then_transform_raises(self):
+        """Test that exceptions of the transformation are passed on"""
+        future = DBusFuture('get_compose_port')
+        chained = future.then(Mock(side_effect=ValueError))
+        future.set_result(3000)
+        with pytest.raises(ValueError):
+            chained.result()
+
+
+class TestWait(object):
+
+    """Test waiting for a DBusFuture"""
+
+    def test_iterates_main_context(self):
+        """Test that waiting dispatches the main context"""
+        future = DBusFuture('switch')
+        GLib.idle_add(lambda: future.set_result(True))
+        assert future.result(timeout=5) is True
+
+    def test_timeout(self):
+        """Test that a timeout is raised if the call does not complete"""
+        future = DBusFuture('switch')
+        assert future.wait(0.01) is False
+        with pytest.raises(CallTimeoutError):
+            future.result(0.01)
+
+    def test_gather(self):
+        """Test that gather collects the results in order"""
+        futures = [DBusFuture('switch'), DBusFuture('adjust_pip')]
+        GLib.idle_add(lambda: futures[1].set_result(1))
+        GLib.idle_add(lambda: futures[0].set_result(True))
+        assert gather(futures, timeout=5) == [True, 1]
+
+    def test_gather_timeout(self):
+        """Test that gather raises when not all calls complete"""
+        futures = [DBusFuture('switch'), DBusFuture('adjust_pip')]
+        futures[0].set_result(True)
+        with pytest.raises(CallTimeoutError):
+            gather(futures, timeout=0.01)
@@ -0,0 +1,222 @@
+"""Unittests for the FrameGrabber in grabber.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.grabber import Frame, FrameGrabber, plane_layout
+from gstswitch.grabber import ProbedCaps, probe_caps, probe_ports
+from gstswitch import grabber as grabber_module
+from gstswitch.exception import ConnectionError
+import pytest
+import socket
+import time
+import fractions
+from mock import Mock
+from gi.repository import Gst
+
+
+def make_sample(caps, data):
+    """Create a Gst.Sample like one pulled from an appsink"""
+    buf = Gst.Buffer.new_wrapped(bytes(bytearray(data)))
+    buf.pts = 40
+    return Gst.Sample.new(buf, Gst.Caps.from_string(caps), None, None)
+
+
+def unused_port():
+    """Get a port nobody listens on"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestPlaneLayout(object):
+
+    """Test the memory layout of raw frames"""
+
+    def test_packed(self):
+        """Test that the rows of packed formats are padded to 4 bytes"""
+        assert plane_layout('RGB', 300, 200) == [(0, 200, 300, 900, 3)]
+        assert plane_layout('RGB', 301, 200) == [(0, 200, 301, 904, 3)]
+        assert plane_layout('GRAY8', 3, 2) == [(0, 2, 3, 4, 1)]
+
+    def test_planar(self):
+        """Test the luma and the two chroma planes of I420"""
+        assert plane_layout('I420', 300, 200) == [
+            (0, 200, 300, 300, 1),
+            (60000, 100, 150, 152, 1),
+            (75200, 100, 150, 152, 1)]
+
+    def test_unsupported(self):
+        """Test that unknown formats are rejected"""
+        with pytest.raises(ValueError):
+            plane_layout('NV12', 300, 200)
+
+
+class TestFrame(object):
+
+    """Test the arrays of a frame"""
+
+    def test_packed(self):
+        """Test that the padding of the rows is cut off"""
+        caps = 'video/x-raw,format=RGB,width=2,height=2,framerate=25/1'
+        with Frame(make_sample(caps, range(16))) as frame:
+            assert (frame.format, frame.width, frame.height) == ('RGB', 2, 2)
+            assert frame.pts == 40
+            assert frame.array.shape == (2, 2, 3)
+            assert frame.array.tolist() == [[[0, 1, 2], [3, 4, 5]],
+                                            [[8, 9, 10], [11, 12, 13]]]
+            image = frame.copy()
+        assert image[1, 1, 2] == 13
+
+    def test_planar(self):
+        """Test that I420 has three planes"""
+        caps = 'video/x-raw,format=I420,width=4,height=2,framerate=25/1'
+        with Frame(make_sample(caps, [1] * 8 + [2] * 4 + [3] * 4)) as frame:
+            luma, chroma_u, chroma_v = frame.planes
+            assert luma.shape == (2, 4)
+            assert chroma_u.shape == chroma_v.shape == (1, 2)
+            assert chroma_v.tolist() == [[3, 3]]
+
+    def test_encoded(self):
+        """Test that encoded frames are one flat array"""
+        with Frame(make_sample('video/x-vp8', range(5))) as frame:
+            assert frame.format is None
+            assert frame.array.tolist() == [0, 1, 2, 3, 4]
+
+    def test_release(self):
+        """Test that a released frame has no arrays"""
+        frame = Frame(make_sample('video/x-vp8', range(5)))
+        frame.release()
+        frame.release()
+        with pytest.raises(ValueError):
+            frame.planes
+
+
+class TestFrameGrabber(object):
+
+    """Test receiving frames"""
+
+    def test_description(self):
+        """Test the conversion in front of the appsink"""
+        grabber = FrameGrabber(3001, convert='videoscale',
+                               video_format='RGB')
+        assert grabber.description() == (
+            'tcpclientsrc name=src host=127.0.0.1 port=3001 ! gdpdepay ! '
+            'videoscale ! videoconvert ! video/x-raw,format=RGB ! '
+            'appsink name=sink sync=false max-buffers=2 drop=true')
+        assert grabber.sink is not None
+
+    def test_closed_port(self):
+        """Test that a port nobody listens on raises"""
+        with FrameGrabber(unused_port()) as grabber:
+            with pytest.raises(ConnectionError):
+                grabber.pull(timeout=1)
+
+    def test_frames(self):
+        """Test that every frame is released once the next is requested"""
+        grabber = FrameGrabber(3001)
+        frames = [Mock(), Mock(), Mock()]
+        grabber.pull = Mock(side_effect=frames + [None])
+        received = []
+        for frame in grabber.frames(timeout=5):
+            assert not frame.release.called
+            received.append(frame)
+        assert received == frames
+        assert all(frame.release.called for frame in frames)
+
+    def test_frames_count(self):
+        """Test that no more than count frames are pulled"""
+        grabber = FrameGrabber(3001)
+        grabber.pull = Mock(return_value=Mock())
+        assert len(list(grabber.frames(timeout=5, count=2))) == 2
+        assert grabber.pull.call_count == 2
+
+
+class TestProbeCaps(object):
+
+    """Test probing the caps of ports"""
+
+    CAPS = 'video/x-raw,format=I420,width=64,height=48,framerate=25/1'
+
+    def test_from_sample(self):
+        """Test that the caps become structured data"""
+        probed = ProbedCaps.from_sample(3001, make_sample(self.CAPS, [0]),
+                                        0.5)
+        assert probed.port == 3001
+        assert probed.media_type == 'video/x-raw'
+        assert probed.fields == {'format': 'I420', 'width': 64,
+                                 'height': 48,
+                                 'framerate': fractions.Fraction(25, 1)}
+        assert probed.time == 0.5
+
+    def test_matches(self):
+        """Test comparing the caps like a capsfilter"""
+        probed = ProbedCaps.from_sample(3001, make_sample(self.CAPS, [0]),
+                                        0.5)
+        assert probed.matches('video/x-raw, width=(int)64')
+        assert not probed.matches('video/x-raw, width=(int)300')
+        assert not probed.matches('audio/x-raw')
+
+    def test_closed_ports(self):
+        """Test that ports nobody listens on have no caps"""
+        ports = [unused_port(), unused_port()]
+        assert probe_ports(ports, timeout=1) == dict.fromkeys(ports)
+
+    def test_arrival_time(self, monkeypatch):
+        """Test that every port reports its own time to the first buffer,
+        not the time it was pulled after a slower port
+        """
+        class MockGrabber(object):
+
+            """A grabber whose port 1 is slow, its buffer arrives when it
+            is pulled, the buffer of port 2 arrives right away
+            """
+
+            def __init__(self, port, host, max_buffers):
+                self.port = port
+                self.sink = Mock()
+
+            def new_sample(self):
+                """Call the new-sample handler"""
+                handler, port = self.sink.connect.call_args[0][1:]
+                handler(self.sink, port)
+
+            def start(self):
+                """Connect"""
+                if self.port == 2:
+                    self.new_sample()
+
+            def pull_sample(self, timeout):
+                """Wait for the buffer"""
+                if self.port == 1:
+                    time.sleep(0.3)
+                    self.new_sample()
+                return Mock()
+
+            def stop(self):
+                """Disconnect"""
+
+        monkeypatch.setattr(grabber_module, 'FrameGrabber', MockGrabber)
+        monkeypatch.setattr(ProbedCaps, 'from_sample',
+                            Mock(side_effect=lambda port, sample, elapsed:
+                                 elapsed))
+        result = probe_ports([1, 2], timeout=5)
+        assert result[1] >= 0.3
+        assert result[2] < 0.1
+
+    def test_server(self):
+        """Test probing a port serving like the gst-switch-srv"""
+        port = unused_port()
+        server = Gst.parse_launch(
+            'videotestsrc is-live=true ! {0} ! gdppay ! '
+            'tcpserversink host=127.0.0.1 port={1}'.format(self.CAPS, port))
+        server.set_state(Gst.State.PLAYING)
+        server.get_state(Gst.CLOCK_TIME_NONE)
+        try:
+            probed = probe_caps(port, timeout=5)
+        finally:
+            server.set_state(Gst.State.NULL)
+        assert probed.fields['width'] == 64
+        assert probed.matches(self.CAPS)
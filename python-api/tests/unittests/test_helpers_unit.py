@@ -3,9 +3,10 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
 
-from gstswitch.helpers import TestSources, PreviewSinks
+from gstswitch.helpers import TestSources, PreviewSinks, PreviewMosaic
 from gstswitch.exception import RangeError, InvalidIndexError
 import pytest
+from mock import Mock
 from gstswitch import testsource
 
 
@@ -74,7 +75,8 @@ class TestTestSources(object):
                      height=200,
                      pattern=None,
                      timeoverlay=False,
-                     clockoverlay=False):
+                     clockoverlay=False,
+                     socket_path=None):
             pass
 
         def run(self):
@@ -143,7 +145,7 @@ class TestTestSources(object):
 
         """A Mock audio source"""
 
-        def __init__(self, port, freq=110, wave=None):
+        def __init__(self, port, freq=110, wave=None, socket_path=None):
             pass
 
         def run(self):
@@ -158,6 +160,76 @@ class TestTestSources(object):
         assert test.running_tests_audio[0] is not None
         assert len(test.running_tests_audio) != 0
 
+    def test_shared(self, monkeypatch):
+        """Test that shared sources are branches of one pipeline"""
+        pipeline = Mock()
+        pipeline.add_video.side_effect = [0, 2]
+        pipeline.add_audio.return_value = 1
+        pipeline.branches = [0, 1, 2]
+        monkeypatch.setattr(testsource, 'SharedPipeline',
+                            Mock(return_value=pipeline))
+        test = TestSources(video_port=3000, audio_port=4000, shared=True)
+        test.new_test_video(pattern=4)
+        test.new_test_audio(wave=1)
+        test.new_test_video()
+        testsource.SharedPipeline.assert_called_once_with(
+            video_socket=None, audio_socket=None)
+        pipeline.play.assert_called_once_with()
+        pipeline.add_video.assert_any_call(3000, 300, 200, '4', False, False)
+        pipeline.add_audio.assert_called_once_with(4000, 110, '1')
+        assert [src.branch_id for src in test.running_tests_video] == [0, 2]
+        assert test.running_tests_audio[0].wave == '1'
+
+        test.terminate_index_video(0)
+        pipeline.remove_branch.assert_called_once_with(0)
+        pipeline.branches = []
+        test.terminate_video()
+        test.terminate_audio()
+        pipeline.disable.assert_called_once_with()
+
+    def test_prerender(self, monkeypatch):
+        """Test that a video is rendered once for all its sources"""
+        monkeypatch.setattr(testsource, 'render_video', Mock())
+        monkeypatch.setattr(testsource, 'LoopingVideoSrc', Mock())
+        test = TestSources(video_port=3000, prerender=10)
+        test.new_test_video(pattern=4)
+        test.new_test_video(pattern=4)
+        test.new_test_video(pattern=5, width=640, height=360)
+        assert testsource.render_video.call_count == 2
+        testsource.render_video.assert_any_call(300, 200, '4', 10,
+                                                False, False)
+        rendered = testsource.render_video.return_value
+        testsource.LoopingVideoSrc.assert_any_call(3000, rendered, '4',
+                                                   None)
+        assert len(test.running_tests_video) == 3
+
+    def test_prerender_shared(self, monkeypatch):
+        """Test that pre-rendered frames can loop in a shared pipeline"""
+        pipeline = Mock()
+        pipeline.add_rendered_video.return_value = 0
+        monkeypatch.setattr(testsource, 'SharedPipeline',
+                            Mock(return_value=pipeline))
+        monkeypatch.setattr(testsource, 'render_video', Mock())
+        test = TestSources(video_port=3000, shared=True, prerender=10)
+        test.new_test_video(pattern=4)
+        pipeline.add_rendered_video.assert_called_once_with(
+            3000, testsource.render_video.return_value)
+        assert not pipeline.add_video.called
+
+    def test_sockets(self, monkeypatch):
+        """Test that sources connect to the input sockets of the server"""
+        monkeypatch.setattr(testsource, 'VideoSrc', Mock())
+        monkeypatch.setattr(testsource, 'AudioSrc', Mock())
+        test = TestSources(video_port=3000, audio_port=4000,
+                           video_socket='/tmp/video',
+                           audio_socket='/tmp/audio')
+        test.new_test_video(pattern=4)
+        test.new_test_audio(wave=1)
+        testsource.VideoSrc.assert_called_once_with(
+            3000, 300, 200, 4, False, False, '/tmp/video')
+        testsource.AudioSrc.assert_called_once_with(
+            4000, 110, 1, '/tmp/audio')
+
     class MockTest2(object):
 
         """A mock audio source"""
@@ -289,3 +361,87 @@ class TestPreviewSinks(object):
         preview.preview = self.MockPreview()
         preview.terminate()
         assert preview.preview is None
+
+
+class TestPreviewMosaic(object):
+
+    """Test the mosaic of all video previews"""
+
+    class MockMosaicPipeline(object):
+
+        """A mock mosaic pipeline"""
+
+        def __init__(self, ports, **kwargs):
+            self.ports = list(ports)
+            self.kwargs = kwargs
+            self.playing = False
+
+        def play(self):
+            """Play the mosaic"""
+            self.playing = True
+
+        def add_port(self, port):
+            """Add a tile"""
+            self.ports.append(port)
+
+        def remove_port(self, port):
+            """Remove a tile"""
+            self.ports.remove(port)
+
+        def pull_sample(self, timeout):
+            """No mosaic arrived"""
+            return None
+
+        def disable(self):
+            """End the mosaic"""
+            self.playing = False
+
+    def setup_method(self, method):
+        """Create a controller serving two video and one audio preview"""
+        self.controller = Mock()
+        self.controller.get_preview_port_list.return_value = [
+            (3003, 1, 1), (3004, 2, 2), (3005, 1, 0)]
+
+    def test_run(self, monkeypatch):
+        """Test that only the video previews are shown"""
+        monkeypatch.setattr(testsource, 'MosaicPipeline',
+                            self.MockMosaicPipeline)
+        mosaic = PreviewMosaic(self.controller, columns=4, sink='appsink')
+        mosaic.run()
+        assert mosaic.pipeline.playing
+        assert mosaic.pipeline.ports == [3003, 3005]
+        assert mosaic.pipeline.kwargs['columns'] == 4
+        assert mosaic.pull(timeout=0) is None
+
+    def test_update(self, monkeypatch):
+        """Test following the previews the server opens and closes"""
+        monkeypatch.setattr(testsource, 'MosaicPipeline',
+                            self.MockMosaicPipeline)
+        mosaic = PreviewMosaic(self.controller)
+        mosaic.run()
+        self.controller.get_preview_port_list.return_value = [
+            (3005, 1, 0), (3006, 1, 1), (3007, 1, 2)]
+        assert mosaic.update() == ([3006, 3007], [3003])
+        assert mosaic.pipeline.ports == [3005, 3006, 3007]
+
+    def test_pull_fakesink(self, monkeypatch):
+        """Test that a fakesink has no frames to pull"""
+        monkeypatch.setattr(testsource, 'MosaicPipeline',
+                            self.MockMosaicPipeline)
+        mosaic = PreviewMosaic(self.controller)
+        mosaic.run()
+        with pytest.raises(AttributeError):
+            mosaic.pull()
+
+    def test_terminate_fail(self):
+        """Test terminating a mosaic when none exists"""
+        mosaic = PreviewMosaic(self.controller)
+        with pytest.raises(AttributeError):
+            mosaic.terminate()
+
+    def test_terminate_normal(self):
+        """Test terminating a running mosaic"""
+        mosaic = PreviewMosaic(self.controller)
+        mosaic.pipeline = self.MockMosaicPipeline([3003])
+        mosaic.terminate()
+        assert mosaic.pipeline is None
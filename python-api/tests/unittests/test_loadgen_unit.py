@@ -0,0 +1,133 @@
+"""Unittests for LoadGenerator class in loadgen.py"""
+import sys
+import os
+import random
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.loadgen import LoadGenerator, main
+from gstswitch.controller import Controller
+from gstswitch.exception import ConnectionError
+from gstswitch.sampler import ResourceSample
+import pytest
+from mock import Mock, patch
+
+
+def make_generator(**kwargs):
+    """Create a LoadGenerator with a mocked Controller and pipeline"""
+    controller = Mock()
+    controller.get_preview_ports.return_value = [3003, 3004]
+    generator = LoadGenerator(controller, rng=random.Random(1), **kwargs)
+    generator._pipeline = Mock()
+    generator._pipeline.add_video.side_effect = range(1000)
+    generator._pipeline.add_audio.side_effect = range(1000, 2000)
+    return generator
+
+
+class TestLoadGenerator(object):
+
+    """Test the LoadGenerator"""
+
+    def test_add_sources(self):
+        """Test that sources are branches of the shared pipeline"""
+        generator = make_generator(pattern=4, framerate=30)
+        generator.add_video()
+        generator.add_audio()
+        generator._pipeline.add_video.assert_called_once_with(
+            3000, 300, 200, 4, framerate=30)
+        assert generator.video_sources == [0]
+        assert generator.audio_sources == [1000]
+        pipeline = generator._pipeline
+        generator.stop()
+        pipeline.disable.assert_called_once_with()
+        assert generator.video_sources == []
+
+    def test_control_call(self):
+        """Test that only the compose port is asked without driving"""
+        generator = make_generator()
+        latency, failed = generator.control_call()
+        assert latency >= 0 and not failed
+        generator.controller.get_compose_port.assert_called_once_with()
+
+    def test_drive(self):
+        """Test that driving switches and changes modes"""
+        generator = make_generator(drive=True)
+        for _ in range(50):
+            generator.control_call()
+        assert generator.controller.set_composite_mode.called
+        channels = set(args[0] for args, _ in
+                       generator.controller.switch.call_args_list)
+        assert channels == set([Controller.VIDEO_CHANNEL_A,
+                                Controller.VIDEO_CHANNEL_B])
+
+    def test_failed_call(self):
+        """Test that failing calls are counted and stop the run"""
+        generator = make_generator()
+        generator.controller.get_compose_port.side_effect = ConnectionError
+        results = generator.run(video=3, step=1, ramp=1000, hold=0, calls=2)
+        assert len(results) == 1
+        assert results[0]['errors'] == 2
+        assert results[0]['limit'] == '2 failed control calls'
+
+    def test_steps(self):
+        """Test that sources are added in steps and every step is
+            measured
+        """
+        generator = make_generator()
+        reported = []
+        results = generator.run(video=5, audio=2, step=2, ramp=1000,
+                                hold=0, calls=3, report=reported.append)
+        assert [(res['video'], res['audio']) for res in results] == [
+            (2, 0), (4, 1), (5, 2)]
+        assert reported == results
+        assert results[0]['calls'] == 3
+        assert 'cpu_percent' not in results[0]
+
+    def test_limits(self):
+        """Test that the run stops at the first step over a limit"""
+        generator = make_generator()
+        generator.sampler = Mock()
+        generator.sampler.samples = []
+        with patch.object(LoadGenerator, '_resources',
+                          side_effect=lambda begin, end: {
+                              'cpu_percent': 40.0 * len(
+                                  generator.video_sources)}):
+            results = generator.run(video=10, ramp=1000, hold=0, calls=1,
+                                    max_cpu=100)
+        assert len(results) == 3
+        assert results[-1]['limit'] == 'server cpu 120.0% > 100%'
+
+    def test_not_positive(self):
+        """Test that a step or ramp which never ends is rejected"""
+        generator = make_generator()
+        for kwargs in ({'step': 0}, {'step': -1}, {'ramp': 0},
+                       {'ramp': -0.5}):
+            with pytest.raises(ValueError):
+                generator.run(video=2, hold=0, calls=0, **kwargs)
+        assert generator.video_sources == []
+
+    def test_resources(self):
+        """Test that the samples of a step are summarized"""
+        generator = make_generator()
+        generator.sampler = Mock()
+        generator.sampler.samples = [
+            ResourceSample(1.0, None, 100, 4, 10),
+            ResourceSample(2.0, 50.0, 300, 6, 12),
+            ResourceSample(3.0, 70.0, 200, 5, 11),
+            ResourceSample(9.0, 99.0, 900, 9, 19)]
+        assert generator._resources(1.5, 3.5) == {
+            'cpu_percent': 60.0, 'rss': 300, 'threads': 6, 'fds': 12}
+        assert generator._resources(5, 6) == {}
+
+
+class TestMain(object):
+
+    """Test the arguments of the entry point"""
+
+    def test_not_positive(self):
+        """Test that a step or ramp which never ends is rejected"""
+        for argv in (['--step', '0'], ['--step', '-2'], ['--ramp', '0'],
+                     ['--ramp', '-0.5']):
+            with patch('gstswitch.loadgen.Controller') as controller:
+                with pytest.raises(SystemExit):
+                    main(argv)
+            assert not controller.called
@@ -31,6 +31,19 @@ class TestProcessMonitor(object):
                                          bufsize=ANY,
                                          stderr=ANY)
 
+    @pytest.mark.skipif(not hasattr(os, 'sched_getaffinity'),
+                        reason="no CPU affinity on this platform")
+    def test_cpus(self):
+        """ Test if the process is pinned to the given CPUs
+        """
+        cpu = min(os.sched_getaffinity(0))
+        mon = ProcessMonitor(
+            ['sh', '-c', 'grep Cpus_allowed_list /proc/self/status'],
+            StringIO(), cpus=[cpu])
+        mon.wait_for_output('Cpus_allowed_list:\t{0}\n'.format(cpu),
+                            timeout=5)
+        mon.terminate()
+
     def test_start_raises(self):
         """ Test if starting a ProcessMonitor with a Command that makes the
             Popen-Constructor throw an OSError correctly raises a
@@ -221,3 +234,222 @@ class TestProcessMonitor(object):
                         mon.wait_for_output('ZZZ', timeout=0, count=1)
 
                 readmock.assert_called_once_with(stdoutmock.fileno(), ANY)
+
+    def test_match_split_over_reads(self):
+        """ Test if a match is found when it is split over two reads
+        """
+        with patch('select.select') as selectmock:
+            stdoutmock = Mock()
+            selectmock.return_value = ([stdoutmock], [], [])
+
+            with patch('os.read') as readmock:
+                readmock.side_effect = ['aaa ZZ'.encode('utf-8'),
+                                        'Z ccc'.encode('utf-8')]
+
+                with patch('subprocess.Popen.__init__'):
+                    mon = ProcessMonitor('abc')
+                    mon.stdout = stdoutmock
+                    mon._cmd_output_target = StringIO()
+
+                    mon.wait_for_output('ZZZ', timeout=0, count=1)
+
+                assert readmock.call_count == 2
+                assert mon.match_count('ZZZ') == 1
+
+
+class TestRingBuffer(object):
+    """ Unittests for the output ring buffer of ProcessMonitor
+    """
+
+    def test_bounded(self):
+        """ Test if the buffer drops the oldest output
+        """
+        with patch('subprocess.Popen.__init__'):
+            mon = ProcessMonitor('abc', max_buffer=10)
+            mon._append('0123456')
+            mon._append('789ab')
+            assert mon._buffer == '23456789ab'
+            mon._append('cdefghijklmnop')
+            assert mon._buffer == 'ghijklmnop'
+
+    def test_counter_survives_trimming(self):
+        """ Test if a requested match stays counted after its output
+            scrolled out of the buffer
+        """
+        with patch('subprocess.Popen.__init__'):
+            mon = ProcessMonitor('abc', max_buffer=8)
+            mon._append('xx ZZZ x')
+            assert mon.match_count('ZZZ') == 1
+            mon._append('yyyyyyyy')
+            assert 'ZZZ' not in mon._buffer
+            assert mon.match_count('ZZZ') == 1
+
+    def test_counts_every_chunk_once(self):
+        """ Test if the overlap between chunks does not count twice
+        """
+        with patch('subprocess.Popen.__init__'):
+            mon = ProcessMonitor('abc')
+            assert mon.match_count('abc') == 0
+            for chunk in ('xab', 'cab', 'c', 'abc', 'ab', 'x'):
+                mon._append(chunk)
+            assert mon.match_count('abc') == 3
+            assert mon.match_count('c') == 3
+
+    def test_several_patterns(self):
+        """ Test if matches of different length are counted
+            independently
+        """
+        with patch('subprocess.Popen.__init__'):
+            mon = ProcessMonitor('abc')
+            assert mon.match_count('registered: ') == 0
+            assert mon.match_count(':::3000') == 0
+            mon._append('listening on :::30')
+            mon._append('00\nregist')
+            mon._append('ered: 1\nregistered: 2\n')
+            assert mon.match_count('registered: ') == 2
+            assert mon.match_count(':::3000') == 1
+
+
+class TestDrain(object):
+    """ Unittests for ProcessMonitor reading on a background thread
+    """
+
+    def test_wait_for_output(self):
+        """ Test if wait_for_output is woken up by the drain thread
+        """
+        mon = ProcessMonitor(['sh', '-c', 'echo aaa; sleep 0.2; echo ZZZ'],
+                             StringIO(), drain=True)
+        mon.wait_for_output('ZZZ', timeout=5, count=1)
+        mon.terminate()
+        assert 'aaa' in mon._cmd_output_target.getvalue()
+
+    def test_full_pipe(self):
+        """ Test if a process writing more than the pipe holds is not
+            blocked while nobody waits
+        """
+        mon = ProcessMonitor(
+            ['sh', '-c', 'head -c 300000 /dev/zero | tr "\\0" x; echo ZZZ'],
+            StringIO(), max_buffer=1000, drain=True)
+        mon.wait_for_output('ZZZ', timeout=5, count=1)
+        assert len(mon._buffer) <= 1000
+        mon.terminate()
+
+    def test_split_character(self):
+        """ Test if a character split across two reads is decoded whole
+        """
+        mon = ProcessMonitor(
+            ['sh', '-c', 'printf "\\303"; sleep 0.2; printf "\\244 ZZZ\\n"'],
+            StringIO(), drain=True)
+        mon.wait_for_output('ZZZ', timeout=5, count=1)
+        mon.terminate()
+        assert mon._cmd_output_target.getvalue() == u'\u00e4 ZZZ\n'
+
+    def test_timeout(self):
+        """ Test if waiting for a match which does not come times out
+        """
+        mon = ProcessMonitor(['sh', '-c', 'echo aaa; exec sleep 5'],
+                             StringIO(), drain=True)
+        try:
+            with pytest.raises(MatchTimeoutError):
+                mon.wait_for_output('ZZZ', timeout=0.2, count=1)
+        finally:
+            mon.terminate()
+
+    def test_eof(self):
+        """ Test if waiting fails when the process exits without a match
+        """
+        mon = ProcessMonitor(['sh', '-c', 'echo aaa'],
+                             StringIO(), drain=True)
+        with pytest.raises(MatchEofError):
+            mon.wait_for_output('ZZZ', timeout=5, count=1)
+        mon.terminate()
+
+
+class TestEvents(object):
+    """ Unittests for the ServerEvents of ProcessMonitor
+    """
+
+    def test_events_are_collected(self):
+        """ Test if lines split over chunks become events
+        """
+        with patch('subprocess.Popen.__init__'):
+            mon = ProcessMonitor('abc')
+            mon._append('./tools/gstswitchserver.c:1:info: Controller is '
+                        'listening at: tcp:host=::,port=50')
+            assert list(mon.events) == []
+            mon._append('00\nfoo\n')
+            assert [event.kind for event in mon.events] == [
+                'controller_listening']
+            assert mon.time_to('controller_listening') >= 0
+            assert mon.time_to('port_opened') is None
+
+    def test_subscribe(self):
+        """ Test if subscribers get the events of their kind
+        """
+        with patch('subprocess.Popen.__init__'):
+            mon = ProcessMonitor('abc')
+            everything = Mock()
+            online = Mock()
+            mon.subscribe(everything)
+            mon.subscribe(online, 'case_started')
+            mon._dispatch_events(mon._append('online: case-1 @12\n'
+                                             'ending transition\n'))
+            assert everything.call_count == 2
+            assert online.call_count == 1
+            assert online.call_args[0][0].data == {'name': 'case-1',
+                                                   'clock': 12}
+            assert mon.unsubscribe(everything)
+            assert not mon.unsubscribe(everything)
+
+    def test_subscribe_not_callable(self):
+        """ Test if a callback which is not callable is rejected
+        """
+        with patch('subprocess.Popen.__init__'):
+            mon = ProcessMonitor('abc')
+            with pytest.raises(ValueError):
+                mon.subscribe(1)
+
+    def test_wait_for_event(self):
+        """ Test if wait_for_event returns the event with the given data
+        """
+        mon = ProcessMonitor(
+            ['sh', '-c', 'echo "x:info: Listening on v (:::3000)"; '
+             'sleep 0.1; echo "x:info: Listening on a (:::4000)"'],
+            StringIO(), drain=True)
+        event = mon.wait_for_event('port_opened', timeout=5, port=4000)
+        assert event.data['host'] == '::'
+        assert len(mon.find_events('port_opened')) == 2
+        with pytest.raises(MatchEofError):
+            mon.wait_for_event('port_opened', timeout=5, count=3)
+        mon.terminate()
+
+    def test_wait_for_event_reading(self):
+        """ Test if wait_for_event reads the output when not draining
+        """
+        mon = ProcessMonitor(
+            ['sh', '-c', 'echo "starting transition"; exec sleep 5'],
+            StringIO())
+        try:
+            event = mon.wait_for_event('transition_started', timeout=5)
+            assert event.line == 'starting transition'
+            with pytest.raises(MatchTimeoutError):
+                mon.wait_for_event('transition_ended', timeout=0.2)
+        finally:
+            mon.terminate()
+
+
+class TestSampleResources(object):
+    """ Unittests for sampling the resources of the process
+    """
+
+    def test_sample_resources(self):
+        """ Test if a sampler of the process is started
+        """
+        mon = ProcessMonitor(['sh', '-c', 'exec sleep 5'], StringIO())
+        try:
+            sampler = mon.sample_resources(interval=60)
+            sampler.stop()
+            assert sampler.pid == mon.pid
+            assert len(sampler.samples) == 1
+        finally:
+            mon.terminate()
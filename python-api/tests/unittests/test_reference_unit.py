@@ -0,0 +1,80 @@
+"""Unittests for ReferenceStore in reference.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.reference import ReferenceStore
+import pytest
+import numpy
+from mock import Mock
+
+
+def make_loader(value=7):
+    """Create a loader decoding every file to a small float image"""
+    return Mock(return_value=numpy.full((2, 3, 3), value, dtype=float))
+
+
+class TestReferenceStore(object):
+
+    """Test decoding reference images once"""
+
+    def setup_method(self, method):
+        """Create a loader counting the decoded images"""
+        self.loader = make_loader()
+
+    def make_store(self, tmpdir, cache=True):
+        """Create a store of a directory with one image file"""
+        tmpdir.join('frames', 'RED.png').write('png', ensure=True)
+        cache_dir = str(tmpdir.join('cache')) if cache else None
+        return ReferenceStore(str(tmpdir.join('frames')), cache_dir,
+                              loader=self.loader)
+
+    def test_memory(self, tmpdir):
+        """Test that an image is decoded once and kept as uint8"""
+        store = self.make_store(tmpdir, cache=False)
+        image = store.get('RED.png')
+        assert image.dtype == numpy.uint8
+        assert image.shape == (2, 3, 3)
+        assert not image.flags.writeable
+        assert store['RED.png'] is image
+        self.loader.assert_called_once_with(store.path('RED.png'))
+
+    def test_missing(self, tmpdir):
+        """Test that a missing image raises"""
+        store = self.make_store(tmpdir)
+        with pytest.raises((IOError, OSError)):
+            store.get('GREEN.png')
+
+    def test_cache(self, tmpdir):
+        """Test that another session maps the cached image"""
+        store = self.make_store(tmpdir)
+        assert store.get('RED.png').max() == 7
+        assert len(tmpdir.join('cache').listdir()) == 1
+
+        other = ReferenceStore(store.directory, store.cache_dir,
+                               loader=make_loader())
+        image = other.get('RED.png')
+        assert isinstance(image, numpy.memmap)
+        assert image.max() == 7
+        assert not other.loader.called
+
+    def test_changed(self, tmpdir):
+        """Test that a changed image is decoded again"""
+        store = self.make_store(tmpdir)
+        store.get('RED.png')
+        stat = os.stat(store.path('RED.png'))
+        os.utime(store.path('RED.png'), (stat.st_atime, stat.st_mtime + 10))
+        self.loader.return_value = numpy.zeros((2, 3, 3))
+
+        assert store.get('RED.png').max() == 0
+        assert self.loader.call_count == 2
+        # the stale version was removed from the cache
+        assert len(tmpdir.join('cache').listdir()) == 1
+
+    def test_clear(self, tmpdir):
+        """Test that a cleared store maps the cached image again"""
+        store = self.make_store(tmpdir)
+        store.get('RED.png')
+        store.clear()
+        assert isinstance(store.get('RED.png'), numpy.memmap)
+        assert self.loader.call_count == 1
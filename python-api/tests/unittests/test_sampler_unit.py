@@ -0,0 +1,113 @@
+"""Unittests for ResourceSampler class in sampler.py"""
+import sys
+import os
+import json
+import subprocess
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.sampler import ResourceSampler, ResourceSample, CLOCK_TICKS
+import pytest
+from mock import patch
+from six import StringIO
+
+
+def make_proc_dir(tmpdir, pid=42, ticks=(100, 50), rss_kb=2048,
+                  threads=5, fds=3):
+    """Create a fake /proc entry for pid"""
+    path = os.path.join(tmpdir, str(pid))
+    if not os.path.isdir(os.path.join(path, 'fd')):
+        os.makedirs(os.path.join(path, 'fd'))
+    with open(os.path.join(path, 'stat'), 'w') as stat:
+        fields = ['S'] + ['0'] * 10 + [str(ticks[0]), str(ticks[1])] + \
+            ['0'] * 30
+        stat.write('{0} (gst-switch srv) {1}\n'.format(pid, ' '.join(fields)))
+    with open(os.path.join(path, 'status'), 'w') as status:
+        status.write('Name:\tgst-switch-srv\nVmRSS:\t  {0} kB\n'
+                     'Threads:\t{1}\n'.format(rss_kb, threads))
+    for name in os.listdir(os.path.join(path, 'fd')):
+        os.remove(os.path.join(path, 'fd', name))
+    for num in range(fds):
+        open(os.path.join(path, 'fd', str(num)), 'w').close()
+
+
+class TestResourceSampler(object):
+
+    """Test the ResourceSampler"""
+
+    def test_invalid_interval(self):
+        """Test that the interval must be positive"""
+        with pytest.raises(ValueError):
+            ResourceSampler(1, interval=0)
+
+    def test_sample(self, tmpdir):
+        """Test that the files of procfs are parsed"""
+        tmpdir = str(tmpdir)
+        make_proc_dir(tmpdir)
+        sampler = ResourceSampler(42, proc_dir=tmpdir)
+        with patch('gstswitch.sampler.time.time', return_value=10.0):
+            first = sampler.sample()
+        assert first == ResourceSample(10.0, None, 2048 * 1024, 5, 3)
+
+        make_proc_dir(tmpdir, ticks=(100 + CLOCK_TICKS, 50), fds=4)
+        with patch('gstswitch.sampler.time.time', return_value=12.0):
+            second = sampler.sample()
+        assert second.cpu_percent == 50.0
+        assert second.fds == 4
+        assert len(sampler.samples) == 2
+
+    def test_own_process(self):
+        """Test sampling a real process"""
+        sampler = ResourceSampler(os.getpid())
+        res = sampler.sample()
+        assert res.rss > 0
+        assert res.threads >= 1
+        assert res.fds >= 3
+
+    def test_stops_when_gone(self):
+        """Test that the thread ends when the process exits"""
+        proc = subprocess.Popen(['true'])
+        proc.wait()
+        sampler = ResourceSampler(proc.pid, interval=0.01).start()
+        sampler._thread.join(5)
+        assert not sampler._thread.is_alive()
+        sampler.stop()
+        assert len(sampler.samples) == 0
+
+    def test_background(self):
+        """Test that the thread keeps sampling until stopped"""
+        proc = subprocess.Popen(['sleep', '5'])
+        try:
+            with ResourceSampler(proc.pid, interval=0.01,
+                                 max_samples=3) as sampler:
+                while len(sampler.samples) < 3:
+                    sampler._stop.wait(0.01)
+        finally:
+            proc.kill()
+            proc.wait()
+        assert len(sampler.samples) == 3
+        assert sampler.samples[-1].cpu_percent is not None
+
+    def test_export(self, tmpdir):
+        """Test the summary and the CSV and JSON export"""
+        tmpdir = str(tmpdir)
+        sampler = ResourceSampler(42, proc_dir=tmpdir)
+        for fds in (3, 5):
+            make_proc_dir(tmpdir, fds=fds)
+            sampler.sample()
+
+        summary = sampler.summary()
+        assert summary['fds'] == {'min': 3, 'mean': 4.0, 'max': 5}
+        assert summary['cpu_percent']['max'] == 0.0
+
+        output = StringIO()
+        sampler.write_csv(output)
+        lines = output.getvalue().splitlines()
+        assert lines[0] == 'time,cpu_percent,rss,threads,fds'
+        assert lines[1].endswith(',,2097152,5,3')
+        assert len(lines) == 3
+
+        output = StringIO()
+        sampler.write_json(output)
+        report = json.loads(output.getvalue())
+        assert report['pid'] == 42
+        assert [res['fds'] for res in report['samples']] == [3, 5]
@@ -3,12 +3,14 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
 
-from gstswitch.server import Server
+from gstswitch.server import Server, ServerPool
 from gstswitch.process_monitor import ProcessMonitor
+from gstswitch.stubserver import StubServer
 import pytest
 from gstswitch.exception import ServerProcessError, PathError
 from gstswitch.exception import MatchTimeoutError
 import subprocess
+import socket
 from errno import ENOENT
 from distutils import spawn
 from mock import Mock, patch
@@ -226,6 +228,17 @@ class TestRecordFile(object):
 --controller-address=tcp:host=::,port=5000".split() + \
             ["--record=record 1.data"]
 
+    def test_input_sockets(self):
+        """Test that the input sockets are passed to the server"""
+        serv = Server(path='/usr', video_socket='/tmp/video.sock',
+                      audio_socket='/tmp/audio.sock')
+        serv._start_process = lambda cmd: cmd
+        assert serv._run_process() == "/usr/gst-switch-srv \
+--video-input-port=3000 --audio-input-port=4000 \
+--controller-address=tcp:host=::,port=5000 \
+--video-input-socket=/tmp/video.sock \
+--audio-input-socket=/tmp/audio.sock".split()
+
     def test_record_file_invalid(self):
         """Test when the record_file is invalid"""
         files = ['', None, [], {}]
@@ -371,6 +384,20 @@ class TestRun(object):
                 serv._start_process('cmd')
                 mock.assert_called_with('cmd', 123)
 
+    def test_drain_output(self):
+        """Test drain_output=True property"""
+        with patch('gstswitch.server.ProcessMonitor') as mock:
+            serv = Server(path='abc', log_to_file=False, drain_output=True)
+            serv._start_process('cmd')
+            mock.assert_called_with('cmd', drain=True)
+
+    def test_cpus(self):
+        """Test that the cpus are passed on"""
+        with patch('gstswitch.server.ProcessMonitor') as mock:
+            serv = Server(path='abc', log_to_file=False, cpus=set([1]))
+            serv._start_process('cmd')
+            mock.assert_called_with('cmd', cpus=set([1]))
+
     def test_raises_enoent(self):
         """Test what happens when ProcessMonitor raises an OSError ENOENT"""
         with patch('gstswitch.server.ProcessMonitor') as mock:
@@ -551,3 +578,195 @@ class TestWaitForOutput(object):
 
         with pytest.raises(MatchTimeoutError):
             serv.wait_for_output("foo", timeout=123, count=456)
+
+
+class TestEvents(object):
+
+    """Test the event delegates"""
+
+    def test_wait_for_event(self):
+        """Test that wait_for_event returns the event of the
+            ProcessMonitor
+        """
+        serv = Server()
+        serv.proc = Mock()
+        serv.proc.wait_for_event.return_value = 'event'
+        assert serv.wait_for_event('port_opened', 3, 2, port=3000) == 'event'
+        serv.proc.wait_for_event.assert_called_once_with(
+            'port_opened', 3, 2, port=3000)
+
+    def test_sample_resources(self):
+        """Test that sampling is delegated to the ProcessMonitor"""
+        serv = Server()
+        serv.proc = Mock()
+        assert serv.sample_resources(0.5) == \
+            serv.proc.sample_resources.return_value
+        serv.proc.sample_resources.assert_called_once_with(0.5, None)
+
+    def test_startup_time(self):
+        """Test that the startup time is taken from the first
+            controller_listening event
+        """
+        serv = Server()
+        serv.proc = Mock()
+        serv.proc.time_to.return_value = 0.5
+        assert serv.startup_time() == 0.5
+        serv.proc.time_to.assert_called_once_with('controller_listening')
+
+
+def unused_address():
+    """Get an address nobody listens on"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return 'tcp:host=127.0.0.1,port={0}'.format(port)
+
+
+class TestWaitReady(object):
+
+    """Test probing the server until it is ready"""
+
+    def test_client_address(self):
+        """Test that wildcard hosts are replaced"""
+        serv = Server(controller_address='tcp:host=::,port=5000')
+        assert serv.client_address == 'tcp:host=127.0.0.1,port=5000'
+        serv.controller_address = 'tcp:host=0.0.0.0,port=5001,family=ipv4'
+        assert serv.client_address == \
+            'tcp:host=127.0.0.1,port=5001,family=ipv4'
+        serv.controller_address = 'unix:path=/tmp/foo'
+        assert serv.client_address == 'unix:path=/tmp/foo'
+
+    def test_ready(self):
+        """Test that run returns the time until the server answered"""
+        with StubServer() as stub:
+            serv = Server(path='abc', controller_address=stub.client_address)
+            proc = Mock()
+            proc.poll.return_value = None
+            serv._run_process = Mock(return_value=proc)
+            ready = serv.run(wait_ready=True)
+            assert ready == serv.ready_time
+            assert ready >= 0
+            assert stub.calls['get_compose_port'] == 1
+
+    def test_backoff(self):
+        """Test that the delay between probes doubles up to max_delay"""
+        serv = Server(controller_address=unused_address())
+        serv.proc = Mock()
+        serv.proc.poll.return_value = None
+        serv.start_time = 0
+        with patch('gstswitch.server.time.sleep') as sleep:
+            with pytest.raises(ServerProcessError):
+                serv.wait_ready(timeout=0.2, initial_delay=0.01,
+                                max_delay=0.04)
+        delays = [args[0] for args, _ in sleep.call_args_list]
+        assert delays[:3] == [0.01, 0.02, 0.04]
+        assert max(delays) <= 0.04
+        assert serv.ready_time is None
+
+    def test_exited(self):
+        """Test that waiting stops when the server exits"""
+        serv = Server(controller_address=unused_address())
+        serv.proc = Mock()
+        serv.proc.poll.return_value = 1
+        serv.start_time = 0
+        with pytest.raises(ServerProcessError):
+            serv.wait_ready(timeout=5)
+
+
+class TestServerPool(object):
+
+    """Test running several servers side by side"""
+
+    def test_invalid(self):
+        """Test that impossible pools are rejected"""
+        with pytest.raises(ValueError):
+            ServerPool(0)
+        with pytest.raises(ValueError):
+            ServerPool(2, port_span=4)
+        with pytest.raises(ValueError):
+            ServerPool(2, cpus=[])
+
+    def test_allocate_ports(self):
+        """Test that blocks with a port in use are skipped"""
+        pool = ServerPool(2, base_port=30000, port_span=100)
+        with patch.object(ServerPool, 'port_is_free',
+                          side_effect=lambda port: port != 30198):
+            blocks = pool.allocate_ports()
+        assert blocks == [(30000, 30098, 30099), (30200, 30298, 30299)]
+
+    def test_allocate_compose_port(self):
+        """Test that a block with its compose or encode port in use is
+        skipped
+        """
+        pool = ServerPool(2, base_port=30000, port_span=10)
+        with patch.object(ServerPool, 'port_is_free',
+                          side_effect=lambda port: port not in (30001,
+                                                                30012)):
+            blocks = pool.allocate_ports()
+        assert blocks == [(30020, 30028, 30029), (30030, 30038, 30039)]
+
+    def test_not_enough_ports(self):
+        """Test that running out of ports raises"""
+        pool = ServerPool(2, base_port=65400, port_span=100)
+        with patch.object(ServerPool, 'port_is_free', return_value=True):
+            with pytest.raises(ServerProcessError):
+                pool.allocate_ports()
+
+    def test_port_is_free(self):
+        """Test that a listening port is detected"""
+        sock = socket.socket()
+        sock.bind(('', 0))
+        sock.listen(1)
+        try:
+            assert not ServerPool.port_is_free(sock.getsockname()[1])
+        finally:
+            sock.close()
+
+    def test_start(self):
+        """Test that every server gets its own ports, log and CPUs"""
+        pool = ServerPool(3, path='abc', base_port=20000, port_span=10,
+                          cpus=[0, (1, 2)], video_format='debug')
+        with patch.object(ServerPool, 'port_is_free', return_value=True):
+            with patch.object(Server, 'run') as run:
+                pool.start(wait_ready=False)
+        assert run.call_count == 3
+        assert len(pool) == 3
+        assert [(serv.video_port, serv.audio_port, serv.controller_address)
+                for serv in pool] == [
+            (20000, 20008, 'tcp:host=::,port=20009'),
+            (20010, 20018, 'tcp:host=::,port=20019'),
+            (20020, 20028, 'tcp:host=::,port=20029')]
+        assert [serv.cpus for serv in pool] == [set([0]), set([1, 2]),
+                                                set([0])]
+        assert [serv.log_file for serv in pool] == [
+            'server-0.log', 'server-1.log', 'server-2.log']
+        assert pool[1].video_format == 'debug'
+        assert pool[2].client_address == 'tcp:host=127.0.0.1,port=20029'
+
+    def test_failed_start(self):
+        """Test that the started servers are terminated when one fails"""
+        pool = ServerPool(2, path='abc', base_port=20000)
+        procs = []
+
+        def run(serv):
+            """Start the first server, fail the second"""
+            if procs:
+                raise PathError('abc')
+            serv.proc = Mock()
+            procs.append(serv.proc)
+
+        with patch.object(ServerPool, 'port_is_free', return_value=True):
+            with patch.object(Server, 'run', autospec=True, side_effect=run):
+                with pytest.raises(PathError):
+                    pool.start()
+        procs[0].terminate.assert_called_once_with()
+        assert len(pool) == 0
+
+    def test_cpus_true(self):
+        """Test that True pins to every allowed CPU in turn"""
+        if not hasattr(os, 'sched_getaffinity'):
+            pytest.skip("no CPU affinity on this platform")
+        pool = ServerPool(1, cpus=True)
+        assert pool.cpu_sets == [set([cpu]) for cpu in
+                                 sorted(os.sched_getaffinity(0))]
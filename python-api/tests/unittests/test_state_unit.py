@@ -0,0 +1,137 @@
+"""Unittests for the server state mirrors in state.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.state import PreviewPort, PreviewPortTable, ServerState
+from gstswitch.controller import Controller
+from gi.repository import GLib
+import pytest
+from mock import Mock
+
+
+def make_controller(ports):
+    """Create a Controller whose server knows about ports"""
+    controller = Controller(address='unix:abstract=abcd')
+    controller.get_preview_port_list = Mock(return_value=ports)
+    return controller
+
+
+def emit(controller, signal, *args, **kwargs):
+    """Deliver a Signal to the Controller"""
+    signature = kwargs.get('signature', '(iii)')
+    controller.cb_signal_handler(
+        None, ':0', '/us/timvideos/gstswitch/SwitchController',
+        'us.timvideos.gstswitch.SwitchControllerInterface',
+        signal, GLib.Variant(signature, args), None)
+
+
+class TestPreviewPortTable(object):
+
+    """Test the PreviewPortTable"""
+
+    def test_snapshot(self):
+        """Test that the table is filled from a snapshot"""
+        table = PreviewPortTable(make_controller(
+            [(3003, 1, 7), (3004, 1, 8), (3005, 2, 9)]))
+        assert table.ports() == [3003, 3004, 3005]
+        assert table.video_ports() == [3003, 3004]
+        assert table.audio_ports() == [3005]
+        assert table.get(3004) == PreviewPort(3004, 1, 8)
+        assert table.get(3010) is None
+        assert 3005 in table
+        assert len(table) == 3
+
+    def test_no_refresh(self):
+        """Test that no round trip is made without refresh"""
+        controller = make_controller([(3003, 1, 7)])
+        table = PreviewPortTable(controller, refresh=False)
+        assert not controller.get_preview_port_list.called
+        assert len(table) == 0
+
+    def test_signals(self):
+        """Test that the table follows the Signals"""
+        controller = make_controller([(3003, 1, 7)])
+        table = PreviewPortTable(controller)
+
+        emit(controller, 'preview_port_added', 3004, 1, 8)
+        assert table.ports() == [3003, 3004]
+
+        emit(controller, 'preview_port_removed', 3003, 1, 7)
+        assert list(table) == [PreviewPort(3004, 1, 8)]
+
+        # removing an unknown port is not an error
+        emit(controller, 'preview_port_removed', 3003, 1, 7)
+        assert table.ports() == [3004]
+        assert controller.get_preview_port_list.call_count == 1
+
+
+def make_state_controller():
+    """Create a Controller for a ServerState snapshot"""
+    controller = make_controller([(3003, 1, 7), (3004, 1, 8)])
+    controller.get_compose_port = Mock(return_value=3001)
+    controller.get_encode_port = Mock(return_value=3002)
+    controller.get_audio_port = Mock(return_value=4001)
+    controller.get_composite_mode = Mock(
+        return_value=Controller.COMPOSITE_DUAL_EQUAL)
+    return controller
+
+
+class TestServerState(object):
+
+    """Test the ServerState"""
+
+    def test_snapshot(self):
+        """Test that the state is filled from a snapshot"""
+        state = ServerState(make_state_controller())
+        assert state.compose_port == 3001
+        assert state.encode_port == 3002
+        assert state.audio_port == 4001
+        assert state.composite_mode == Controller.COMPOSITE_DUAL_EQUAL
+        assert state.preview_ports.ports() == [3003, 3004]
+        assert state.version == 1
+
+    def test_no_refresh(self):
+        """Test that no round trip is made without refresh"""
+        controller = make_state_controller()
+        state = ServerState(controller, refresh=False)
+        assert not controller.get_compose_port.called
+        assert state.compose_port is None
+        assert state.version == 0
+
+    def test_invalid_callback(self):
+        """Test that a not-callable callback is rejected"""
+        state = ServerState(make_state_controller(), refresh=False)
+        with pytest.raises(ValueError):
+            state.on_change(123)
+
+    def test_signals(self):
+        """Test that the state follows the Signals"""
+        controller = make_state_controller()
+        state = ServerState(controller)
+        callback = Mock()
+        state.on_change(callback)
+
+        emit(controller, 'new_mode_online', Controller.COMPOSITE_PIP,
+             signature='(i)')
+        assert state.composite_mode == Controller.COMPOSITE_PIP
+        callback.assert_called_with(
+            'composite_mode', Controller.COMPOSITE_PIP, 2)
+
+        emit(controller, 'preview_port_added', 3005, 2, 9)
+        assert state.preview_ports.audio_ports() == [3005]
+        callback.assert_called_with('preview_ports', state.preview_ports, 3)
+
+        emit(controller, 'show_face_marker', [(1, 2, 3, 4)],
+             signature='(a(iiii))')
+        assert state.face_markers == [(1, 2, 3, 4)]
+
+        emit(controller, 'show_track_marker', [(5, 6, 7, 8)],
+             signature='(a(iiii))')
+        assert state.track_markers == [(5, 6, 7, 8)]
+
+        emit(controller, 'select_face', 10, 20, signature='(ii)')
+        assert state.selected_face == (10, 20)
+
+        assert state.version == 6
+        assert callback.call_count == 5
@@ -0,0 +1,29 @@
+"""Unittests for the statistics in stats.py"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.stats import percentile
+
+
+class TestPercentile(object):
+
+    """Test the nearest-rank percentile"""
+
+    def test_empty(self):
+        """Test that no values have no percentile"""
+        assert percentile([], 50) is None
+
+    def test_rank(self):
+        """Test the rank of common percentiles"""
+        assert percentile([1, 2, 3, 4], 50) == 2
+        hundred = list(range(1, 101))
+        assert percentile(hundred, 95) == 95
+        assert percentile(hundred, 99) == 99
+        assert percentile(hundred, 100) == 100
+        assert percentile(list(range(1, 51)), 50) == 25
+
+    def test_bounds(self):
+        """Test that low percentiles get the minimum"""
+        assert percentile([3, 5], 0) == 3
+        assert percentile([3, 5], 1) == 3
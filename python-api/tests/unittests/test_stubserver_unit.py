@@ -0,0 +1,162 @@
+"""Unittests for StubServer class in stubserver.py"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.stubserver import StubServer
+from gstswitch.controller import Controller
+from gstswitch.exception import ConnectionError
+import pytest
+from gi.repository import GLib
+
+
+def dispatch_until(condition, timeout=5):
+    """Dispatch the default main context until condition is met"""
+    context = GLib.MainContext.default()
+    endtime = time.time() + timeout
+    while not condition() and time.time() < endtime:
+        context.iteration(False)
+    return condition()
+
+
+class TestStubServer(object):
+
+    """Test the StubServer through a Controller"""
+
+    def setup_method(self, method):
+        """Start a StubServer and connect a Controller to it"""
+        self.stub = StubServer(video_port=3000, audio_port=4000).start()
+        self.controller = Controller(address=self.stub.client_address)
+
+    def teardown_method(self, method):
+        """Stop the StubServer"""
+        self.controller.close_connection()
+        self.stub.stop()
+
+    def test_invalid_address(self):
+        """Test that an address which cannot be listened on raises"""
+        with pytest.raises(RuntimeError):
+            StubServer(address='foo:bar=baz').start()
+
+    def test_ports(self):
+        """Test the port getters"""
+        assert self.controller.get_compose_port() == 3001
+        assert self.controller.get_encode_port() == 3002
+        assert self.controller.get_audio_port() == 4000
+
+    def test_preview_ports(self):
+        """Test that added sources show up as preview ports"""
+        assert self.controller.get_preview_ports() == []
+        self.stub.add_preview_port()
+        self.stub.add_preview_port()
+        self.stub.add_preview_port(StubServer.SERVE_AUDIO_STREAM)
+        assert self.controller.get_preview_ports() == [3003, 3004, 3005]
+        assert self.controller.get_preview_port_list() == [
+            (3003, 1, 7), (3004, 1, 8), (3005, 2, 9)]
+
+        assert self.stub.remove_preview_port(3004)
+        assert not self.stub.remove_preview_port(3004)
+        assert self.controller.get_preview_ports() == [3003, 3005]
+
+    def test_composite_mode(self):
+        """Test changing the composite mode"""
+        assert self.controller.get_composite_mode() == 3
+        assert self.controller.set_composite_mode(Controller.COMPOSITE_PIP)
+        assert self.controller.get_composite_mode() == Controller.COMPOSITE_PIP
+        assert not self.controller.set_composite_mode(Controller.COMPOSITE_PIP)
+
+    def test_switch(self):
+        """Test that only known ports can be switched to"""
+        self.stub.add_preview_port()
+        port = self.stub.add_preview_port()
+        assert self.controller.switch(Controller.VIDEO_CHANNEL_A, port)
+        assert self.stub.channels[Controller.VIDEO_CHANNEL_A] == port
+        assert not self.controller.switch(Controller.VIDEO_CHANNEL_A, 4567)
+
+    def test_switch_swaps(self):
+        """Test that switching to the port of the other channel swaps A
+        and B like the gst-switch-srv
+        """
+        port_a = self.stub.add_preview_port()
+        port_b = self.stub.add_preview_port()
+        preview = self.stub.add_preview_port()
+        assert self.controller.switch(Controller.VIDEO_CHANNEL_A, port_b)
+        assert self.stub.channels[Controller.VIDEO_CHANNEL_A] == port_b
+        assert self.stub.channels[Controller.VIDEO_CHANNEL_B] == port_a
+        assert not self.controller.switch(Controller.VIDEO_CHANNEL_A, port_b)
+
+        assert self.controller.switch(Controller.VIDEO_CHANNEL_B, preview)
+        assert self.stub.channels[Controller.VIDEO_CHANNEL_B] == preview
+        assert self.controller.get_preview_port_list() == [
+            (port_a, 1, StubServer.TYPE_BRANCH_PREVIEW),
+            (port_b, 1, StubServer.TYPE_BRANCH_VIDEO_A),
+            (preview, 1, StubServer.TYPE_BRANCH_VIDEO_B)]
+
+    def test_switch_serve_type(self):
+        """Test that a video channel cannot be switched to audio"""
+        self.stub.add_preview_port()
+        audio = self.stub.add_preview_port(StubServer.SERVE_AUDIO_STREAM)
+        assert not self.controller.switch(Controller.VIDEO_CHANNEL_A, audio)
+
+    def test_apply_scene(self):
+        """Test that a scene changes channels, mode and PIP at once"""
+        port_a = self.stub.add_preview_port()
+        port_b = self.stub.add_preview_port()
+        assert self.controller.apply_scene(Controller.COMPOSITE_PIP,
+                                      port_b, port_a, 10, 20, 400, 300)
+        assert self.stub.channels[Controller.VIDEO_CHANNEL_A] == port_b
+        assert self.stub.channels[Controller.VIDEO_CHANNEL_B] == port_a
+        assert self.stub.composite_mode == Controller.COMPOSITE_PIP
+        assert self.stub.pip == [10, 20, 400, 300]
+
+    def test_apply_scene_unknown_mode(self):
+        """Test that an unknown mode keeps the current one and still
+        applies the PIP like the gst-switch-srv
+        """
+        assert self.controller.apply_scene(7, -1, -1, 10, 20, 100, 50)
+        assert self.stub.composite_mode == 3
+        assert self.stub.pip == [10, 20, 320, 180]
+        assert self.controller.apply_scene(7)
+        assert self.stub.composite_mode == 3
+        assert self.stub.pip == self.stub._default_pip(3)
+
+    def test_adjust_pip(self):
+        """Test that adjust_pip reports the changed components"""
+        assert self.controller.adjust_pip(1, 0, 0, -1) == 0b1001
+
+    def test_unsupported(self):
+        """Test that set_encode_mode is rejected like in gst-switch-srv"""
+        with pytest.raises(ConnectionError):
+            self.controller.set_encode_mode(1)
+        assert self.stub.calls['set_encode_mode'] == 1
+
+    def test_signals(self):
+        """Test that the Signals reach the Controller"""
+        received = []
+        self.controller.on_preview_port_added(
+            lambda *args: received.append(('added',) + args))
+        self.controller.on_new_mode_online(
+            lambda mode: received.append(('mode', mode)))
+        self.controller.on_show_face_marker(
+            lambda faces: received.append(('faces', faces)))
+        self.controller.on_select_face(
+            lambda xpos, ypos: received.append(('select', xpos, ypos)))
+        # a round trip makes sure the stub knows the client
+        self.controller.get_compose_port()
+
+        self.stub.add_preview_port()
+        self.controller.set_composite_mode(Controller.COMPOSITE_NONE)
+        self.controller.mark_face([(1, 2, 3, 4)])
+        self.controller.click_video(5, 6, 1280, 720)
+
+        assert dispatch_until(lambda: len(received) == 4)
+        assert received == [('added', 3003, 1, 7),
+                            ('mode', Controller.COMPOSITE_NONE),
+                            ('faces', [(1, 2, 3, 4)]),
+                            ('select', 5, 6)]
+
+    def test_unknown_signal(self):
+        """Test that only signals of the interface can be emitted"""
+        with pytest.raises(ValueError):
+            self.stub.emit_signal('foobar', 1)
@@ -0,0 +1,297 @@
+"""Unittests for Supervisor class in supervisor.py"""
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
+
+from gstswitch.supervisor import Supervisor
+from gstswitch.controller import Controller
+from gstswitch.exception import ServerProcessError, PathError
+import pytest
+from mock import Mock
+
+A = Controller.VIDEO_CHANNEL_A
+B = Controller.VIDEO_CHANNEL_B
+
+
+class MockProcess(object):
+
+    """A process which exits when told to"""
+
+    def __init__(self):
+        self.exited = threading.Event()
+        self.returncode = None
+
+    def exit(self, returncode):
+        """Let wait return returncode"""
+        self.returncode = returncode
+        self.exited.set()
+
+    def wait(self):
+        """Block until exit is called"""
+        self.exited.wait()
+        return self.returncode
+
+
+def make_server():
+    """Create a Server whose run starts a new MockProcess"""
+    server = Mock()
+    server.gst_option_string = ''
+    server.proc = None
+    server.drain_output = False
+
+    def run(*args, **kwargs):
+        """Start a new process"""
+        server.proc = MockProcess()
+
+    def terminate():
+        """Stop the process"""
+        if server.proc is None:
+            raise ServerProcessError('Server Process does not exist')
+        server.proc.exit(-15)
+        server.proc = None
+
+    server.run.side_effect = run
+    server.terminate.side_effect = terminate
+    return server
+
+
+def make_controller(ports=(3003, 3004)):
+    """Create a Controller accepting every command"""
+    controller = Mock()
+    controller.set_composite_mode.return_value = True
+    controller.switch.return_value = True
+    controller.apply_scene.return_value = True
+    controller.adjust_pip.return_value = 0b1111
+    controller.get_preview_ports.return_value = list(ports)
+    return controller
+
+
+class TestRecord(object):
+
+    """Test recording the control state"""
+
+    def test_mode_resets_pip(self):
+        """Test that a new mode drops the recorded PIP"""
+        sup = Supervisor(make_server(), make_controller())
+        sup.adjust_pip(10, 20, 0, 0)
+        sup.adjust_pip(5, 0, 30, 0)
+        assert sup.pip_delta == (15, 20, 30, 0)
+        assert sup.set_composite_mode(Controller.COMPOSITE_PIP)
+        assert sup.composite_mode == Controller.COMPOSITE_PIP
+        assert sup.pip_delta == (0, 0, 0, 0)
+
+    def test_failed_commands(self):
+        """Test that rejected commands are not recorded"""
+        controller = make_controller()
+        controller.set_composite_mode.return_value = False
+        controller.switch.return_value = False
+        sup = Supervisor(make_server(), controller)
+        sup.set_composite_mode(Controller.COMPOSITE_PIP)
+        sup.switch(A, 3003)
+        assert sup.composite_mode is None
+        assert sup.channels == {}
+
+    def test_rejected_pip(self):
+        """Test that a PIP change the server rejected is not recorded"""
+        controller = make_controller()
+        sup = Supervisor(make_server(), controller)
+        sup.adjust_pip(10, 0, 0, 0)
+        controller.adjust_pip.return_value = 0
+        sup.adjust_pip(5, 5, 5, 5)
+        assert sup.pip_delta == (10, 0, 0, 0)
+
+    def test_switch_swaps(self):
+        """Test that switching to the port of the other channel records
+        the swap the server makes
+        """
+        sup = Supervisor(make_server(), make_controller())
+        sup.switch(A, 3003)
+        sup.switch(B, 3004)
+        sup.switch(A, 3004)
+        assert sup.channels == {A: 3004, B: 3003}
+        sup.switch(B, 3005)
+        assert sup.channels == {A: 3004, B: 3005}
+
+    def test_scene(self):
+        """Test that a scene records ports, mode and an absolute PIP"""
+        sup = Supervisor(make_server(), make_controller())
+        sup.adjust_pip(1, 1, 1, 1)
+        assert sup.apply_scene(Controller.COMPOSITE_PIP, 3004, 3003,
+                               -5, 20, 300, 200)
+        assert sup.channels == {A: 3004, B: 3003}
+        assert sup.pip == (0, 20, 300, 200)
+        assert sup.pip_delta == (0, 0, 0, 0)
+        sup.adjust_pip(10, 0, 0, -20)
+        assert sup.pip == (10, 20, 300, 180)
+
+
+class TestReplay(object):
+
+    """Test replaying the control state"""
+
+    def test_nothing(self):
+        """Test that nothing is sent without a recorded state"""
+        controller = make_controller()
+        sup = Supervisor(make_server(), controller)
+        assert sup.replay() == []
+        assert not controller.apply_scene.called
+        assert not controller.adjust_pip.called
+
+    def test_one_scene(self):
+        """Test that channels, mode and PIP are replayed in one scene"""
+        controller = make_controller()
+        sup = Supervisor(make_server(), controller)
+        sup.apply_scene(Controller.COMPOSITE_PIP, 3004, 3003,
+                        10, 20, 300, 200)
+        sup.switch(Controller.AUDIO_CHANNEL, 3003)
+        controller.reset_mock()
+
+        assert sup.replay() == []
+        controller.apply_scene.assert_called_once_with(
+            Controller.COMPOSITE_PIP, 3004, 3003, 10, 20, 300, 200)
+        controller.switch.assert_called_once_with(
+            Controller.AUDIO_CHANNEL, 3003)
+        assert not controller.adjust_pip.called
+
+    def test_pip_delta(self):
+        """Test that PIP movements are replayed after the mode"""
+        controller = make_controller()
+        sup = Supervisor(make_server(), controller)
+        sup.set_composite_mode(Controller.COMPOSITE_PIP)
+        sup.adjust_pip(10, 0, -5, 0)
+        controller.reset_mock()
+
+        sup.replay()
+        controller.apply_scene.assert_called_once_with(
+            Controller.COMPOSITE_PIP, -1, -1, 0, 0, -1, -1)
+        controller.adjust_pip.assert_called_once_with(10, 0, -5, 0)
+
+    def test_swapped_channels(self):
+        """Test that a swap of A and B is replayed as it is on the server"""
+        controller = make_controller()
+        sup = Supervisor(make_server(), controller)
+        sup.switch(A, 3003)
+        sup.switch(B, 3004)
+        sup.switch(A, 3004)
+        controller.reset_mock()
+
+        sup.replay()
+        controller.apply_scene.assert_called_once_with(
+            -1, 3004, 3003, 0, 0, -1, -1)
+
+    def test_missing_port(self):
+        """Test that ports which do not come back are skipped"""
+        controller = make_controller(ports=[3003])
+        sup = Supervisor(make_server(), controller, port_timeout=0.1)
+        sup.switch(A, 3003)
+        sup.switch(B, 3004)
+        controller.reset_mock()
+
+        assert sup.replay() == [3004]
+        controller.apply_scene.assert_called_once_with(
+            -1, 3003, -1, 0, 0, -1, -1)
+
+
+class TestSupervise(object):
+
+    """Test restarting the server"""
+
+    def test_restart(self):
+        """Test that an exited server is restarted and the state replayed"""
+        server = make_server()
+        controller = make_controller()
+        restarted = threading.Event()
+        sup = Supervisor(server, controller,
+                         on_restart=lambda sup: restarted.set())
+        sup.start()
+        assert server.run.call_count == 1
+        sup.switch(A, 3004)
+        controller.reset_mock()
+
+        server.proc.exit(-11)
+        assert restarted.wait(5)
+        sup.stop(5)
+
+        assert server.run.call_count == 2
+        controller.establish_connection.assert_called_once_with(force=True)
+        controller.apply_scene.assert_called_once_with(
+            -1, 3004, -1, 0, 0, -1, -1)
+        assert len(sup.recoveries) == 1
+        recovery = sup.recoveries[0]
+        assert recovery.returncode == -11
+        assert 0 <= recovery.time_to_ready <= recovery.time_to_recover
+        assert recovery.missing_ports == []
+
+    def test_stop(self):
+        """Test that terminating through stop does not restart"""
+        server = make_server()
+        sup = Supervisor(server, make_controller()).start()
+        sup.stop(5)
+        assert server.run.call_count == 1
+        assert sup.recoveries == []
+
+    def test_max_restarts(self):
+        """Test that the server is not restarted too often"""
+        server = make_server()
+        sup = Supervisor(server, make_controller(), max_restarts=0).start()
+        server.proc.exit(-11)
+        sup._thread.join(5)
+        assert not sup._thread.is_alive()
+        assert server.run.call_count == 1
+        sup.stop(5)
+
+    def test_drain_output(self):
+        """Test that the output of a supervised server is drained"""
+        server = make_server()
+        Supervisor(server, make_controller())
+        assert server.drain_output is True
+
+        server = make_server()
+        server.proc = MockProcess()
+        with pytest.raises(ServerProcessError):
+            Supervisor(server, make_controller())
+
+    def test_failed_restarts(self):
+        """Test that failed restarts are attempted again with a delay"""
+        server = make_server()
+        start = server.run.side_effect
+        errors = [ServerProcessError('not ready'), PathError('gone')]
+
+        def run(*args, **kwargs):
+            """Fail the first two restarts"""
+            if server.run.call_count > 1 and errors:
+                raise errors.pop(0)
+            start()
+
+        server.run.side_effect = run
+        restarted = threading.Event()
+        sup = Supervisor(server, make_controller(), restart_delay=0.01,
+                         on_restart=lambda sup: restarted.set()).start()
+        server.proc.exit(-11)
+        assert restarted.wait(5)
+        sup.stop(5)
+        assert server.run.call_count == 4
+        assert sup.restarts == 3
+        assert len(sup.recoveries) == 1
+
+    def test_max_failed_restarts(self):
+        """Test that failed restarts count towards max_restarts"""
+        server = make_server()
+        sup = Supervisor(server, make_controller(), max_restarts=2,
+                         restart_delay=0.01).start()
+        server.run.side_effect = ServerProcessError('not ready')
+        server.proc.exit(-11)
+        sup._thread.join(5)
+        assert not sup._thread.is_alive()
+        assert server.run.call_count == 3
+        assert sup.restarts == 2
+        assert sup.recoveries == []
+        sup.stop(5)
+
+    def test_twice(self):
+        """Test that a running Supervisor cannot be started again"""
+        sup = Supervisor(make_server(), make_controller()).start()
+        with pytest.raises(ServerProcessError):
+            sup.start()
+        sup.stop(5)
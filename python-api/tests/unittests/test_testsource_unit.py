@@ -6,7 +6,12 @@ sys.path.insert(0, os.path.abspath(os.path.join(__file__, "../../../")))
 from gstswitch.exception import RangeError
 from gstswitch.testsource import Preview, VideoSrc
 from gstswitch.testsource import BasePipeline, VideoPipeline, AudioSrc
+from gstswitch.testsource import SharedPipeline, FrameLoop, RenderedVideo
+from gstswitch.testsource import render_video, LoopingVideoSrc
+from gstswitch.testsource import MosaicPipeline
+from gstswitch.exception import InvalidIndexError
 import pytest
+import socket
 from mock import Mock
 from gi.repository import Gst
 
@@ -466,3 +471,183 @@ class TestAudioSrcPlay(object):
         src = AudioSrc(port=3000)
         src.pipeline = MockPipeline()
         src.end()
+
+
+class TestSharedPipeline(object):
+
+    """Test the branches of a SharedPipeline"""
+
+    def test_add_remove(self):
+        """Add and remove branches while the pipeline is playing"""
+        pipeline = SharedPipeline()
+        pipeline.play()
+        video = pipeline.add_video(3000, pattern=4, timeoverlay=True)
+        audio = pipeline.add_audio(4000, wave=1)
+        assert pipeline.branches == [video, audio]
+        assert pipeline.get_by_name('video0_timeoverlay') is not None
+        assert pipeline.get_by_name('audio1_src').get_property('is-live')
+
+        pipeline.remove_branch(video)
+        assert pipeline.branches == [audio]
+        assert pipeline.get_by_name('video0_src') is None
+        assert pipeline.get_by_name('audio1_tcpclientsink') is not None
+        pipeline.disable()
+
+    def test_remove_unknown(self):
+        """Removing an unknown branch raises"""
+        pipeline = SharedPipeline()
+        with pytest.raises(InvalidIndexError):
+            pipeline.remove_branch(1)
+
+
+class TestMosaicPipeline(object):
+
+    """Test the tiles of a MosaicPipeline"""
+
+    def test_tiles(self):
+        """Ports fill the tiles row by row and free them on removal"""
+        pipeline = MosaicPipeline([3003, 3004, 3005], tile_width=160,
+                                  tile_height=120, columns=2)
+        assert pipeline.ports == [3003, 3004, 3005]
+        assert pipeline.tile_position(2) == (0, 120)
+        assert pipeline.get_by_name('port3005_src').get_property(
+            'port') == 3005
+
+        pipeline.remove_port(3004)
+        assert pipeline.ports == [3003, 3005]
+        assert pipeline.get_by_name('port3004_src') is None
+        assert pipeline.add_port(3006) == 1
+
+    def test_add_twice(self):
+        """Showing a port twice raises"""
+        pipeline = MosaicPipeline([3003])
+        with pytest.raises(ValueError):
+            pipeline.add_port(3003)
+
+    def test_remove_unknown(self):
+        """Removing a port not shown raises"""
+        pipeline = MosaicPipeline()
+        with pytest.raises(InvalidIndexError):
+            pipeline.remove_port(3003)
+
+    def test_sink(self):
+        """Only a fakesink or an appsink are accepted"""
+        pipeline = MosaicPipeline(sink='appsink')
+        assert pipeline.sink.get_property('drop')
+        with pytest.raises(ValueError):
+            MosaicPipeline(sink='xvimagesink')
+
+
+class TestUnixSink(object):
+
+    """Test sending to a unix-domain socket of the server"""
+
+    def setup_method(self, method):
+        """Listen like the --video-input-socket of the server"""
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    def teardown_method(self, method):
+        """Stop listening"""
+        self.listener.close()
+
+    def listen(self, tmpdir):
+        """Listen on a socket in tmpdir and return its path"""
+        path = str(tmpdir.join('video.sock'))
+        self.listener.bind(path)
+        self.listener.listen(5)
+        return path
+
+    def test_video(self, tmpdir):
+        """The pipeline connects at once and disconnects on disable"""
+        path = self.listen(tmpdir)
+        pipeline = VideoPipeline(port=3000, pattern=10, socket_path=path)
+        conn, _ = self.listener.accept()
+        assert pipeline.get_by_name('tcpclientsink') is None
+        assert pipeline.get_by_name('fdsink').get_property('fd') > 2
+        pipeline.disable()
+        assert conn.recv(1) == b''
+        conn.close()
+
+    def test_no_server(self, tmpdir):
+        """Connecting to a socket nobody listens on raises"""
+        with pytest.raises(socket.error):
+            VideoPipeline(port=3000, pattern=10,
+                          socket_path=str(tmpdir.join('missing.sock')))
+
+    def test_shared_branch(self, tmpdir):
+        """Removing a branch closes its connection only"""
+        path = self.listen(tmpdir)
+        pipeline = SharedPipeline(video_socket=path)
+        first = pipeline.add_video(3000, pattern=4)
+        pipeline.add_video(3000, pattern=5)
+        conn1, _ = self.listener.accept()
+        conn2, _ = self.listener.accept()
+        assert pipeline.get_by_name('video0_fdsink') is not None
+        pipeline.remove_branch(first)
+        assert conn1.recv(1) == b''
+        pipeline.disable()
+        assert conn2.recv(1) == b''
+        conn1.close()
+        conn2.close()
+
+
+class TestRenderedVideo(object):
+
+    """Test rendering and looping frames"""
+
+    def test_render(self):
+        """Render a few frames"""
+        rendered = render_video(width=64, height=48, pattern=4, frames=3)
+        assert len(rendered.buffers) == 3
+        assert rendered.frame_duration == Gst.SECOND // 25
+        assert rendered.caps.get_structure(0).get_value('width') == 64
+
+    def test_render_nothing(self):
+        """Rendering no frame is rejected"""
+        with pytest.raises(RangeError):
+            render_video(frames=0)
+
+    def test_render_error(self):
+        """A pipeline which cannot render raises instead of blocking"""
+        with pytest.raises(RuntimeError):
+            render_video(width=0, height=48, frames=2, timeout=5)
+
+    def test_loop_buffer(self):
+        """A rendered buffer is pushed whole"""
+        frame = Gst.Buffer.new_wrapped(bytes(bytearray(100)))
+        rendered = RenderedVideo(Gst.Caps.from_string('video/x-raw'),
+                                 [frame], 40)
+        appsrc = Mock()
+        appsrc.get_clock.return_value = None
+        loop = FrameLoop(appsrc, rendered)
+        loop.cb_need_data(appsrc, 0)
+        pushed = appsrc.emit.call_args[0][1]
+        assert pushed.get_size() == 100
+        assert pushed.pts == 0
+
+    def test_loop(self):
+        """The frames are pushed round robin with continuing timestamps"""
+        frames = [Mock(), Mock()]
+        frames[0].get_size.return_value = 100
+        rendered = RenderedVideo('caps', frames, 40)
+        appsrc = Mock()
+        appsrc.get_clock.return_value = None
+        loop = FrameLoop(appsrc, rendered)
+        appsrc.connect.assert_called_once_with('need-data', loop.cb_need_data)
+
+        for _ in range(3):
+            loop.cb_need_data(appsrc, 0)
+        pushed = [args[1] for args, _ in appsrc.emit.call_args_list]
+        assert pushed == [frames[0].copy_region.return_value,
+                          frames[1].copy_region.return_value,
+                          frames[0].copy_region.return_value]
+        assert pushed[-1].pts == 80
+        assert pushed[-1].duration == 40
+
+    def test_looping_src(self):
+        """A looping source can be played and ended"""
+        rendered = render_video(width=64, height=48, frames=2)
+        src = LoopingVideoSrc(3000, rendered, pattern='0')
+        src.pipeline = MockPipeline()
+        src.run()
+        src.end()
@@ -69,6 +69,7 @@ extern gboolean verbose;
 G_DEFINE_TYPE (GstComposite, gst_composite, GST_TYPE_WORKER);
 
 static void gst_composite_set_mode (GstComposite *, GstCompositeMode);
+static void gst_composite_layout_mode (GstComposite *, GstCompositeMode);
 static void gst_composite_start_transition (GstComposite *);
 
 /**
@@ -150,6 +151,21 @@ gst_composite_set_mode (GstComposite * composite, GstCompositeMode mode)
     return;
   }
 
+  gst_composite_layout_mode (composite, mode);
+  gst_composite_start_transition (composite);
+}
+
+/**
+ * gst_composite_layout_mode:
+ *
+ * Compute the geometry of the A and B channels of a composite mode,
+ * without touching the pipeline.
+ *
+ * @see %GstCompositeMode
+ */
+static void
+gst_composite_layout_mode (GstComposite * composite, GstCompositeMode mode)
+{
   composite->width = gst_composite_default_width ();
   composite->height = gst_composite_default_height ();
 
@@ -211,8 +227,47 @@ gst_composite_set_mode (GstComposite * composite, GstCompositeMode mode)
      composite->a_width, composite->a_height,
      composite->b_width, composite->b_height);
    */
+}
+
+/**
+ * gst_composite_set_scene:
+ *  @param composite The GstComposite instance
+ *  @param mode the new composite mode, or -1 to keep the current mode
+ *  @param x the X position of the PIP
+ *  @param y the Y position of the PIP
+ *  @param w the width of the PIP, or <= 0 to keep the default of the mode
+ *  @param h the height of the PIP, or <= 0 to keep the default of the mode
+ *  @return TRUE if the transition to the new scene has been started
+ *
+ *  Change the composite mode and the PIP position and size together,
+ *  rebuilding the composite pipeline only once.
+ */
+gboolean
+gst_composite_set_scene (GstComposite * composite, gint mode,
+    gint x, gint y, gint w, gint h)
+{
+  g_return_val_if_fail (GST_IS_COMPOSITE (composite), FALSE);
+
+  if (composite->transition) {
+    WARN ("ignore changing scene in transition");
+    return FALSE;
+  }
+
+  if (COMPOSE_MODE_NONE <= mode && mode <= COMPOSE_MODE__LAST) {
+    gst_composite_layout_mode (composite, (GstCompositeMode) mode);
+  } else {
+    gst_composite_layout_mode (composite, composite->mode);
+  }
+
+  if (0 < w && 0 < h) {
+    composite->b_x = x;
+    composite->b_y = y;
+    composite->b_width = w;
+    composite->b_height = h;
+  }
 
   gst_composite_start_transition (composite);
+  return composite->transition;
 }
 
 /**
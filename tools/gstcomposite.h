@@ -150,6 +150,8 @@ struct _GstCompositeClass
 GType gst_composite_get_type (void);
 gboolean gst_composite_adjust_pip (GstComposite * composite,
     gint x, gint y, gint w, gint h);
+gboolean gst_composite_set_scene (GstComposite * composite, gint mode,
+    gint x, gint y, gint w, gint h);
 gint gst_composite_default_width ();
 gint gst_composite_default_height ();
 gint gst_check_composite_min_pip_width (gint pip_w);
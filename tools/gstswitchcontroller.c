@@ -530,6 +530,37 @@ gst_switch_controller__get_audio_port (GstSwitchController * controller,
   return g_variant_new ("(i)", port);
 }
 
+/**
+ * @memberof GstSwitchController
+ *
+ * Build the a(iii) array of (port, serve, type) of all preview ports.
+ */
+static GVariant *
+gst_switch_controller_build_preview_ports (GstSwitchController * controller)
+{
+  GArray *serves = NULL, *types = NULL;
+  GArray *ports =
+      gst_switch_server_get_preview_sink_ports (controller->server, &serves,
+      &types);
+  int n;
+  GVariantBuilder *builder;
+  GVariant *value;
+
+  builder = g_variant_builder_new (G_VARIANT_TYPE ("a(iii)"));
+  for (n = 0; n < ports->len; ++n) {
+    g_variant_builder_add (builder, "(iii)",
+        g_array_index (ports, gint, n),
+        g_array_index (serves, gint, n), g_array_index (types, gint, n));
+  }
+  value = g_variant_builder_end (builder);
+  g_variant_builder_unref (builder);
+
+  g_array_free (ports, TRUE);
+  g_array_free (serves, TRUE);
+  g_array_free (types, TRUE);
+  return value;
+}
+
 /**
  * @memberof GstSwitchController
  *
@@ -541,35 +572,28 @@ gst_switch_controller__get_preview_ports (GstSwitchController * controller,
 {
   GVariant *result = NULL;
   if (controller->server) {
-    GArray *serves = NULL, *types = NULL;
-    GArray *ports =
-        gst_switch_server_get_preview_sink_ports (controller->server, &serves,
-        &types);
-    int n;
-    GVariantBuilder *builder;
-    GVariant *value;
-    gchar *res;
-
-    builder = g_variant_builder_new (G_VARIANT_TYPE ("a(iii)"));
-    for (n = 0; n < ports->len; ++n) {
-      g_variant_builder_add (builder, "(iii)",
-          g_array_index (ports, gint, n),
-          g_array_index (serves, gint, n), g_array_index (types, gint, n));
-    }
-    value = g_variant_builder_end (builder);
-    //result = g_variant_new_tuple (&value, 1);
-    res = g_variant_print (value, FALSE);
+    GVariant *value = gst_switch_controller_build_preview_ports (controller);
+    gchar *res = g_variant_print (value, FALSE);
     result = g_variant_new ("(s)", res);
-
-    /*
-       INFO ("value: %s (%d)", g_variant_get_type_string (value),
-       g_variant_n_children (value));
-       INFO ("result: %s, %s", g_variant_get_type_string (result), res);
-     */
-
     g_free (res);
-    g_array_free (ports, TRUE);
-    g_array_free (types, TRUE);
+    g_variant_unref (g_variant_ref_sink (value));
+  }
+  return result;
+}
+
+/**
+ * @memberof GstSwitchController
+ *
+ * Remoting method stub of "get_preview_port_list".
+ */
+static GVariant *
+gst_switch_controller__get_preview_port_list (GstSwitchController *
+    controller, GDBusConnection * connection, GVariant * parameters)
+{
+  GVariant *result = NULL;
+  if (controller->server) {
+    GVariant *value = gst_switch_controller_build_preview_ports (controller);
+    result = g_variant_new_tuple (&value, 1);
   }
   return result;
 }
@@ -650,6 +674,28 @@ gst_switch_controller__adjust_pip (GstSwitchController * controller,
   return result;
 }
 
+/**
+ * @memberof GstSwitchController
+ *
+ * Remoting method stub of "apply_scene".
+ */
+static GVariant *
+gst_switch_controller__apply_scene (GstSwitchController * controller,
+    GDBusConnection * connection, GVariant * parameters)
+{
+  GVariant *result = NULL;
+  gint mode, port_a, port_b, x, y, w, h;
+  gboolean ok = FALSE;
+  g_variant_get (parameters, "(iiiiiii)", &mode, &port_a, &port_b,
+      &x, &y, &w, &h);
+  if (controller->server) {
+    ok = gst_switch_server_apply_scene (controller->server, mode,
+        port_a, port_b, x, y, w, h);
+    result = g_variant_new ("(b)", ok);
+  }
+  return result;
+}
+
 /**
  * @memberof GstSwitchController
  *
@@ -731,6 +777,8 @@ static MethodTableEntry gst_switch_controller_method_table[] = {
   {"get_audio_port", (MethodFunc) gst_switch_controller__get_audio_port},
   {"get_preview_ports",
       (MethodFunc) gst_switch_controller__get_preview_ports},
+  {"get_preview_port_list",
+      (MethodFunc) gst_switch_controller__get_preview_port_list},
   {"set_composite_mode",
       (MethodFunc) gst_switch_controller__set_composite_mode},
   {"get_composite_mode",
@@ -741,6 +789,7 @@ static MethodTableEntry gst_switch_controller_method_table[] = {
   {"mark_face", (MethodFunc) gst_switch_controller__mark_face},
   {"mark_tracking", (MethodFunc) gst_switch_controller__mark_tracking},
   {"switch", (MethodFunc) gst_switch_controller__switch},
+  {"apply_scene", (MethodFunc) gst_switch_controller__apply_scene},
   {NULL, NULL}
 };
 
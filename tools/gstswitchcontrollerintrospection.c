@@ -41,6 +41,9 @@ const gchar gstswitchcontroller_introspection_xml[] =
     "    <method name='get_preview_ports'>"
     "      <arg type='s' name='ports' direction='out'/>"
     "    </method>"
+    "    <method name='get_preview_port_list'>"
+    "      <arg type='a(iii)' name='ports' direction='out'/>"
+    "    </method>"
     "    <method name='set_composite_mode'>"
     "      <arg type='i' name='channel' direction='in'/>"
     "      <arg type='b' name='result' direction='out'/>"
@@ -67,6 +70,16 @@ const gchar gstswitchcontroller_introspection_xml[] =
     "      <arg type='i' name='port' direction='in'/>"
     "      <arg type='b' name='result' direction='out'/>"
     "    </method>"
+    "    <method name='apply_scene'>"
+    "      <arg type='i' name='mode' direction='in'/>"
+    "      <arg type='i' name='port_a' direction='in'/>"
+    "      <arg type='i' name='port_b' direction='in'/>"
+    "      <arg type='i' name='x' direction='in'/>"
+    "      <arg type='i' name='y' direction='in'/>"
+    "      <arg type='i' name='w' direction='in'/>"
+    "      <arg type='i' name='h' direction='in'/>"
+    "      <arg type='b' name='result' direction='out'/>"
+    "    </method>"
     "    <method name='click_video'>"
     "      <arg type='i' name='x' direction='in'/>"
     "      <arg type='i' name='y' direction='in'/>"
@@ -25,6 +25,7 @@
 
 #include <gst/gst.h>
 #include <gio/gio.h>
+#include <gio/gunixsocketaddress.h>
 #include <stdlib.h>
 #include "gstswitchserver.h"
 #include "gstrecorder.h"
@@ -37,6 +38,7 @@
 #include <sys/types.h>
 #include <unistd.h>
 #include <string.h>
+#include <errno.h>
 #include <sys/stat.h>
 
 #define GST_SWITCH_SERVER_DEFAULT_HOST "::"     /* All IPv4 *and* IPv6 addresses */
@@ -222,6 +224,12 @@ static GOptionEntry entries[] = {
       "Specify the video input listen port.", "NUM"},
   {"audio-input-port", 'a', 0, G_OPTION_ARG_INT, &opts.audio_input_port,
       "Specify the audio input listen port.", "NUM"},
+  {"video-input-socket", 0, 0, G_OPTION_ARG_FILENAME,
+        &opts.video_input_socket,
+      "Also accept video inputs on the unix-domain socket PATH.", "PATH"},
+  {"audio-input-socket", 0, 0, G_OPTION_ARG_FILENAME,
+        &opts.audio_input_socket,
+      "Also accept audio inputs on the unix-domain socket PATH.", "PATH"},
   {"controller-address", 'c', 0, G_OPTION_ARG_STRING, &opts.controller_address,
       "Specify DBus-Address for remote control, defaults to "
         GST_SWITCH_SERVER_DEFAULT_CONTROLLER_ADDRESS ".", "ADDRESS"},
@@ -269,9 +277,13 @@ gst_switch_server_init (GstSwitchServer * srv)
   srv->video_acceptor_port = opts.video_input_port;
   srv->video_acceptor_socket = NULL;
   srv->video_acceptor = NULL;
+  srv->video_local_socket = NULL;
+  srv->video_local_path = g_strdup (opts.video_input_socket);
   srv->audio_acceptor_port = opts.audio_input_port;
   srv->audio_acceptor_socket = NULL;
   srv->audio_acceptor = NULL;
+  srv->audio_local_socket = NULL;
+  srv->audio_local_path = g_strdup (opts.audio_input_socket);
   srv->controller = NULL;
   srv->main_loop = NULL;
   srv->cases = NULL;
@@ -319,6 +331,14 @@ gst_switch_server_finalize (GstSwitchServer * srv)
     g_object_unref (srv->video_acceptor_socket);
     srv->video_acceptor_socket = NULL;
   }
+
+  if (srv->video_local_socket) {
+    g_object_unref (srv->video_local_socket);
+    srv->video_local_socket = NULL;
+    unlink (srv->video_local_path);
+  }
+  g_free (srv->video_local_path);
+  srv->video_local_path = NULL;
 /*
   if (srv->video_acceptor) {
     DEBUG("Waiting for video_acceptor thread to die.");
@@ -329,6 +349,14 @@ gst_switch_server_finalize (GstSwitchServer * srv)
     g_object_unref (srv->audio_acceptor_socket);
     srv->audio_acceptor_socket = NULL;
   }
+
+  if (srv->audio_local_socket) {
+    g_object_unref (srv->audio_local_socket);
+    srv->audio_local_socket = NULL;
+    unlink (srv->audio_local_path);
+  }
+  g_free (srv->audio_local_path);
+  srv->audio_local_path = NULL;
 /*
   if (srv->audio_acceptor) {
     DEBUG("Waiting for audio_acceptor thread to die.");
@@ -873,6 +901,114 @@ socket_listen_failed:
   }
 }
 
+/**
+ * gst_switch_server_listen_local:
+ * @path: The file name of the unix-domain socket.
+ * @return: The socket instance.
+ *
+ * Create a unix-domain socket at @path and listen on it. Inputs on the
+ * same host connected through it skip the TCP/IP stack.
+ */
+static GSocket *
+gst_switch_server_listen_local (GstSwitchServer * srv, const gchar * path)
+{
+  GError *err = NULL;
+  GSocket *socket;
+  GSocketAddress *saddr;
+
+  /* a socket file left by a previous run makes the bind fail */
+  unlink (path);
+
+  socket = g_socket_new (G_SOCKET_FAMILY_UNIX, G_SOCKET_TYPE_STREAM,
+      G_SOCKET_PROTOCOL_DEFAULT, &err);
+  if (!socket)
+    goto socket_new_failed;
+
+  saddr = g_unix_socket_address_new (path);
+  if (!g_socket_bind (socket, saddr, FALSE, &err))
+    goto socket_bind_failed;
+
+  g_object_unref (saddr);
+
+  g_socket_set_listen_backlog (socket, GST_SWITCH_SERVER_LISTEN_BACKLOG);
+  if (!g_socket_listen (socket, &err))
+    goto socket_listen_failed;
+
+  INFO ("Listening on unix socket %s", path);
+  return socket;
+
+  /* Errors Handling */
+
+socket_new_failed:
+  {
+    ERROR ("new socket: %s", err->message);
+    g_clear_error (&err);
+    return NULL;
+  }
+
+socket_bind_failed:
+  {
+    ERROR ("bind socket %s: %s", path, err->message);
+    g_clear_error (&err);
+    g_object_unref (saddr);
+    g_object_unref (socket);
+    return NULL;
+  }
+
+socket_listen_failed:
+  {
+    ERROR ("listen socket %s: %s", path, err->message);
+    g_clear_error (&err);
+    g_object_unref (socket);
+    return NULL;
+  }
+}
+
+/**
+ * gst_switch_server_accept:
+ * @inet: The TCP listener socket.
+ * @local: The unix-domain listener socket or NULL.
+ * @return: The accepted socket or NULL.
+ *
+ * Wait for a new connection on either listener socket and accept it.
+ */
+static GSocket *
+gst_switch_server_accept (GstSwitchServer * srv, GSocket * inet,
+    GSocket * local, GError ** error)
+{
+  GPollFD fds[3];
+  gint num_fds = 2;
+  gint res;
+
+  if (!local)
+    return g_socket_accept (inet, srv->cancellable, error);
+
+  fds[0].fd = g_socket_get_fd (inet);
+  fds[0].events = G_IO_IN;
+  fds[0].revents = 0;
+  fds[1].fd = g_socket_get_fd (local);
+  fds[1].events = G_IO_IN;
+  fds[1].revents = 0;
+  if (g_cancellable_make_pollfd (srv->cancellable, &fds[2]))
+    num_fds = 3;
+
+  res = g_poll (fds, num_fds, -1);
+  if (num_fds == 3)
+    g_cancellable_release_fd (srv->cancellable);
+
+  if (g_cancellable_set_error_if_cancelled (srv->cancellable, error))
+    return NULL;
+  if (res < 0) {
+    g_set_error (error, G_IO_ERROR, g_io_error_from_errno (errno),
+        "poll: %s", g_strerror (errno));
+    return NULL;
+  }
+
+  if (fds[1].revents & G_IO_IN)
+    return g_socket_accept (local, srv->cancellable, error);
+  return g_socket_accept (inet, srv->cancellable, error);
+}
+
 /**
  * gst_switch_server_video_acceptor:
  *
@@ -882,7 +1018,7 @@ static gpointer
 gst_switch_server_video_acceptor (GstSwitchServer * srv)
 {
   GSocket *socket;
-  GError *error;
+  GError *error = NULL;
   gint bound_port;
 
   srv->video_acceptor_socket = gst_switch_server_listen (srv,
@@ -892,11 +1028,21 @@ gst_switch_server_video_acceptor (GstSwitchServer * srv)
     return NULL;
   }
 
+  if (srv->video_local_path) {
+    srv->video_local_socket = gst_switch_server_listen_local (srv,
+        srv->video_local_path);
+    if (!srv->video_local_socket) {
+      gst_switch_server_quit (srv, -__LINE__);
+      return NULL;
+    }
+  }
+
   while (srv->video_acceptor && srv->video_acceptor_socket && srv->cancellable) {
-    socket =
-        g_socket_accept (srv->video_acceptor_socket, srv->cancellable, &error);
+    socket = gst_switch_server_accept (srv, srv->video_acceptor_socket,
+        srv->video_local_socket, &error);
     if (!socket) {
       ERROR ("accept: %s", error->message);
+      g_clear_error (&error);
       continue;
     }
 
@@ -919,7 +1065,7 @@ static gpointer
 gst_switch_server_audio_acceptor (GstSwitchServer * srv)
 {
   GSocket *socket;
-  GError *error;
+  GError *error = NULL;
   gint bound_port;
 
   srv->audio_acceptor_socket = gst_switch_server_listen (srv,
@@ -929,11 +1075,21 @@ gst_switch_server_audio_acceptor (GstSwitchServer * srv)
     return NULL;
   }
 
+  if (srv->audio_local_path) {
+    srv->audio_local_socket = gst_switch_server_listen_local (srv,
+        srv->audio_local_path);
+    if (!srv->audio_local_socket) {
+      gst_switch_server_quit (srv, -__LINE__);
+      return NULL;
+    }
+  }
+
   while (srv->audio_acceptor && srv->audio_acceptor_socket && srv->cancellable) {
-    socket =
-        g_socket_accept (srv->audio_acceptor_socket, srv->cancellable, &error);
+    socket = gst_switch_server_accept (srv, srv->audio_acceptor_socket,
+        srv->audio_local_socket, &error);
     if (!socket) {
       ERROR ("accept: %s", error->message);
+      g_clear_error (&error);
       continue;
     }
 
@@ -1226,6 +1382,9 @@ gst_switch_server_switch (GstSwitchServer * srv, gint channel, gint port)
 
   for (item = srv->cases; item; item = g_list_next (item)) {
     GstCase *cas = GST_CASE (item->data);
+    /* cases being switched are already on their way out */
+    if (cas->switching)
+      continue;
     switch (channel) {
       case 'A':
         if (cas->type == GST_CASE_COMPOSITE_VIDEO_A)
@@ -1367,6 +1526,109 @@ error_start_work:
   }
 }
 
+/**
+ * gst_switch_server_get_channel_port:
+ *  @return: the port currently on the channel, or 0 if there is none.
+ *
+ *  Find the port currently composed onto a channel.
+ */
+static gint
+gst_switch_server_get_channel_port (GstSwitchServer * srv, gint channel)
+{
+  GstCaseType type;
+  GList *item;
+  gint port = 0;
+
+  switch (channel) {
+    case 'A':
+      type = GST_CASE_COMPOSITE_VIDEO_A;
+      break;
+    case 'B':
+      type = GST_CASE_COMPOSITE_VIDEO_B;
+      break;
+    case 'a':
+      type = GST_CASE_COMPOSITE_AUDIO;
+      break;
+    default:
+      return 0;
+  }
+
+  GST_SWITCH_SERVER_LOCK_CASES (srv);
+  for (item = srv->cases; item; item = g_list_next (item)) {
+    GstCase *cas = GST_CASE (item->data);
+    if (cas->type == type && !cas->switching) {
+      port = cas->sink_port;
+      break;
+    }
+  }
+  GST_SWITCH_SERVER_UNLOCK_CASES (srv);
+  return port;
+}
+
+/**
+ * gst_switch_server_apply_scene:
+ *  @param mode the new composite mode, or -1 to keep the current mode
+ *  @param port_a the port for channel A, or <= 0 to keep it
+ *  @param port_b the port for channel B, or <= 0 to keep it
+ *  @param x the X position of the PIP
+ *  @param y the Y position of the PIP
+ *  @param w the width of the PIP, or <= 0 to keep the default of the mode
+ *  @param h the height of the PIP, or <= 0 to keep the default of the mode
+ *  @return: TRUE if succeeded.
+ *
+ *  Switch the video channels and change the composite mode and PIP at
+ *  once, so that the composite pipeline only goes through one transition.
+ *  A new mode or PIP is refused during a transition, then no channel is
+ *  switched either.
+ *
+ */
+gboolean
+gst_switch_server_apply_scene (GstSwitchServer * srv, gint mode,
+    gint port_a, gint port_b, gint x, gint y, gint w, gint h)
+{
+  gboolean result = TRUE;
+
+  g_return_val_if_fail (GST_IS_COMPOSITE (srv->composite), FALSE);
+
+  /* gst_composite_set_scene refuses to change the scene in a transition,
+     check before switching, so a failed scene changes nothing */
+  if ((0 <= mode || (0 < w && 0 < h)) && srv->composite->transition) {
+    WARN ("ignore applying scene in transition");
+    return FALSE;
+  }
+
+  if (0 < port_a && gst_switch_server_get_channel_port (srv, 'A') != port_a)
+    result = gst_switch_server_switch (srv, 'A', port_a) && result;
+  if (0 < port_b && gst_switch_server_get_channel_port (srv, 'B') != port_b)
+    result = gst_switch_server_switch (srv, 'B', port_b) && result;
+
+  if (mode < 0 && (w <= 0 || h <= 0))
+    return result;
+
+  GST_SWITCH_SERVER_LOCK_PIP (srv);
+
+  if (0 < w && 0 < h) {
+    if (x < 0)
+      x = 0;
+    if (y < 0)
+      y = 0;
+    w = gst_check_composite_min_pip_width (w);
+    h = gst_check_composite_min_pip_height (h);
+  }
+
+  if (gst_composite_set_scene (srv->composite, mode, x, y, w, h)) {
+    srv->pip_x = srv->composite->b_x;
+    srv->pip_y = srv->composite->b_y;
+    srv->pip_w = srv->composite->b_width;
+    srv->pip_h = srv->composite->b_height;
+  } else {
+    result = FALSE;
+  }
+
+  GST_SWITCH_SERVER_UNLOCK_PIP (srv);
+  return result;
+}
+
 gboolean
 gst_switch_server_click_video (GstSwitchServer * srv,
     gint avx, gint avy, gint avw, gint avh)
@@ -46,6 +46,8 @@ typedef struct _GstSwitchServerOpts GstSwitchServerOpts;
  *  @param controller_address the dbus address for the controller
  *  @param video_input_port the video input TCP port
  *  @param audio_input_port the audio input TCP port
+ *  @param video_input_socket the video input unix-domain socket path
+ *  @param audio_input_socket the audio input unix-domain socket path
  */
 struct _GstSwitchServerOpts
 {
@@ -54,6 +56,8 @@ struct _GstSwitchServerOpts
   gchar *controller_address;
   gint video_input_port;
   gint audio_input_port;
+  gchar *video_input_socket;
+  gchar *audio_input_socket;
 //should really be in here
 //gboolean verbose;
   gboolean low_res;
@@ -74,10 +78,14 @@ struct _GstSwitchServerOpts
  *  @param video_acceptor the video acceptor thread
  *  @param video_acceptor_socket the video acceptor socket
  *  @param video_acceptor_port the video acceptor port number
+ *  @param video_local_socket the video unix-domain acceptor socket
+ *  @param video_local_path the path of the video unix-domain socket
  *  @param audio_acceptor_lock the lock for the audio acceptor
  *  @param audio_acceptor the audio acceptor thread
  *  @param audio_acceptor_socket the audio acceptor socket
  *  @param audio_acceptor_port the audio acceptor port
+ *  @param audio_local_socket the audio unix-domain acceptor socket
+ *  @param audio_local_path the path of the audio unix-domain socket
  *  @param controller_lock the lock for controller
  *  @param controller_thread the controller thread (deprecated)
  *  @param controller_socket the controller socket (deprecated)
@@ -116,11 +124,15 @@ struct _GstSwitchServer
   GThread *video_acceptor;
   GSocket *video_acceptor_socket;
   gint video_acceptor_port;
+  GSocket *video_local_socket;
+  gchar *video_local_path;
 
   GMutex audio_acceptor_lock;
   GThread *audio_acceptor;
   GSocket *audio_acceptor_socket;
   gint audio_acceptor_port;
+  GSocket *audio_local_socket;
+  gchar *audio_local_path;
 
   GMutex controller_lock;
   GstSwitchController *controller;
@@ -173,6 +185,8 @@ void gst_switch_server_mark_face (GstSwitchServer * srv,
     GVariant * faces, gboolean tracking);
 guint gst_switch_server_adjust_pip (GstSwitchServer * srv, gint dx, gint dy,
     gint dw, gint dh);
+gboolean gst_switch_server_apply_scene (GstSwitchServer * srv, gint mode,
+    gint port_a, gint port_b, gint x, gint y, gint w, gint h);
 gboolean gst_switch_server_new_record (GstSwitchServer * srv);
 
 GstCaps *gst_switch_server_getcaps (void);